@@ -2,7 +2,6 @@
 import re
 import datetime as dt
 import csv
-import html5lib
 
 # ugly hack
 import sys
@@ -12,7 +11,7 @@ from pyutils.legislation import *
 class AKLegislationScraper(LegislationScraper):
 
     state = 'ak'
-    soup_parser = html5lib.HTMLParser(tree=html5lib.treebuilders.getTreeBuilder('beautifulsoup')).parse
+    html_parser = 'html5lib'
 
     metadata = {
         'state_name': 'Alaska',
@@ -54,7 +53,7 @@ class AKLegislationScraper(LegislationScraper):
         session = str(18 + ((int(year) - 1993) / 2))
 
         leg_list_url = "http://www.legis.state.ak.us/basis/commbr_info.asp?session=%s" % session
-        leg_list = self.soup_parser(self.urlopen(leg_list_url))
+        leg_list = self.parse_html(self.urlopen(leg_list_url))
 
         leg_re = "get_mbr_info.asp\?member=.+&house=%s&session=%s" % (
             chamber_abbr, session)
@@ -62,7 +61,7 @@ class AKLegislationScraper(LegislationScraper):
 
         for link in links:
             member_url = "http://www.legis.state.ak.us/basis/" + link['href']
-            member_page = self.soup_parser(self.urlopen(member_url))
+            member_page = self.parse_html(self.urlopen(member_url))
 
             if member_page.find('td', text=re.compile('Resigned')):
                 # Need a better way to handle this than just dropping
@@ -109,7 +108,7 @@ class AKLegislationScraper(LegislationScraper):
         bill_list_url = 'http://www.legis.state.ak.us/basis/range_multi.asp?session=%s&date1=%s&date2=%s' % (session, date1, date2)
         self.log("Getting bill list for %s %s (this may take a long time)." %
                  (chamber, session))
-        bill_list = self.soup_parser(self.urlopen(bill_list_url))
+        bill_list = self.parse_html(self.urlopen(bill_list_url))
 
         # Find bill links
         re_str = "bill=%s\d+" % bill_abbr
@@ -122,7 +121,7 @@ class AKLegislationScraper(LegislationScraper):
 
             # Get the bill info page and strip malformed t
             info_url = "http://www.legis.state.ak.us/basis/%s" % link['href']
-            info_page = self.soup_parser(self.urlopen(info_url))
+            info_page = self.parse_html(self.urlopen(info_url))
             bill.add_source(info_url)
 
             # Get sponsors
@@ -168,7 +167,7 @@ class AKLegislationScraper(LegislationScraper):
 
             # Get versions
             text_list_url = "http://www.legis.state.ak.us/basis/get_fulltext.asp?session=%s&bill=%s" % (session, bill_id)
-            text_list = self.soup_parser(self.urlopen(text_list_url))
+            text_list = self.parse_html(self.urlopen(text_list_url))
             bill.add_source(text_list_url)
 
             text_link_re = re.compile('^get_bill_text?')
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Benchmark resolving a session's roll calls in LegislationScraper.add_bill:
+a synthetic session of 5,000 roll-call votes (five per bill) in a
+150-member chamber, compared with building a fresh record per vote cast
+the way add_bill used to.
+
+    python benchmarks/bench_add_bill.py --votes 5000
+"""
+import os
+import sys
+import gc
+import time
+import random
+from optparse import OptionParser
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.legislation import LegislationScraper, Legislator, Bill, Vote
+
+
+class NullOutput(object):
+
+    def save_bill(self, bill):
+        pass
+
+    def save_legislator(self, legislator):
+        pass
+
+
+class Scraper(LegislationScraper):
+    state = 'zz'
+
+
+def session(members, n_votes, rnd):
+    bills = []
+    for i in xrange(n_votes // 5):
+        bill = Bill('2009', 'lower', 'HB %d' % i, 'Bill %d' % i)
+        for j in xrange(5):
+            vote = Vote('lower', None, 'Motion %d' % j, True, 0, 0, 0)
+            for member in members:
+                # names come from parsed pages, so each is a new string
+                name = ''.join(list(member['last_name']))
+                rnd.choice([vote.yes, vote.yes, vote.no, vote.other])(name)
+            bill.add_vote(vote)
+        bills.append(bill)
+    return bills
+
+
+def old_resolve(scraper, bill):
+    for vote in bill['votes']:
+        for type in ['yes_votes', 'no_votes', 'other_votes']:
+            vote[type] = map(lambda l:
+                             {'name': l,
+                              'leg_id': scraper.matcher[vote['chamber']][l]},
+                             vote[type])
+
+
+def run(members, bills, resolve):
+    scraper = Scraper()
+    scraper.output = NullOutput()
+    scraper._reset_matchers()
+    for member in members:
+        scraper.add_legislator(member)
+
+    gc.collect()
+    start = time.time()
+    for bill in bills:
+        resolve(scraper, bill)
+    elapsed = time.time() - start
+
+    records = set()
+    for bill in bills:
+        for vote in bill['votes']:
+            for type in ('yes_votes', 'no_votes', 'other_votes'):
+                records.update(id(record) for record in vote[type])
+    return elapsed, len(records)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-v', '--votes', type='int', default=5000)
+    parser.add_option('-m', '--members', type='int', default=150)
+    options, args = parser.parse_args()
+
+    members = [Legislator('2009', 'lower', str(i), 'Member Name%d' % i,
+                          'Member', 'Name%d' % i, '', 'Independent')
+               for i in xrange(options.members)]
+    cast = options.votes * options.members
+
+    for label, resolve in (('per vote cast', old_resolve),
+                           ('memoized', LegislationScraper.add_bill)):
+        rnd = random.Random(0)
+        bills = session(members, options.votes, rnd)
+        elapsed, records = run(members, bills, resolve)
+        print '%-14s %d votes cast in %.2fs (%.0f/s), %d record dicts' % (
+            label, cast, elapsed, cast / elapsed, records)
+        del bills
+        gc.collect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Benchmark CASQLImporter.scrape_bills against a local SQLite copy of the
+capublic schema filled with a synthetic session: loading each bill
+through its relations (import_bill) compared with loading a batch of
+bills with one query per table (import_bills).
+
+    python benchmarks/bench_ca_import.py --bills 2000
+"""
+import os
+import sys
+import gc
+import time
+import random
+import shutil
+import tempfile
+import datetime
+from optparse import OptionParser
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import imp
+from sqlalchemy import Index
+
+ca = imp.load_source('ca_get_legislation',
+                     os.path.join(os.path.dirname(os.path.dirname(
+                         os.path.abspath(__file__))), 'ca',
+                         'get_legislation.py'))
+
+BILL_XML = (u'<caml:MeasureDoc xmlns:caml="http://lc.ca.gov/legalservices/'
+            u'schemas/caml.1#"><caml:Description><caml:Title>An act relating '
+            u'to %(id)s</caml:Title><caml:Subject>Subject of %(id)s'
+            u'</caml:Subject></caml:Description><caml:Bill>%(body)s'
+            u'</caml:Bill></caml:MeasureDoc>')
+
+
+def build_database(url, n_bills, rnd, members=80, session='20092010'):
+    """
+    Create the capublic tables at `url` and fill them with `n_bills`
+    Assembly bills of `session`, each with three versions, two authors,
+    ten actions and three votes of `members` legislators.
+    """
+    engine = ca.create_engine(url)
+    ca.Base.metadata.create_all(engine)
+    rows = dict((model, []) for model in (
+        ca.CALocation, ca.CAMotion, ca.CABill, ca.CABillVersion,
+        ca.CABillVersionAuthor, ca.CABillAction, ca.CAVoteSummary,
+        ca.CAVoteDetail))
+
+    for code, description in (('AFLOOR', 'Assembly Floor'),
+                              ('SFLOOR', 'Senate Floor'),
+                              ('CX08', 'Asm Appropriations')):
+        rows[ca.CALocation].append(dict(session_year=session,
+                                        location_code=code,
+                                        description=description))
+    for motion_id in xrange(1, 21):
+        rows[ca.CAMotion].append(dict(motion_id=motion_id,
+                                      motion_text='Motion %d' % motion_id))
+
+    names = ['Member%d' % i for i in xrange(members)]
+    start = datetime.datetime(2009, 1, 5)
+    history_id = 0
+    for i in xrange(n_bills):
+        bill_id = '%s0AB%d' % (session, i + 1)
+        rows[ca.CABill].append(dict(bill_id=bill_id, session_year=session,
+                                    session_num='0', measure_type='AB',
+                                    measure_num=i + 1))
+
+        for v in xrange(3):
+            version_id = '%s%02d' % (bill_id, v)
+            rows[ca.CABillVersion].append(dict(
+                bill_version_id=version_id, bill_id=bill_id, version_num=v,
+                bill_version_action_date=start + datetime.timedelta(30 * v),
+                vote_required=rnd.choice(['Majority', '2/3']),
+                bill_xml=BILL_XML % {'id': bill_id,
+                                     'body': u'<p>Text</p>' * 20}))
+            for a in xrange(2):
+                rows[ca.CABillVersionAuthor].append(dict(
+                    bill_version_id=version_id, house='ASSEMBLY',
+                    contribution='LEAD_AUTHOR', name=rnd.choice(names),
+                    trans_update=start + datetime.timedelta(
+                        seconds=i * 10 + v * 2 + a)))
+
+        for a in xrange(10):
+            history_id += 1
+            rows[ca.CABillAction].append(dict(
+                bill_id=bill_id, bill_history_id=history_id,
+                action_date=start + datetime.timedelta(a * 7),
+                action='Action %d' % a, primary_location='Assembly'))
+
+        for n, location in enumerate(('CX08', 'AFLOOR', 'AFLOOR')):
+            when = start + datetime.timedelta(days=20 + 25 * n, seconds=i)
+            motion_id = rnd.randint(1, 20)
+            rows[ca.CAVoteSummary].append(dict(
+                bill_id=bill_id, location_code=location,
+                vote_date_time=when, vote_date_seq=n, motion_id=motion_id,
+                ayes=members // 2, noes=members // 4,
+                abstain=members - members // 2 - members // 4,
+                vote_result='(PASS)'))
+            for j, name in enumerate(names):
+                rows[ca.CAVoteDetail].append(dict(
+                    bill_id=bill_id, location_code=location,
+                    legislator_name=name, vote_date_time=when,
+                    vote_date_seq=n, motion_id=motion_id,
+                    vote_code=rnd.choice(['AYE', 'NOE', 'ABS']),
+                    trans_uid='%d-%d-%d' % (i, n, j), trans_update=when))
+
+    for model, table_rows in rows.iteritems():
+        engine.execute(model.__table__.insert(), table_rows)
+
+    # capublic indexes these columns; without them every per-bill query
+    # would scan its whole table
+    for model, column in ((ca.CABill, 'session_year'),
+                          (ca.CABillVersion, 'bill_id'),
+                          (ca.CABillVersionAuthor, 'bill_version_id'),
+                          (ca.CABillAction, 'bill_id'),
+                          (ca.CAVoteSummary, 'bill_id'),
+                          (ca.CAVoteDetail, 'bill_id')):
+        table = model.__table__
+        Index('%s_%s' % (table.name, column), table.c[column]).create(
+            engine)
+
+
+def run(url, bulk):
+    importer = ca.CASQLImporter(url=url)
+    importer.bulk_import = bulk
+    gc.collect()
+    start = time.time()
+    bills = list(importer.scrape_bills('lower', '2009'))
+    return time.time() - start, bills
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-b', '--bills', type='int', default=2000)
+    options, args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        url = 'sqlite:///%s' % os.path.join(tmp, 'capublic.sqlite')
+        start = time.time()
+        build_database(url, options.bills, random.Random(0))
+        print 'built %d bills in %.1fs' % (options.bills, time.time() - start)
+
+        results = []
+        for label, bulk in (('per bill', False), ('bulk', True)):
+            elapsed, bills = run(url, bulk)
+            results.append(bills)
+            print '%-9s %d bills in %.2fs (%.0f/s)' % (
+                label, len(bills), elapsed, len(bills) / elapsed)
+        assert results[0] == results[1]
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
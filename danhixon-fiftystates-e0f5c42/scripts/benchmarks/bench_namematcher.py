@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Benchmark NameMatcher lookups the way add_bill makes them: a 400-member
+chamber and a stream of roll-call names, most written exactly as some
+form of a member's name and the rest with a typo, a suffix or accents.
+
+    python benchmarks/bench_namematcher.py -n 1000000
+"""
+import os
+import sys
+import time
+import random
+from optparse import OptionParser
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.legislation import NameMatcher
+
+FIRST = ['John', 'Mary', 'Robert', 'Linda', 'Michael', 'Susan', 'David',
+         'Karen', 'James', 'Nancy', 'William', 'Lisa', 'Richard', 'Jose',
+         'Thomas', 'Patricia', 'Daniel', 'Maria', 'Paul', 'Sandra']
+LAST = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia',
+        'Miller', 'Davis', 'Rodriguez', 'Martinez', 'Hernandez', 'Lopez',
+        'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore',
+        'Jackson', 'Martin', 'Lee', 'Perez', 'Thompson', 'White', 'Harris',
+        'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson', 'Walker',
+        'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen',
+        'Hill', 'Flores']
+
+
+def chamber(size):
+    members = []
+    for i in xrange(size):
+        first = FIRST[i % len(FIRST)]
+        last = LAST[(i // len(FIRST)) % len(LAST)]
+        if i >= len(FIRST) * len(LAST):
+            last += str(i)
+        members.append({'full_name': '%s %s' % (first, last),
+                        'first_name': first, 'last_name': last,
+                        'middle_name': 'ABCDEFGH'[i % 8]})
+    return members
+
+
+def mangle(name, rnd):
+    kind = rnd.randint(0, 2)
+    if kind == 0:
+        i = rnd.randint(1, len(name) - 2)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if kind == 1:
+        return name + ' Jr.'
+    return name.replace('e', '\xc3\xa9')
+
+
+def votes(members, n, messy, rnd):
+    formats = ['%(last_name)s', '%(last_name)s, %(first_name)s',
+               '%(first_name)s %(last_name)s', '%(full_name)s']
+    names = []
+    for i in xrange(n):
+        member = rnd.choice(members)
+        name = rnd.choice(formats) % member
+        if rnd.random() < messy:
+            name = mangle(name, rnd)
+        names.append(name)
+    return names
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-n', '--lookups', type='int', default=1000000)
+    parser.add_option('-m', '--members', type='int', default=400)
+    parser.add_option('--messy', type='float', default=0.05,
+                      help='fraction of names with typos/suffixes/accents')
+    options, args = parser.parse_args()
+
+    rnd = random.Random(0)
+    members = chamber(options.members)
+    names = votes(members, options.lookups, options.messy, rnd)
+
+    start = time.time()
+    matcher = NameMatcher.build([(m, m['full_name']) for m in members],
+                                fuzzy_threshold=0.75)
+    build = time.time() - start
+
+    start = time.time()
+    found = 0
+    for name in names:
+        if matcher[name] is not None:
+            found += 1
+    elapsed = time.time() - start
+
+    exact = NameMatcher.build([(m, m['full_name']) for m in members])
+    exact_found = len([name for name in names if exact[name] is not None])
+
+    print 'build: %d members in %.3fs' % (len(members), build)
+    print 'lookups: %d in %.2fs (%.0f/s)' % (len(names), elapsed,
+                                            len(names) / elapsed)
+    print 'resolved: %d (%.1f%%), exact only: %d (%.1f%%)' % (
+        found, 100.0 * found / len(names),
+        exact_found, 100.0 * exact_found / len(names))
+
+
+if __name__ == '__main__':
+    main()
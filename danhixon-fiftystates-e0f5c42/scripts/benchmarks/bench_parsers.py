@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Compare parse time per page for each installed HTML parser (see
+pyutils.parsing) on pages from a scraper's cache directory, or on a
+synthetic bill list if no cache is given. Each page is parsed and then
+searched with a couple of findAll calls, as a scraper would.
+
+    python benchmarks/bench_parsers.py --cache cache/pa --pages 200
+"""
+import os
+import sys
+import time
+from optparse import OptionParser
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.cache import FileCache, ShardedCache
+from pyutils.parsing import parse_html, available_parsers
+
+
+def cached_pages(path, limit):
+    if os.path.exists(os.path.join(path, ShardedCache.index_name)):
+        cache = ShardedCache(path)
+    else:
+        cache = FileCache(path)
+    return [cache.get_key(key) for key in sorted(cache.keys())[:limit]]
+
+
+def synthetic_page(rows):
+    parts = ['<html><head><title>Bills</title></head><body><table>']
+    for i in xrange(rows):
+        parts.append('<tr><td><a href="/bill.cfm?id=%d">HB %d</a></td>'
+                     '<td class="title">An act relating to item %d'
+                     '&nbsp;<b>(amended)</b></td><td>1/%d/2009</td></tr>' %
+                     (i, i, i, i % 28 + 1))
+    parts.append('</table></body></html>')
+    return ''.join(parts)
+
+
+def work(doc):
+    links = [a['href'] for a in doc.findAll('a')]
+    titles = [td.contents[0] for td in doc.findAll('td', {'class': 'title'})]
+    return len(links) + len(titles)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-c', '--cache', help='cache directory of pages')
+    parser.add_option('-p', '--pages', type='int', default=100,
+                      help='number of cached pages to use')
+    parser.add_option('-r', '--rows', type='int', default=1000,
+                      help='rows in the synthetic page')
+    options, args = parser.parse_args()
+
+    if options.cache:
+        pages = cached_pages(options.cache, options.pages)
+    else:
+        pages = [synthetic_page(options.rows)] * 5
+    size = sum([len(page) for page in pages])
+    print '%d pages, %d KB' % (len(pages), size / 1024)
+
+    baseline = None
+    for name in available_parsers():
+        start = time.time()
+        found = 0
+        for page in pages:
+            found += work(parse_html(page, name))
+        per_page = (time.time() - start) / len(pages) * 1000
+        if baseline is None:
+            baseline = per_page
+        print '%-9s %8.1f ms/page  %5.1fx  (%d matches)' % (
+            name, per_page, baseline / per_page, found)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Peak memory of a scrape whose bills are yielded through write_bills,
+compared with building the whole session before writing it, for
+sessions of increasing size. Each run writes to a temporary directory
+in a fresh interpreter.
+
+    python benchmarks/bench_pipeline.py --bills 1000 --bills 5000
+"""
+import os
+import sys
+import time
+import shutil
+import resource
+import tempfile
+import subprocess
+from optparse import OptionParser
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.legislation import LegislationScraper, Bill, Vote
+
+
+class Scraper(LegislationScraper):
+    state = 'zz'
+    n_bills = 1000
+    stream = True
+
+    def make_bill(self, i):
+        bill = Bill('2009', 'lower', 'HB %d' % i, 'An act relating to %d' % i)
+        for j in xrange(100):
+            bill.add_action('lower', 'Action %d on HB %d' % (j, i), None)
+        for j in xrange(5):
+            vote = Vote('lower', None, 'Motion %d' % j, True, 0, 0, 0)
+            vote.add_source('http://example.com/HB%d/vote%d' % (i, j))
+            bill.add_vote(vote)
+        bill.add_source('http://example.com/HB%d' % i)
+        return bill
+
+    def scrape_bills(self, chamber, year):
+        if self.stream:
+            return (self.make_bill(i) for i in xrange(self.n_bills))
+        return [self.make_bill(i) for i in xrange(self.n_bills)]
+
+
+def measure(n_bills, stream):
+    scraper = Scraper()
+    scraper.n_bills = n_bills
+    scraper.stream = stream
+    scraper.output_dir = tempfile.mkdtemp()
+    try:
+        scraper.init_dirs()
+        scraper._reset_matchers()
+        start = time.time()
+        scraper._scrape_bills('lower', '2009')
+        scraper.output.close()
+        elapsed = time.time() - start
+    finally:
+        shutil.rmtree(scraper.output_dir)
+
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print '%-9s %6d bills in %5.2fs, peak RSS %6.1f MB' % (
+        stream and 'streamed' or 'list', n_bills, elapsed, peak)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-b', '--bills', type='int', action='append')
+    parser.add_option('--run', choices=['streamed', 'list'])
+    options, args = parser.parse_args()
+    sizes = options.bills or [1000, 4000]
+
+    if options.run:
+        measure(sizes[0], options.run == 'streamed')
+        return
+
+    for run in ('list', 'streamed'):
+        for n in sizes:
+            subprocess.check_call([sys.executable, os.path.abspath(__file__),
+                                   '--run', run, '--bills', str(n)])
+
+
+if __name__ == '__main__':
+    main()
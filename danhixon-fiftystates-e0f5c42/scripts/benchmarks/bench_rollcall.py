@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Measure the memory held by a session's votes before they reach add_bill:
+floor votes in a 150-member chamber, with each name parsed from the page
+as a new string, stored as RollCall arrays or as the plain lists of
+names Vote used to keep.
+
+    python benchmarks/bench_rollcall.py --votes 10000
+"""
+from __future__ import with_statement
+import os
+import sys
+import gc
+import time
+import random
+import subprocess
+from optparse import OptionParser
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.legislation import Vote, DateEncoder
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+def rss():
+    """
+    Resident set size of this process in bytes (Linux only).
+    """
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def build(n_votes, n_members, storage):
+    rnd = random.Random(0)
+    members = ['Member Name%d' % i for i in xrange(n_members)]
+    votes = []
+    for i in xrange(n_votes):
+        vote = Vote('lower', None, 'Motion %d' % i, True, 0, 0, 0)
+        if storage == 'list':
+            for type in ('yes_votes', 'no_votes', 'other_votes'):
+                vote[type] = []
+        for member in members:
+            name = ''.join(list(member))
+            rnd.choice([vote.yes, vote.yes, vote.no, vote.other])(name)
+        votes.append(vote)
+    return votes
+
+
+def measure(options):
+    gc.collect()
+    before = rss()
+    start = time.time()
+    votes = build(options.votes, options.members, options.storage)
+    elapsed = time.time() - start
+    gc.collect()
+    held = rss() - before
+
+    start = time.time()
+    size = len(json.dumps(votes, cls=DateEncoder))
+    encode = time.time() - start
+
+    print '%-9s %7.1f MB held, built in %.2fs, %d bytes of JSON in %.2fs' % (
+        options.storage, held / 1048576.0, elapsed, size, encode)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-v', '--votes', type='int', default=10000)
+    parser.add_option('-m', '--members', type='int', default=150)
+    parser.add_option('--storage', choices=['list', 'rollcall'])
+    options, args = parser.parse_args()
+
+    if options.storage:
+        measure(options)
+        return
+
+    # measure each representation in a fresh interpreter
+    print '%d votes cast' % (options.votes * options.members)
+    for storage in ('list', 'rollcall'):
+        subprocess.check_call([sys.executable, os.path.abspath(__file__),
+                               '--storage', storage,
+                               '--votes', str(options.votes),
+                               '--members', str(options.members)])
+
+
+if __name__ == '__main__':
+    main()
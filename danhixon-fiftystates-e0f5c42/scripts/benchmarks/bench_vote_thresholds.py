@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""
+Benchmark finding the thresholds of a session's floor votes, each the
+vote requirement of the bill version in force at the time of the vote:
+scanning the bill's versions for every vote (as CAVoteSummary.threshold
+used to) compared with bisecting a VoteThresholds index built once per
+bill.
+
+Both are timed twice: through the ORM, starting from the vote rows, and
+over version and vote rows already grouped by bill, as in
+CASQLImporter.import_bills.
+
+    python benchmarks/bench_vote_thresholds.py --bills 5000 --versions 8
+"""
+import os
+import sys
+import gc
+import time
+import random
+import shutil
+import tempfile
+import datetime
+from collections import defaultdict
+from optparse import OptionParser
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import imp
+from sqlalchemy import Index, desc, event
+
+ca = imp.load_source('ca_get_legislation',
+                     os.path.join(os.path.dirname(os.path.dirname(
+                         os.path.abspath(__file__))), 'ca',
+                         'get_legislation.py'))
+
+
+def linear_threshold(versions, location_code, vote_date_time):
+    """
+    The old lookup: `versions` latest first, scanned for every vote.
+    """
+    if location_code not in ca.FLOOR_LOCATIONS:
+        return '1/2'
+    version = filter(lambda v:
+                        v.bill_version_action_date <= vote_date_time,
+                     versions)[0]
+    if version.vote_required == 'Majority':
+        return '1/2'
+    else:
+        return '2/3'
+
+
+def build_database(url, n_bills, n_versions, rnd, session='20092010'):
+    """
+    Create the bill, version and vote summary tables at `url` with
+    `n_bills` Assembly bills of `session`, each with `n_versions`
+    versions and a floor vote after each of them, plus a committee vote.
+    """
+    engine = ca.create_engine(url)
+    for model in (ca.CABill, ca.CABillVersion, ca.CAVoteSummary):
+        model.__table__.create(engine)
+    bills, versions, votes = [], [], []
+    start = datetime.datetime(2009, 1, 5)
+    for i in xrange(n_bills):
+        bill_id = '%s0AB%d' % (session, i + 1)
+        bills.append(dict(bill_id=bill_id, session_year=session,
+                          session_num='0', measure_type='AB',
+                          measure_num=i + 1))
+        when = start + datetime.timedelta(rnd.randint(0, 60))
+        for v in xrange(n_versions):
+            versions.append(dict(
+                bill_version_id='%s%02d' % (bill_id, v), bill_id=bill_id,
+                version_num=v, bill_version_action_date=when,
+                vote_required=rnd.choice(['Majority', '2/3'])))
+            vote_time = when + datetime.timedelta(rnd.randint(1, 10),
+                                                  seconds=i)
+            votes.append(dict(bill_id=bill_id,
+                              location_code=rnd.choice(ca.FLOOR_LOCATIONS),
+                              vote_date_time=vote_time, vote_date_seq=v,
+                              motion_id=1, vote_result='(PASS)'))
+            when = vote_time + datetime.timedelta(rnd.randint(1, 20))
+        votes.append(dict(bill_id=bill_id, location_code='CX08',
+                          vote_date_time=when, vote_date_seq=n_versions,
+                          motion_id=1, vote_result='(PASS)'))
+
+    for model, rows in ((ca.CABill, bills), (ca.CABillVersion, versions),
+                        (ca.CAVoteSummary, votes)):
+        engine.execute(model.__table__.insert(), rows)
+    for model in (ca.CABillVersion, ca.CAVoteSummary):
+        table = model.__table__
+        Index('%s_bill_id' % table.name, table.c.bill_id).create(engine)
+    return engine
+
+
+# Each run returns {(bill id, vote time): threshold}
+
+def orm_linear(session):
+    return dict(((vote.bill_id, vote.vote_date_time),
+                 linear_threshold(vote.bill.versions, vote.location_code,
+                                  vote.vote_date_time))
+                for vote in session.query(ca.CAVoteSummary))
+
+
+def orm_indexed(session):
+    return dict(((vote.bill_id, vote.vote_date_time), vote.threshold)
+                for vote in session.query(ca.CAVoteSummary))
+
+
+def load_rows(session):
+    """
+    Version and vote rows grouped by bill, versions latest first.
+    """
+    versions = defaultdict(list)
+    for version in session.query(
+        ca.CABillVersion.bill_id, ca.CABillVersion.bill_version_action_date,
+        ca.CABillVersion.vote_required).order_by(
+        desc(ca.CABillVersion.bill_version_action_date)):
+        versions[version.bill_id].append(version)
+    votes = defaultdict(list)
+    for vote in session.query(ca.CAVoteSummary.bill_id,
+                              ca.CAVoteSummary.location_code,
+                              ca.CAVoteSummary.vote_date_time):
+        votes[vote.bill_id].append(vote)
+    return versions, votes
+
+
+def rows_linear(versions, votes):
+    thresholds = {}
+    for bill_id, bill_votes in votes.iteritems():
+        for vote in bill_votes:
+            thresholds[bill_id, vote.vote_date_time] = linear_threshold(
+                versions[bill_id], vote.location_code, vote.vote_date_time)
+    return thresholds
+
+
+def rows_indexed(versions, votes):
+    thresholds = {}
+    for bill_id, bill_votes in votes.iteritems():
+        index = ca.VoteThresholds(versions[bill_id])
+        for vote in bill_votes:
+            thresholds[bill_id, vote.vote_date_time] = index.threshold(
+                vote.location_code, vote.vote_date_time)
+    return thresholds
+
+
+class QueryCounter(object):
+
+    def __init__(self, engine):
+        self.queries = 0
+        event.listen(engine, 'before_cursor_execute', self.count)
+
+    def count(self, *args):
+        self.queries += 1
+
+    def timed(self, func, *args):
+        """
+        Return the time `func(*args)` took, the queries it made and its
+        result.
+        """
+        gc.collect()
+        before = self.queries
+        start = time.time()
+        result = func(*args)
+        return time.time() - start, self.queries - before, result
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('-b', '--bills', type='int', default=5000)
+    parser.add_option('-v', '--versions', type='int', default=6)
+    options, args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        url = 'sqlite:///%s' % os.path.join(tmp, 'capublic.sqlite')
+        engine = build_database(url, options.bills, options.versions,
+                                random.Random(0))
+        Session = ca.sessionmaker(bind=engine)
+        counter = QueryCounter(engine)
+        n_votes = options.bills * (options.versions + 1)
+        print '%d bills, %d votes (%d on the floor)' % (
+            options.bills, n_votes, options.bills * options.versions)
+
+        results = []
+        for label, func in (('ORM, linear', orm_linear),
+                            ('ORM, indexed', orm_indexed)):
+            elapsed, queries, result = counter.timed(func, Session())
+            results.append(result)
+            print '%-16s %.2fs, %d queries' % (label, elapsed, queries)
+
+        versions, votes = load_rows(Session())
+        for label, func in (('rows, linear', rows_linear),
+                            ('rows, indexed', rows_indexed)):
+            # these take well under a second; take the best of a few runs
+            elapsed, queries, result = min(
+                counter.timed(func, versions, votes) for i in xrange(5))
+            print '%-16s %.3fs (%.2fus/vote)' % (
+                label, elapsed, elapsed / n_votes * 1e6)
+            results.append(result)
+
+        assert results[0] == results[1] == results[2] == results[3]
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
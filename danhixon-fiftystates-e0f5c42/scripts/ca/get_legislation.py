@@ -3,17 +3,23 @@ import datetime as dt
 from cStringIO import StringIO
 from lxml import etree
 
-from sqlalchemy.sql import and_
+from sqlalchemy.sql import and_, select, func
 from sqlalchemy import (Table, Column, Integer, String, ForeignKey,
                         DateTime, Text, Numeric, desc, create_engine,
                         UnicodeText)
-from sqlalchemy.orm import sessionmaker, relation, backref
+from sqlalchemy.orm import (sessionmaker, relation, backref, deferred,
+                            object_session)
 from sqlalchemy.ext.declarative import declarative_base
+from optparse import OptionParser, make_option
 import re
+from bisect import bisect_right
+from collections import defaultdict
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from pyutils.legislation import *
+from pyutils.incremental import HighWaterMarks
+from pyutils.memo import code_version
 
 # Code for handling California's legislative info SQL dumps
 # You can grab them from http://www.leginfo.ca.gov/FTProtocol.html
@@ -46,6 +52,24 @@ class CABill(Base):
     @property
     def short_bill_id(self):
         return "%s%d" % (self.measure_type, self.measure_num)
+
+    @property
+    def vote_thresholds(self):
+        """
+        The bill's :class:`VoteThresholds`, built from its versions if
+        they've been loaded and otherwise from just their action dates
+        and vote requirements.
+        """
+        if not '_vote_thresholds' in self.__dict__:
+            if 'versions' in self.__dict__:
+                versions = self.versions
+            else:
+                versions = object_session(self).query(
+                    CABillVersion.bill_version_action_date,
+                    CABillVersion.vote_required).filter(
+                    CABillVersion.bill_id == self.bill_id)
+            self._vote_thresholds = VoteThresholds(versions)
+        return self._vote_thresholds
     
 class CABillVersion(Base):
     __tablename__ = "bill_version_tbl"
@@ -64,7 +88,9 @@ class CABillVersion(Base):
     substantive_changes = Column(String(3))
     urgency = Column(String(3))
     taxlevy = Column(String(3))
-    bill_xml = Column(UnicodeText)
+    # a version's text can run to tens of megabytes, so it is only
+    # loaded when asked for
+    bill_xml = deferred(Column(UnicodeText))
     active_flg = Column(String(1))
     trans_uid = Column(String(30))
     trans_update = Column(DateTime)
@@ -79,17 +105,80 @@ class CABillVersion(Base):
             self._xml = etree.parse(StringIO(self.bill_xml.encode('utf-8')), etree.XMLParser(recover=True))
         return self._xml
 
+    @property
+    def titles(self):
+        if not '_titles' in self.__dict__:
+            self._titles = extract_titles(self.bill_xml)
+        return self._titles
+
     @property
     def title(self):
-        texts = self.xml.xpath("//*[local-name() = 'Title']//text()")
-        title = ''.join(texts).strip()
-        return title
+        return self.titles[0]
 
     @property
     def short_title(self):
-        texts = self.xml.xpath("//*[local-name() = 'Subject']//text()")
-        title = ''.join(texts).strip()
-        return title
+        return self.titles[1]
+
+def extract_titles(bill_xml, chunk_size=65536):
+    """
+    Return the text of a bill version's XML Title and Subject elements
+    ('' for either that is missing). As with an XPath query for all
+    of them, the text of every Title (or Subject) is joined together.
+
+    The XML is parsed incrementally and every element the parser has
+    finished with is cleared and removed from its parent, so even a
+    budget bill (which may be most of a hundred megabytes) is never held
+    in memory as a whole tree. The whole document is still read: a Title
+    may turn up anywhere in it, so no point short of the end shows that
+    there isn't another one to join.
+    """
+    texts = {'Title': [], 'Subject': []}
+    # how many Title and Subject elements the parser is inside of
+    depth = {'Title': 0, 'Subject': 0}
+    parser = etree.XMLPullParser(events=('start', 'end'), recover=True)
+
+    def read_events():
+        for event, elem in parser.read_events():
+            if not isinstance(elem.tag, basestring):
+                # comments and processing instructions
+                continue
+            name = etree.QName(elem).localname
+            if name in depth:
+                if event == 'start':
+                    depth[name] += 1
+                    continue
+                depth[name] -= 1
+                # a Title within a Title is part of the outer one's text
+                if not depth[name]:
+                    texts[name].append(''.join(elem.itertext()))
+            if event == 'end' and not (depth['Title'] or depth['Subject']):
+                elem.clear()
+                # its earlier siblings are finished with too
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+    start = 0
+    while start < len(bill_xml):
+        chunk = bill_xml[start:start + chunk_size]
+        if isinstance(chunk, unicode) and u'\ud800' <= chunk[-1] <= u'\udbff':
+            # don't split a surrogate pair (narrow Python builds)
+            chunk = bill_xml[start:start + chunk_size + 1]
+        start += len(chunk)
+        if isinstance(chunk, unicode):
+            chunk = chunk.encode('utf-8')
+        parser.feed(chunk)
+        read_events()
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    read_events()
+
+    return (''.join(texts['Title']).strip(),
+            ''.join(texts['Subject']).strip())
+
+# stored titles are only reused while extract_titles is unchanged
+EXTRACT_TITLES_VERSION = code_version(extract_titles)
 
 class CABillVersionAuthor(Base):
     __tablename__ = "bill_version_authors_tbl"
@@ -212,16 +301,37 @@ class CAVoteSummary(Base):
 
     @property
     def threshold(self):
+        return self.bill.vote_thresholds.threshold(self.location_code,
+                                                   self.vote_date_time)
+
+FLOOR_LOCATIONS = ('AFLOOR', 'SFLOOR')
+
+class VoteThresholds(object):
+    """
+    The thresholds of a bill's votes, found by bisecting the action
+    dates of its versions (anything with `bill_version_action_date` and
+    `vote_required` attributes, in any order).
+    """
+
+    def __init__(self, versions):
+        versions = sorted((v.bill_version_action_date, v.vote_required)
+                          for v in versions)
+        self.dates = [date for date, required in versions]
+        self.required = [required for date, required in versions]
+
+    def threshold(self, location_code, vote_date_time):
         # This may not always be true...
-        if self.location_code != "AFLOOR" and self.location_code != "SFLOOR":
+        if location_code not in FLOOR_LOCATIONS:
             return '1/2'
 
-        # Get the associated bill version (probably?)
-        version = filter(lambda v:
-                            v.bill_version_action_date <= self.vote_date_time,
-                        self.bill.versions)[0]
+        # Get the associated bill version (probably?): the latest one
+        # acted on by the time of the vote
+        i = bisect_right(self.dates, vote_date_time) - 1
+        if i < 0:
+            raise IndexError("No version of the bill predates its vote "
+                             "of %s" % vote_date_time)
 
-        if version.vote_required == 'Majority':
+        if self.required[i] == 'Majority':
             return '1/2'
         else:
             return '2/3'
@@ -285,11 +395,54 @@ class CASQLImporter(LegislationScraper):
                  }
                 }
 
-    def __init__(self, host, user, pw, db='capublic'):
-        self.engine = create_engine('mysql://%s:%s@%s/%s?charset=utf8' % (
-                user, pw, host, db))
+    # scrape_bills loads bills in batches of this size and drops each
+    # batch from the SQLAlchemy session once its bills have been yielded
+    expunge_every = 100
+
+    # Load each batch's versions, authors, actions and votes with one
+    # query per table (see import_bills) rather than bill by bill
+    bulk_import = True
+
+    # With --incremental, the HighWaterMarks of the unit being scraped;
+    # saved once its bills have been written
+    _high_water = None
+
+    # Location descriptions, loaded once per session by _locations
+    _location_session = None
+    _location_cache = None
+
+    # Take titles from the bill_version_tbl subject column instead of the
+    # version's XML, which is then never loaded (--skip_bill_xml)
+    skip_bill_xml = False
+
+    option_list = LegislationScraper.option_list + (
+        make_option('--skip_bill_xml', action='store_true',
+                    dest='skip_bill_xml', default=False,
+                    help="don't load bills' XML; use each version's "
+                    "subject as its title"),
+        )
+
+    def __init__(self, host=None, user=None, pw=None, db='capublic',
+                 url=None):
+        """
+        Connect to the capublic MySQL database on `host`, or to any
+        database SQLAlchemy can open given its `url` (such as
+        ``sqlite:///capublic.sqlite``).
+        """
+        LegislationScraper.__init__(self)
+        if url is None:
+            url = 'mysql://%s:%s@%s/%s?charset=utf8' % (user, pw, host, db)
+        self.engine = create_engine(url)
         self.Session = sessionmaker(bind=self.engine)
         self.session = self.Session()
+        # (title, short title) by _titles_key, for the current batch
+        self._titles = {}
+
+    def run(self):
+        options, spares = OptionParser(
+            option_list=self.option_list).parse_args()
+        self.skip_bill_xml = options.skip_bill_xml
+        LegislationScraper.run(self)
 
     def scrape_legislators(self, chamber, year):
         session = "%s%d" % (year, int(year) + 1)
@@ -344,71 +497,376 @@ class CASQLImporter(LegislationScraper):
             session_year=session).filter_by(
             measure_type=measure_abbr)
 
+        changed = None
+        if self.incremental:
+            marks = HighWaterMarks(os.path.join(
+                    self.output_dir, 'trans_update',
+                    '%s-%s.json' % (session, chamber)))
+            changed = self.changed_bill_ids(session, measure_abbr, marks)
+            self._high_water = marks
+            self.log("%d %s bills changed since the last run" %
+                     (len(changed), measure_abbr))
+
+        if self.bulk_import:
+            # bill rows are small, so a session's worth can be held at once
+            bills = bills.all()
+            if changed is not None:
+                bills = [bill for bill in bills if bill.bill_id in changed]
+            for start in xrange(0, len(bills), self.expunge_every):
+                batch = bills[start:start + self.expunge_every]
+                for fsbill in self.import_bills(batch, session, chamber,
+                                                chamber_name):
+                    yield fsbill
+                self.session.expunge_all()
+                self._titles.clear()
+            return
+
+        for n, bill in enumerate(bills.yield_per(self.expunge_every)):
+            if changed is None or bill.bill_id in changed:
+                fsbill = self.import_bill(bill, session, chamber,
+                                          chamber_name)
+                if fsbill:
+                    yield fsbill
+
+            if (n + 1) % self.expunge_every == 0:
+                # Forget the rows (and relations) loaded so far so the
+                # session doesn't grow with the size of the session year.
+                # The next batch of rows hasn't been loaded yet.
+                self.session.expunge_all()
+                self._titles.clear()
+
+    def _scrape_bills(self, chamber, year):
+        LegislationScraper._scrape_bills(self, chamber, year)
+        # only now has every changed bill been written
+        if self._high_water is not None:
+            self._high_water.save()
+            self._high_water = None
+
+    def changed_bill_ids(self, session, measure_abbr, marks):
+        """
+        Return the set of ids of a session's bills with a bill, version,
+        author, history or vote row updated since the time `marks` (a
+        :class:`pyutils.incremental.HighWaterMarks`) holds for its table,
+        and move each mark up to the latest update in that table.
+        """
+        session_bills = select([CABill.bill_id]).where(and_(
+                CABill.session_year == session,
+                CABill.measure_type == measure_abbr))
+
+        # (table, its update time, its bill id, how to find that)
+        tables = [
+            (CABill, CABill.trans_update, CABill.bill_id, None),
+            (CABillVersion, CABillVersion.trans_update,
+             CABillVersion.bill_id, None),
+            (CABillVersionAuthor, CABillVersionAuthor.trans_update,
+             CABillVersion.bill_id, CABillVersionAuthor.bill_version_id ==
+             CABillVersion.bill_version_id),
+            (CABillAction, CABillAction.trans_update_dt,
+             CABillAction.bill_id, None),
+            (CAVoteSummary, CAVoteSummary.trans_update,
+             CAVoteSummary.bill_id, None),
+            (CAVoteDetail, CAVoteDetail.trans_update,
+             CAVoteDetail.bill_id, None),
+            ]
+
+        # on the first run every bill has changed
+        first_run = not marks.marks
+        changed = set()
+        for model, updated, bill_id, join in tables:
+            criteria = bill_id.in_(session_bills)
+            if join is not None:
+                criteria = and_(criteria, join)
+
+            if not first_run:
+                mark = marks.get(model.__tablename__)
+                if mark is None:
+                    updates = updated != None
+                else:
+                    updates = updated > mark
+                changed.update(row[0] for row in self.session.query(
+                        bill_id).filter(and_(criteria, updates)).distinct())
+
+            marks.set(model.__tablename__, self.session.query(
+                    func.max(updated)).filter(criteria).scalar())
+        if first_run:
+            changed.update(row[0] for row in
+                           self.session.execute(session_bills))
+        return changed
+
+    def import_bill(self, bill, session, chamber, chamber_name):
+        """
+        Build a :class:`Bill` from a :class:`CABill` row, or return None if
+        it has no version with text.
+
+        Everything is loaded through the row's relations, costing several
+        queries per bill; :method:`import_bills` does the same for a batch
+        of bills at once.
+        """
+        version = self.session.query(CABillVersion).filter_by(
+            bill=bill).filter(CABillVersion.bill_xml != None).order_by(
+            desc(CABillVersion.bill_version_action_date)).first()
+        if not version:
+            # not enough data to import
+            return None
+
+        thresholds = bill.vote_thresholds
+        votes = [(vote, vote.location.description, vote.motion.motion_text,
+                  thresholds.threshold(vote.location_code,
+                                       vote.vote_date_time),
+                  vote.votes) for vote in bill.votes]
+        return self.build_bill(bill, version, version.authors, bill.actions,
+                               votes, session, chamber, chamber_name)
+
+    def import_bills(self, bills, session, chamber, chamber_name):
+        """
+        Build a :class:`Bill` for each of a batch of :class:`CABill` rows
+        that has a version with text.
+
+        Versions, authors, actions, votes and vote records are each loaded
+        for the whole batch with a single query and grouped by bill in
+        memory. Only the text of the version each bill is built from is
+        loaded.
+        """
+        ids = [bill.bill_id for bill in bills]
+        query = self.session.query
+
+        # latest first, as in CABill.versions
+        versions = defaultdict(list)
+        chosen = {}
+        for version in query(CABillVersion.bill_version_id,
+                             CABillVersion.bill_id,
+                             CABillVersion.bill_version_action_date,
+                             CABillVersion.vote_required,
+                             (CABillVersion.bill_xml != None).label(
+                                 'has_xml')).filter(
+            CABillVersion.bill_id.in_(ids)).order_by(
+            desc(CABillVersion.bill_version_action_date)):
+            versions[version.bill_id].append(version)
+            if version.has_xml and version.bill_id not in chosen:
+                chosen[version.bill_id] = version.bill_version_id
+
+        texts = {}
+        authors = defaultdict(list)
+        if chosen:
+            # bill_xml is deferred, so this leaves the text behind
+            for version in query(CABillVersion).filter(
+                CABillVersion.bill_version_id.in_(chosen.values())):
+                texts[version.bill_version_id] = version
+            self._load_titles(texts.values())
+            # plain rows: the table has no real primary key, so ORM
+            # instances of identical authors of two versions would merge
+            for author in query(CABillVersionAuthor.bill_version_id,
+                                CABillVersionAuthor.house,
+                                CABillVersionAuthor.contribution,
+                                CABillVersionAuthor.name).filter(
+                CABillVersionAuthor.bill_version_id.in_(chosen.values())):
+                authors[author.bill_version_id].append(author)
+
+        actions = defaultdict(list)
+        for action in query(CABillAction).filter(
+            CABillAction.bill_id.in_(ids)):
+            actions[action.bill_id].append(action)
+
+        summaries = defaultdict(list)
+        motion_ids = set()
+        for vote in query(CAVoteSummary.bill_id,
+                          CAVoteSummary.location_code,
+                          CAVoteSummary.vote_date_time,
+                          CAVoteSummary.vote_date_seq,
+                          CAVoteSummary.motion_id,
+                          CAVoteSummary.ayes, CAVoteSummary.noes,
+                          CAVoteSummary.abstain,
+                          CAVoteSummary.vote_result).filter(
+            CAVoteSummary.bill_id.in_(ids)):
+            summaries[vote.bill_id].append(vote)
+            motion_ids.add(vote.motion_id)
+
+        records = defaultdict(list)
+        for record in query(CAVoteDetail.bill_id,
+                            CAVoteDetail.location_code,
+                            CAVoteDetail.vote_date_time,
+                            CAVoteDetail.vote_date_seq,
+                            CAVoteDetail.motion_id,
+                            CAVoteDetail.legislator_name,
+                            CAVoteDetail.vote_code).filter(
+            CAVoteDetail.bill_id.in_(ids)):
+            records[record[:5]].append(record)
+
+        motions = {}
+        if motion_ids:
+            motions = dict(query(CAMotion.motion_id,
+                                 CAMotion.motion_text).filter(
+                CAMotion.motion_id.in_(list(motion_ids))))
+        locations = self._locations(session)
+
         for bill in bills:
-            bill_session = session
-            if bill.session_num != '0':
-                bill_session += ' Special Session %s' % bill.session_num
-
-            bill_id = bill.short_bill_id
-            version = self.session.query(CABillVersion).filter_by(
-                bill=bill).filter(CABillVersion.bill_xml != None).first()
-            if not version:
+            version_id = chosen.get(bill.bill_id)
+            if version_id is None:
                 # not enough data to import
                 continue
 
-            fsbill = Bill(bill_session, chamber, bill_id,
-                          version.title,
-                          short_title=version.short_title)
-
-            for author in version.authors:
-                if author.house == chamber_name:
-                    fsbill.add_sponsor(author.contribution, author.name)
-
-            for action in bill.actions:
-                if not action.action:
-                    # NULL action text seems to be an error on CA's part,
-                    # unless it has some meaning I'm missing
-                    continue
-                actor = action.actor or chamber
-                fsbill.add_action(actor, action.action, action.action_date)
-
-            for vote in bill.votes:
-                if vote.vote_result == '(PASS)':
-                    result = True
-                else:
-                    result = False
-
-                full_loc = vote.location.description
-                first_part = full_loc.split(' ')[0].lower()
-                if first_part in ['asm', 'assembly']:
-                    vote_chamber = 'lower'
-                    vote_location = ' '.join(full_loc.split(' ')[1:])
-                elif first_part.startswith('sen'):
-                    vote_chamber = 'upper'
-                    vote_location = ' '.join(full_loc.split(' ')[1:])
+            thresholds = VoteThresholds(versions[bill.bill_id])
+            votes = []
+            for vote in summaries[bill.bill_id]:
+                votes.append((vote, locations[vote.location_code],
+                              motions[vote.motion_id],
+                              thresholds.threshold(vote.location_code,
+                                                   vote.vote_date_time),
+                              records[tuple(vote[:5])]))
+
+            yield self.build_bill(bill, texts[version_id],
+                                  authors[version_id], actions[bill.bill_id],
+                                  votes, session, chamber, chamber_name)
+
+    def version_titles(self, version):
+        """
+        Return the (title, short title) of a :class:`CABillVersion`.
+
+        They're extracted from the version's XML (see
+        :func:`extract_titles`) unless skip_bill_xml is set, and kept
+        per bill_version_id and trans_update: for the current batch, and
+        with --memoize_parses in the parse result store, so a later run
+        needn't load the XML of versions that haven't changed.
+        """
+        if self.skip_bill_xml:
+            subject = version.subject or ''
+            return subject, subject
+
+        titles = self._cached_titles(version)
+        if titles is None:
+            titles = extract_titles(version.bill_xml)
+            self._cache_titles(version, titles)
+        return titles
+
+    def _titles_key(self, version):
+        return 'ca-titles:%s:%s:%s' % (EXTRACT_TITLES_VERSION,
+                                       version.bill_version_id,
+                                       version.trans_update)
+
+    def _store_titles(self, version):
+        # without an update time a changed version can't be told apart
+        return self.memoize_parses and version.trans_update is not None
+
+    def _cached_titles(self, version):
+        key = self._titles_key(version)
+        titles = self._titles.get(key)
+        if titles is None and self._store_titles(version):
+            try:
+                titles = self._titles[key] = \
+                    self.get_parse_results().get(key)
+            except KeyError:
+                pass
+        return titles
+
+    def _cache_titles(self, version, titles):
+        key = self._titles_key(version)
+        self._titles[key] = titles
+        if self._store_titles(version):
+            self.get_parse_results().set(key, titles)
+
+    def _load_titles(self, versions):
+        """
+        Extract the titles of those of `versions` that aren't cached,
+        loading all of their XML with one query.
+        """
+        if self.skip_bill_xml:
+            return
+        missing = dict((version.bill_version_id, version)
+                       for version in versions
+                       if self._cached_titles(version) is None)
+        if not missing:
+            return
+        for version_id, bill_xml in self.session.query(
+            CABillVersion.bill_version_id, CABillVersion.bill_xml).filter(
+            CABillVersion.bill_version_id.in_(missing.keys())):
+            self._cache_titles(missing[version_id], extract_titles(bill_xml))
+
+    def _locations(self, session):
+        """
+        Map location codes to descriptions, preferring `session`'s.
+        """
+        if self._location_session != session:
+            locations = {}
+            for code, description, year in self.session.query(
+                CALocation.location_code, CALocation.description,
+                CALocation.session_year):
+                if year == session or code not in locations:
+                    locations[code] = description
+            self._location_cache = locations
+            self._location_session = session
+        return self._location_cache
+
+    def build_bill(self, bill, version, authors, actions, votes, session,
+                   chamber, chamber_name):
+        """
+        Build a :class:`Bill` from a :class:`CABill` row and the rows that
+        go with it: the :class:`CABillVersion` it takes its title from,
+        that version's authors, the bill's actions and its votes. Each
+        vote is a (summary row, location description, motion text,
+        threshold, detail rows) tuple.
+        """
+        bill_session = session
+        if bill.session_num != '0':
+            bill_session += ' Special Session %s' % bill.session_num
+
+        bill_id = bill.short_bill_id
+
+        title, short_title = self.version_titles(version)
+        fsbill = Bill(bill_session, chamber, bill_id, title,
+                      short_title=short_title)
+
+        for author in authors:
+            if author.house == chamber_name:
+                fsbill.add_sponsor(author.contribution, author.name)
+
+        for action in actions:
+            if not action.action:
+                # NULL action text seems to be an error on CA's part,
+                # unless it has some meaning I'm missing
+                continue
+            actor = action.actor or chamber
+            fsbill.add_action(actor, action.action, action.action_date)
+
+        for vote, full_loc, motion_text, threshold, records in votes:
+            if vote.vote_result == '(PASS)':
+                result = True
+            else:
+                result = False
+
+            first_part = full_loc.split(' ')[0].lower()
+            if first_part in ['asm', 'assembly']:
+                vote_chamber = 'lower'
+                vote_location = ' '.join(full_loc.split(' ')[1:])
+            elif first_part.startswith('sen'):
+                vote_chamber = 'upper'
+                vote_location = ' '.join(full_loc.split(' ')[1:])
+            else:
+                vote_chamber = ''
+                vote_location = full_loc
+
+            fsvote = Vote(vote_chamber,
+                          vote.vote_date_time,
+                          motion_text or '',
+                          result,
+                          vote.ayes, vote.noes, vote.abstain,
+                          threshold=threshold,
+                          location=vote_location)
+
+            for record in records:
+                if record.vote_code == 'AYE':
+                    fsvote.yes(record.legislator_name)
+                elif record.vote_code.startswith('NO'):
+                    fsvote.no(record.legislator_name)
                 else:
-                    vote_chamber = ''
-                    vote_location = full_loc
-
-                fsvote = Vote(vote_chamber,
-                              vote.vote_date_time,
-                              vote.motion.motion_text or '',
-                              result,
-                              vote.ayes, vote.noes, vote.abstain,
-                              threshold=vote.threshold,
-                              location=vote_location)
-
-                for record in vote.votes:
-                    if record.vote_code == 'AYE':
-                        fsvote.yes(record.legislator_name)
-                    elif record.vote_code.startswith('NO'):
-                        fsvote.no(record.legislator_name)
-                    else:
-                        fsvote.other(record.legislator_name)
+                    fsvote.other(record.legislator_name)
 
-                fsbill.add_vote(fsvote)
+            fsbill.add_vote(fsvote)
 
-            self.add_bill(fsbill)
+        return fsbill
 
 if __name__ == '__main__':
-    CASQLImporter('localhost', 'USER', 'PASSWORD').run()
+    if os.environ.get('CAPUBLIC_URL'):
+        # e.g. sqlite:///capublic.sqlite, as written by ca/pubinfo.py
+        CASQLImporter(url=os.environ['CAPUBLIC_URL']).run()
+    else:
+        CASQLImporter('localhost', 'USER', 'PASSWORD').run()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+"""
+Load California's pubinfo data files into a local SQLite database,
+without a MySQL server.
+
+Each ``*_TBL.dat`` file in a pubinfo directory (or zip file, such as a
+weekly ``pubinfo_Mon.zip``) holds one row per line, with tab-separated
+fields optionally enclosed in backticks, as read by the ``LOAD DATA``
+statements in CA's ``*.sql`` files. Large text columns (the bill XML)
+instead hold the name of a ``.lob`` file next to the ``.dat`` file.
+
+Only the tables CASQLImporter maps are loaded. Rows replace any earlier
+row with the same key, so loading a delta after the full session
+updates the database in place::
+
+    python ca/pubinfo.py capublic.sqlite pubinfo_2009.zip
+    python ca/pubinfo.py capublic.sqlite pubinfo_Mon.zip
+
+then import with ``CAPUBLIC_URL=sqlite:///capublic.sqlite python
+ca/get_legislation.py ...``.
+"""
+from __future__ import with_statement
+import os
+import re
+import sys
+import time
+import sqlite3
+import zipfile
+from contextlib import closing
+from sqlalchemy import Text, UnicodeText
+from sqlalchemy.dialects import sqlite
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from get_legislation import Base
+
+# The columns identifying a row of each table. Several of the tables
+# declare made-up primary keys for SQLAlchemy's sake, which can't be used
+# to tell rows apart.
+ROW_KEYS = {
+    'bill_tbl': ('bill_id',),
+    'bill_version_tbl': ('bill_version_id',),
+    'bill_version_authors_tbl': ('bill_version_id', 'type', 'house',
+                                 'name', 'contribution'),
+    'bill_history_tbl': ('bill_history_id',),
+    'legislator_tbl': ('district', 'session_year', 'legislator_name',
+                       'house_type'),
+    'bill_motion_tbl': ('motion_id',),
+    'location_code_tbl': ('session_year', 'location_code'),
+    'bill_summary_vote_tbl': ('bill_id', 'location_code', 'vote_date_time',
+                              'vote_date_seq', 'motion_id'),
+    'bill_detail_vote_tbl': ('bill_id', 'location_code', 'vote_date_time',
+                             'vote_date_seq', 'motion_id',
+                             'legislator_name'),
+}
+
+_escape_re = re.compile(r'\\(.)', re.S)
+_escapes = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t',
+            'Z': '\x1a'}
+
+
+def _unescape(value):
+    if '\\' not in value:
+        return value
+    return _escape_re.sub(lambda m: _escapes.get(m.group(1), m.group(1)),
+                          value)
+
+
+def _closed(field):
+    """
+    Does a field that starts with a backtick also end with an (unescaped)
+    one?
+    """
+    if len(field) < 2 or not field.endswith('`'):
+        return False
+    backslashes = len(field) - 1 - len(field[:-1].rstrip('\\'))
+    return backslashes % 2 == 0
+
+
+def _decode(value, encoding):
+    try:
+        return value.decode(encoding)
+    except UnicodeDecodeError:
+        return value.decode('cp1252', 'replace')
+
+
+def _split(record, encoding):
+    """
+    Split a record into its fields, or return None if a quoted field is
+    still open at the end (the record continues on the next line).
+    """
+    parts = record.split('\t')
+    fields = []
+    i = 0
+    while i < len(parts):
+        part = parts[i]
+        if part.startswith('`'):
+            while not _closed(part):
+                i += 1
+                if i == len(parts):
+                    return None
+                part += '\t' + parts[i]
+            fields.append(_decode(_unescape(part[1:-1]), encoding))
+        elif part in ('NULL', '\\N'):
+            fields.append(None)
+        else:
+            fields.append(_decode(_unescape(part), encoding))
+        i += 1
+    return fields
+
+
+def read_dat(f, encoding='utf-8'):
+    """
+    Yield the rows of an open ``.dat`` file as lists of unicode strings
+    (None for NULL).
+    """
+    record = None
+    for line in f:
+        line = line.rstrip('\r\n')
+        if record is None:
+            record = line
+        else:
+            # the line break belonged to a quoted field
+            record += '\n' + line
+        fields = _split(record, encoding)
+        if fields is not None:
+            record = None
+            if fields != [u'']:
+                yield fields
+    if record is not None:
+        raise ValueError('Unterminated field at end of file: %r' %
+                         record[:80])
+
+
+class PubinfoSource(object):
+    """
+    The files of a pubinfo directory or zip file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if zipfile.is_zipfile(path):
+            self.zip = zipfile.ZipFile(path)
+            self._names = dict((os.path.basename(name), name)
+                               for name in self.zip.namelist())
+        else:
+            self.zip = None
+            self._names = dict((name, name) for name in os.listdir(path))
+
+    def names(self):
+        return sorted(self._names)
+
+    def open(self, name):
+        if self.zip is not None:
+            return self.zip.open(self._names[name])
+        return open(os.path.join(self.path, name), 'rb')
+
+    def read(self, name):
+        with closing(self.open(name)) as f:
+            return f.read()
+
+
+def create_tables(db):
+    """
+    Create the tables CASQLImporter maps, each with a unique index on its
+    ROW_KEYS.
+    """
+    dialect = sqlite.dialect()
+    for table in Base.metadata.sorted_tables:
+        columns = ', '.join('%s %s' % (column.name,
+                                       column.type.compile(dialect=dialect))
+                            for column in table.columns)
+        db.execute('CREATE TABLE IF NOT EXISTS %s (%s)' % (table.name,
+                                                           columns))
+        db.execute('CREATE UNIQUE INDEX IF NOT EXISTS %s_key ON %s (%s)' % (
+            table.name, table.name, ', '.join(ROW_KEYS[table.name])))
+    for table, column in (('bill_tbl', 'session_year'),
+                          ('bill_version_tbl', 'bill_id'),
+                          ('bill_history_tbl', 'bill_id')):
+        db.execute('CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)' % (
+            table, column, table, column))
+
+
+def load_table(db, table, source, name, encoding='utf-8', batch_size=1000):
+    """
+    Load the ``.dat`` file `name` from `source` into `table` (an
+    SQLAlchemy Table), returning the number of rows loaded.
+    """
+    columns = [column.name for column in table.columns]
+    lobs = [i for i, column in enumerate(table.columns)
+            if isinstance(column.type, (Text, UnicodeText))]
+    sql = 'INSERT OR REPLACE INTO %s (%s) VALUES (%s)' % (
+        table.name, ', '.join(columns), ', '.join('?' * len(columns)))
+
+    def rows(f):
+        width = len(columns)
+        for fields in read_dat(f, encoding):
+            # newer pubinfo releases add columns at the end
+            fields = (fields + [None] * width)[:width]
+            for i in lobs:
+                if fields[i] and fields[i].lower().endswith('.lob'):
+                    fields[i] = _decode(source.read(fields[i]), 'utf-8')
+            yield fields
+
+    count = 0
+    batch = []
+    with closing(source.open(name)) as f:
+        for row in rows(f):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                db.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+    db.executemany(sql, batch)
+    return count + len(batch)
+
+
+def load(db_path, path, encoding='utf-8', log=None):
+    """
+    Load every table CASQLImporter maps from the pubinfo directory or zip
+    file at `path` into the SQLite database at `db_path`. Returns a dict
+    of rows loaded per table.
+    """
+    tables = dict((table.name, table) for table in Base.metadata.sorted_tables)
+    source = PubinfoSource(path)
+    db = sqlite3.connect(db_path)
+    counts = {}
+    try:
+        create_tables(db)
+        for name in source.names():
+            base, ext = os.path.splitext(name)
+            table = tables.get(base.lower())
+            if ext.lower() != '.dat' or table is None:
+                continue
+            start = time.time()
+            counts[table.name] = load_table(db, table, source, name,
+                                            encoding)
+            db.commit()
+            if log:
+                log('%s: %d rows in %.1fs' % (table.name,
+                                              counts[table.name],
+                                              time.time() - start))
+    finally:
+        db.close()
+    return counts
+
+
+def main(argv):
+    if len(argv) < 3:
+        print 'Usage: python ca/pubinfo.py DATABASE PUBINFO_DIR_OR_ZIP...'
+        return 1
+    for path in argv[2:]:
+        print 'Loading %s' % path
+        load(argv[1], path, log=lambda msg: sys.stdout.write('  %s\n' % msg))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -7,9 +7,10 @@
 
 from BeautifulSoup import BeautifulSoup
 import re
-import urllib,urllib2
+import urllib
 import time
 import string
+import datetime as dt
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -35,6 +36,13 @@ class CTLegislationScraper(LegislationScraper):
     lower_bill_no_min = 1
     lower_bill_no_max = 5000
 
+    # This year's bill status and vote pages change daily (and a bill
+    # number with no bill yet may get one); older years' pages never
+    # expire
+    _this_year = dt.date.today().year
+    cache_ttl = (('which_year=%d' % _this_year, 24 * 60 * 60),
+                 ('cga\.ct\.gov/%d/' % _this_year, 24 * 60 * 60))
+
     def scrape_legislators(self,chamber,year):
         pass
 
@@ -52,9 +60,7 @@ class CTLegislationScraper(LegislationScraper):
         #obtain html
             index_file ='http://cga.ct.gov/asp/cgabillstatus/cgabillstatus.asp?selBillType=Bill&bill_num=%d&which_year=%s'\
                %(i,year)
-            req = urllib2.Request(index_file)
-            response = urllib2.urlopen(req)
-            doc = response.read()
+            doc = self.urlopen(index_file)
             soup = BeautifulSoup(cleanup_html(doc))
 
             #check to see legislation exists
@@ -144,7 +150,7 @@ class CTLegislationScraper(LegislationScraper):
 
     #url is the url where the vote info page is.  Returns Vote object
     def scrape_votes(self,url,chamb):
-        soup = BeautifulSoup(urllib2.urlopen(urllib2.Request(url)).read())
+        soup = BeautifulSoup(self.urlopen(url))
         date=None
         motion=None
         yeas=None
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 import urlparse
-from lxml.html import parse
+from lxml.html import fromstring
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -69,7 +69,7 @@ class GALegislationScraper(LegislationScraper):
     
     def scrape1995(self, url, year, chamberName, session, number):
         "e.g. http://www.legis.ga.gov/legis/1995_96/leg/sum/sb1.htm"
-        page = parse(url).getroot()
+        page = fromstring(self.urlopen(url), base_url=url)
         
         ### Bill
         name = page.cssselect('h3 br')[0].tail.split('-', 1)[1].strip()
@@ -115,7 +115,7 @@ class GALegislationScraper(LegislationScraper):
     
     def scrape1997(self, url, year, chamberName, session, number):
         "e.g. http://www.legis.ga.gov/legis/1997_98/leg/sum/sb1.htm"
-        page = parse(url).getroot()
+        page = fromstring(self.urlopen(url), base_url=url)
         
         # Grab the interesting tables on the page.
         tables = []
@@ -152,7 +152,7 @@ class GALegislationScraper(LegislationScraper):
     
     def scrape1999(self, url, year, chamberName, session, number):
         "e.g. http://www.legis.ga.gov/legis/1999_00/leg/sum/sb1.htm"
-        page = parse(url).getroot()
+        page = fromstring(self.urlopen(url), base_url=url)
         
         # Grab the interesting tables on the page.
         tables = page.cssselect('table')
@@ -184,7 +184,7 @@ class GALegislationScraper(LegislationScraper):
     
     def scrape2001(self, url, year, chamberName, session, number):
         "e.g. http://www.legis.ga.gov/legis/2001_02/sum/sb1.htm"
-        page = parse(url).getroot()
+        page = fromstring(self.urlopen(url), base_url=url)
         
         # Grab the interesting tables on the page.
         tables = page.cssselect('table center table')
@@ -221,7 +221,7 @@ class GALegislationScraper(LegislationScraper):
     
     def scrape2003(self, url, year, chamberName, session, number):
         "e.g. http://www.legis.ga.gov/legis/2003_04/sum/sum/sb1.htm"
-        page = parse(url).getroot()
+        page = fromstring(self.urlopen(url), base_url=url)
         
         # Grab the interesting tables on the page.
         tables = page.cssselect('center table')
@@ -256,7 +256,7 @@ class GALegislationScraper(LegislationScraper):
     
     def scrape2005(self, url, year, chamberName, session, number):
         "e.g. http://www.legis.ga.gov/legis/2005_06/sum/sum/sb1.htm"
-        page = parse(url).getroot()
+        page = fromstring(self.urlopen(url), base_url=url)
         
         ### Bill
         name = page.cssselect('#legislation h1')[0].text_content().strip()
@@ -286,7 +286,7 @@ class GALegislationScraper(LegislationScraper):
     
     def scrape2007(self, url, year, chamberName, session, number):
         "e.g. http://www.legis.ga.gov/legis/2007_09/sum/sum/sb1.htm"
-        page = parse(url).getroot()
+        page = fromstring(self.urlopen(url), base_url=url)
         
         ### Bill
         name = page.cssselect('#legislation h1')[0].text_content().strip()
@@ -316,7 +316,7 @@ class GALegislationScraper(LegislationScraper):
     
     def scrape2009(self, url, year, chamberName, session, number):
         "e.g. http://www.legis.ga.gov/legis/2009_10/sum/sum/sb1.htm"
-        page = parse(url).getroot()
+        page = fromstring(self.urlopen(url), base_url=url)
         
         ### Bill
         name = page.cssselect('#legislation h1')[0].text_content().strip()
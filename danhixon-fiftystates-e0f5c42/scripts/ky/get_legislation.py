@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 from __future__ import with_statement
 import re
-import html5lib
 import datetime as dt
 
 import sys, os
@@ -63,9 +62,6 @@ class KYLegislationScraper(LegislationScraper):
             }
         }
 
-    soup_parser = html5lib.HTMLParser(
-        tree=html5lib.treebuilders.getTreeBuilder('beautifulsoup')).parse
-
     def scrape_bills(self, chamber, year):
         if year not in self.metadata['sessions']:
             raise NoDataForYear(year)
@@ -88,7 +84,7 @@ class KYLegislationScraper(LegislationScraper):
 
     def parse_bill(self, chamber, session, bill_id, bill_info_url):
         with self.urlopen_context(bill_info_url) as bill_info_data:
-            bill_info = self.soup_parser(bill_info_data)
+            bill_info = self.parse_html(bill_info_data, 'html5lib')
             version_url = '%s/bill.doc' % bill_id
             version_link = bill_info.find(href=version_url)
 
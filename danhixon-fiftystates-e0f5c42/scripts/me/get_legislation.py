@@ -1,13 +1,12 @@
 #!/usr/bin/env python
 import urllib
-import urllib2
 import re
 from BeautifulSoup import BeautifulSoup
 import datetime as dt
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from pyutils.legislation import LegislationScraper, NoDataForYear
+from pyutils.legislation import LegislationScraper, NoDataForYear, CacheMiss
 
 class MELegislationScraper(LegislationScraper):
 
@@ -27,10 +26,11 @@ class MELegislationScraper(LegislationScraper):
                   'stype' : session,
                   'paperNumberPrefix' : bill_abbr } 
         postdata = urllib.urlencode(postvalues) + "&PID=1456&titleSearch=&wordSearch=&ldFrom=1&ldTo=5000&paperNumber=&lrFrom=&lrTo=&fiscalImpact=&sec1=0&amend_filing_no_prefix=%25&amend_filing_no=&amend_type=&amend_sequence=&aff_amend_type=&aff_amend_sequence=&sec2=0&law_type=&chapter_number=&sec3=0&committeeOfRef=&phMMFr=&phDDFr=&phYYFr=2009&phMMTo=&phDDTo=&phYYTo=2009&wkMMFr=&wkDDFr=&wkYYFr=2009&wkMMTo=&wkDDTo=&wkYYTo=2009&sec4=0&sponsorSession=124&hSponsor=&sSponsor=&sec5=0&hStat=&hStatMMFr=&hStatDDFr=&hStatYYFr=2009&hStatMMTo=&hStatDDTo=&hStatYYTo=2009&sStat=&sStatMMFr=&sStatDDFr=&sStatYYFr=2009&sStatMMTo=&sStatDDTo=&sStatYYTo=2009&sec6=0&affectedTitle=&affectedSection=&affectedSubSection=&affectedParagraph=&sec7=0&subject=&submit=Search"
-        req = urllib2.Request(bill_list_url, postdata)
         self.be_verbose("Getting bill list for %s, session %s, %s chamber" % (year, session, chamber))
         try:
-            base_bill_list = BeautifulSoup(urllib2.urlopen(req).read())
+            base_bill_list = BeautifulSoup(self.urlopen(bill_list_url, postdata))
+        except CacheMiss:
+            raise
         except:
             # this session doesn't exist for this year
             self.be_verbose("No data found for %s, session %s, %s chamber" % (year, session, chamber))
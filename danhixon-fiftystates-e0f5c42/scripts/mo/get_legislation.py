@@ -2,7 +2,6 @@
 from __future__ import with_statement
 import re
 import datetime as dt
-import html5lib
 import urllib2
 from utils import *
 
@@ -207,14 +206,11 @@ class MOLegislationScraper(LegislationScraper):
                     bill_url = bill_link['href']
                     self.parse_house_bill(bill_url, session)
 
-    soup_parser = html5lib.HTMLParser(
-        tree=html5lib.treebuilders.getTreeBuilder('beautifulsoup')).parse
-
     def parse_house_bill(self, url, session):
         url = re.sub("content", "print", url)
 
         with self.urlopen_context(url) as bill_page_data:
-            bill_page = self.soup_parser(bill_page_data)
+            bill_page = self.parse_html(bill_page_data, 'html5lib')
             header_table = bill_page.table
 
             # get all the info needed to record the bill
@@ -1,6 +1,5 @@
 #!/usr/bin/env python
 from __future__ import with_statement
-import html5lib
 import datetime as dt
 import re
 
@@ -33,7 +32,7 @@ def split_name(full_name):
 class NCLegislationScraper(LegislationScraper):
 
     state = 'nc'
-    soup_parser = html5lib.HTMLParser(tree=html5lib.treebuilders.getTreeBuilder('beautifulsoup')).parse
+    html_parser = 'html5lib'
 
     metadata = {
         'state_name': 'North Carolina',
@@ -86,7 +85,7 @@ class NCLegislationScraper(LegislationScraper):
             chamber = 'upper'
 
         bill_data = self.urlopen(bill_detail_url)
-        bill_soup = self.soup_parser(bill_data)
+        bill_soup = self.parse_html(bill_data)
 
         bill_title = bill_soup.findAll('div', style="text-align: center; font: bold 20px Arial; margin-top: 15px; margin-bottom: 8px;")[0].contents[0]
 
@@ -114,7 +113,7 @@ class NCLegislationScraper(LegislationScraper):
         # easier to read actions from the rss.. but perhaps favor less HTTP requests?
         rss_url = 'http://www.ncga.state.nc.us/gascripts/BillLookUp/BillLookUp.pl?Session=%s&BillID=%s&view=history_rss' % (session[0:4] + sub, bill_id)
         rss_data = self.urlopen(rss_url)
-        rss_soup = self.soup_parser(rss_data)
+        rss_soup = self.parse_html(rss_data)
         bill.add_source(rss_url)
 
         # title looks like 'House Chamber: action'
@@ -141,7 +140,7 @@ class NCLegislationScraper(LegislationScraper):
         url = 'http://www.ncga.state.nc.us/gascripts/SimpleBillInquiry/displaybills.pl?Session=%s&tab=Chamber&Chamber=%s' % (session[0:4] + sub, chamber)
 
         data = self.urlopen(url)
-        soup = self.soup_parser(data)
+        soup = self.parse_html(data)
 
         rows = soup.findAll('table')[6].findAll('tr')[1:]
         for row in rows:
@@ -174,7 +173,7 @@ class NCLegislationScraper(LegislationScraper):
             url += 'Senate'
 
         with self.urlopen_context(url) as leg_list_data:
-            leg_list = self.soup_parser(leg_list_data)
+            leg_list = self.parse_html(leg_list_data)
             leg_table = leg_list.find('div', id='mainBody').find('table')
 
             for row in leg_table.findAll('tr')[1:]:
@@ -6,8 +6,6 @@ import os
 import re
 import sys
 
-import html5lib
-
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from pyutils.legislation import *
 
@@ -21,8 +19,7 @@ class NDLegislationScraper(LegislationScraper):
     """    
     state = 'nd'
     site_root = 'http://www.legis.nd.gov'
-    parser = html5lib.HTMLParser(
-        tree=html5lib.treebuilders.getTreeBuilder('beautifulsoup'))
+    html_parser = 'html5lib'
     
     metadata = {
         'state_name': 'North Dakota',
@@ -85,7 +82,7 @@ class NDLegislationScraper(LegislationScraper):
             '/members/last-name.html'    
         
         # Parsing
-        soup = self.parser.parse(self.urlopen(list_url))
+        soup = self.parse_html(self.urlopen(list_url))
         
         if not soup:
             raise ScrapeError('Failed to parse legaslative list page.')
@@ -127,7 +124,7 @@ class NDLegislationScraper(LegislationScraper):
         formatted exactly as more recent ones are.
         """
         # Parsing
-        soup = self.parser.parse(self.urlopen(url))
+        soup = self.parse_html(self.urlopen(url))
         
         attributes = {}
         
@@ -217,7 +214,7 @@ class NDLegislationScraper(LegislationScraper):
         list_url = self.site_root + assembly_url + chamber_url
         
         # Parsing
-        soup = self.parser.parse(self.urlopen(list_url))
+        soup = self.parse_html(self.urlopen(list_url))
         
         if not soup:
             raise ScrapeError('Failed to parse legaslative list page.')
@@ -327,7 +324,7 @@ class NDLegislationScraper(LegislationScraper):
             ('/bill-actions/ba%s.html' % bill_number)
                 
         # Parsing
-        soup = self.parser.parse(self.urlopen(url))
+        soup = self.parse_html(self.urlopen(url))
         
         attributes = {}
         
@@ -363,7 +360,7 @@ class NDLegislationScraper(LegislationScraper):
             ('/bill-actions/ba%s.html' % bill_number)
             
         # Parsing
-        soup = self.parser.parse(self.urlopen(url))
+        soup = self.parse_html(self.urlopen(url))
         
         actions = []
         
@@ -426,7 +423,7 @@ class NDLegislationScraper(LegislationScraper):
             '/bill-index/bi%s.html' % bill_number
         
         # Parsing
-        soup = self.parser.parse(self.urlopen(url))
+        soup = self.parse_html(self.urlopen(url))
         
         versions = []
         
@@ -486,7 +483,7 @@ class NDLegislationScraper(LegislationScraper):
             '/sponsor-inquiry/index.html'
         
         # Parsing
-        soup = self.parser.parse(self.urlopen(url))
+        soup = self.parse_html(self.urlopen(url))
         
         bill_sponsors = {}
         
@@ -510,7 +507,7 @@ class NDLegislationScraper(LegislationScraper):
                 else:
                     member_name = link.contents[0]
                 
-                detail_soup = self.parser.parse(self.urlopen(detail_url))
+                detail_soup = self.parse_html(self.urlopen(detail_url))
                 
                 # Bills for which the member was a primary sponsor
                 div = detail_soup.find('div', id='content')
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-import urllib, urllib2
+import urllib
 import unicodedata;
 import re
 from BeautifulSoup import BeautifulSoup
@@ -39,9 +39,7 @@ class NHLegislationScraper(LegislationScraper):
         search_url='http://www.gencourt.state.nh.us/bill_status/Results.aspx'
 
         #request page with list of all bills in year
-        req = urllib2.Request(search_url, params)
-        response = urllib2.urlopen(req)
-        doc = response.read()
+        doc = self.urlopen(search_url, params)
         soup = BeautifulSoup(doc)
 
         #parse results
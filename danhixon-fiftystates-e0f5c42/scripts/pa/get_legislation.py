@@ -26,6 +26,12 @@ class PALegislationScraper(LegislationScraper):
         'session_details': {},
         }
 
+    # Pages from the current session change daily; older sessions are
+    # closed and their cached pages never expire
+    _this_year = dt.date.today().year
+    cache_ttl = (('(?i)syear=%d' % (_this_year - (_this_year + 1) % 2),
+                  24 * 60 * 60),)
+
     def scrape_metadata(self):
         with self.soup_context("http://www.legis.state.pa.us/cfdocs/legis/home/session.cfm") as session_page:
             for option in session_page.find(id="BTI_sess").findAll('option'):
@@ -52,14 +58,27 @@ class PALegislationScraper(LegislationScraper):
     def scrape_session(self, chamber, session, special=0):
         with self.soup_context(bill_list_url(chamber, session, special)) as bill_list_page:
             bill_link_re =  "body=%s&type=(B|R)&bn=\d+" % bill_abbr(chamber)
-
-            for link in bill_list_page.findAll(href=re.compile(bill_link_re)):
+            links = bill_list_page.findAll(href=re.compile(bill_link_re))
+
+            # Grab every bill's info, history and vote pages up front
+            urls = []
+            for link in links:
+                type = re.search('type=(B|R|)', link['href']).group(1)
+                bill_number = link.contents[0]
+                for url_func in (info_url, history_url, vote_url):
+                    urls.append(url_func(chamber, session, special, type,
+                                         bill_number))
+            self.prefetch(urls)
+
+            for link in links:
                 self.parse_bill(chamber, session, special, link)
 
     def parse_bill(self, chamber, session, special, link):
         bill_number = link.contents[0]
         type = re.search('type=(B|R|)', link['href']).group(1)
         bill_id = "%s%s %s" % (bill_abbr(chamber), type, bill_number)
+        if self.bill_unchanged(session, chamber, bill_id):
+            return
 
         bill_info_url = info_url(chamber, session, special, type, bill_number)
 
@@ -201,6 +220,7 @@ class PALegislationScraper(LegislationScraper):
 
                 bill.add_vote(vote)
 
+    @memoize_parse
     def parse_vote_details(self, url):
         """
         Grab the details of a specific vote, such as how each legislator
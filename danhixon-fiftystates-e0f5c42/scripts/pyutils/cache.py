@@ -0,0 +1,361 @@
+"""
+Page cache backends for :class:`pyutils.legislation.LegislationScraper`.
+
+A cache maps URLs to page bodies. Every backend provides the same small
+interface:
+
+  * ``get(url)`` returns the cached body or None
+  * ``set(url, data, status=200, etag=None, last_modified=None)``
+    stores a body along with the validators the server sent for it
+  * ``touch(url)`` marks an entry as freshly fetched (after a 304)
+  * ``url in cache`` tests for an entry
+  * ``info(url)`` returns a dict with the entry's ``url``, ``fetched``
+    (Unix timestamp), ``size`` (bytes stored, after any compression),
+    ``status``, ``etag`` and ``last_modified``, or None
+  * ``keys()`` lists the md5 keys of every entry; ``get_key``,
+    ``set_key`` and ``info_key`` work on those keys directly
+  * ``close()`` flushes anything still buffered
+
+Pages are always keyed by the md5 hex digest of their URL, so a flat
+cache can be moved into the sharded layout in place (see :func:`main`).
+
+Either backend can zlib-compress the pages it writes (``compress=True``).
+Compressed entries carry a short header, so reads decompress them
+transparently and a cache may hold a mix of both kinds of entry.
+"""
+from __future__ import with_statement
+import os
+import sys
+import time
+import tempfile
+import threading
+import sqlite3
+import zlib
+from hashlib import md5
+
+
+def cache_key(url):
+    return md5(url).hexdigest()
+
+
+# Pages never start with a NUL byte, so this can't clash with raw HTML
+COMPRESSED_MAGIC = '\x00zlib\x00'
+
+
+def compress_page(data, level=6):
+    return COMPRESSED_MAGIC + zlib.compress(data, level)
+
+
+def decompress_page(data):
+    if data.startswith(COMPRESSED_MAGIC):
+        return zlib.decompress(data[len(COMPRESSED_MAGIC):])
+    return data
+
+
+def _write_file(filename, data):
+    # write to a temporary file first so a crash never leaves a
+    # truncated page behind; its name is unique so --jobs workers
+    # caching the same page can't write into each other's
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filename),
+                               suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0644)
+        os.rename(tmp, filename)
+    except:
+        os.remove(tmp)
+        raise
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError, e:
+        if e.errno != 17:
+            raise
+
+
+class FileCache(object):
+    """
+    The original cache layout: one ``<md5>.html`` file per page, all in a
+    single directory. Checking for a page costs a ``stat`` and nothing
+    but the body is recorded; the file's mtime stands in for the fetch
+    time and no ETag/Last-Modified validators are kept.
+    """
+
+    def __init__(self, path, compress=False):
+        self.path = path
+        self.compress = compress
+        _makedirs(path)
+
+    def _filename(self, key):
+        return os.path.join(self.path, key + '.html')
+
+    def get(self, url):
+        try:
+            return self.get_key(cache_key(url))
+        except IOError:
+            return None
+
+    def set(self, url, data, status=200, etag=None, last_modified=None):
+        self.set_key(cache_key(url), data)
+
+    def set_key(self, key, data, url=None, status=200, fetched=None,
+                etag=None, last_modified=None):
+        if self.compress:
+            data = compress_page(data)
+        _write_file(self._filename(key), data)
+
+    def touch(self, url):
+        os.utime(self._filename(cache_key(url)), None)
+
+    def __contains__(self, url):
+        return os.path.exists(self._filename(cache_key(url)))
+
+    def info(self, url):
+        info = self.info_key(cache_key(url))
+        if info is not None:
+            info['url'] = url
+        return info
+
+    def info_key(self, key):
+        try:
+            st = os.stat(self._filename(key))
+        except OSError:
+            return None
+        return {'url': None, 'fetched': st.st_mtime, 'size': st.st_size,
+                'status': 200, 'etag': None, 'last_modified': None}
+
+    def keys(self):
+        return [fn[:-5] for fn in os.listdir(self.path)
+                if fn.endswith('.html')]
+
+    def get_key(self, key):
+        with open(self._filename(key), 'rb') as f:
+            return decompress_page(f.read())
+
+    def close(self):
+        pass
+
+
+class ShardedCache(object):
+    """
+    Pages are spread over ``<path>/ab/cd/<md5>.html`` (the first four hex
+    digits of the key pick the directories) so no directory grows past a
+    few thousand entries, and an SQLite index at ``<path>/index.sqlite``
+    records the URL, fetch time, size, HTTP status and ETag/Last-Modified
+    validators of every page.
+
+    The index is read into memory when the cache is opened, so checking
+    for a page never touches the filesystem. New index rows are committed
+    every `commit_every` writes and on :meth:`close`; a page whose row
+    was lost in a crash is simply fetched again.
+
+    Safe to share between the threads used by
+    :meth:`LegislationScraper.prefetch`.
+    """
+
+    index_name = 'index.sqlite'
+    columns = ('url', 'fetched', 'size', 'status', 'etag', 'last_modified')
+
+    def __init__(self, path, compress=False, commit_every=100):
+        self.path = path
+        self.compress = compress
+        self.commit_every = commit_every
+        _makedirs(path)
+
+        self._lock = threading.RLock()
+        self._pending = 0
+        # --jobs workers each open the index, so wait a while for locks
+        self._db = sqlite3.connect(os.path.join(path, self.index_name),
+                                   timeout=60, check_same_thread=False)
+        self._db.text_factory = str
+        self._db.execute("""CREATE TABLE IF NOT EXISTS pages (
+                              key TEXT PRIMARY KEY,
+                              url TEXT,
+                              fetched REAL,
+                              size INTEGER,
+                              status INTEGER,
+                              etag TEXT,
+                              last_modified TEXT)""")
+
+        # indexes written before validators were recorded lack the
+        # last two columns
+        existing = [row[1] for row in
+                    self._db.execute("PRAGMA table_info(pages)")]
+        for column in ('etag', 'last_modified'):
+            if column not in existing:
+                self._db.execute("ALTER TABLE pages ADD COLUMN %s TEXT" %
+                                 column)
+        self._db.commit()
+
+        self._index = {}
+        for row in self._db.execute("SELECT key, %s FROM pages" %
+                                    ', '.join(self.columns)):
+            self._index[row[0]] = row[1:]
+
+    def _filename(self, key):
+        return os.path.join(self.path, key[0:2], key[2:4], key + '.html')
+
+    def get(self, url):
+        key = cache_key(url)
+        if key not in self._index:
+            return None
+        try:
+            return self.get_key(key)
+        except IOError:
+            return None
+
+    def get_key(self, key):
+        with open(self._filename(key), 'rb') as f:
+            return decompress_page(f.read())
+
+    def set(self, url, data, status=200, etag=None, last_modified=None):
+        self.set_key(cache_key(url), data, url=url, status=status,
+                     etag=etag, last_modified=last_modified)
+
+    def set_key(self, key, data, url=None, status=200, fetched=None,
+                etag=None, last_modified=None):
+        filename = self._filename(key)
+        _makedirs(os.path.dirname(filename))
+        if self.compress:
+            data = compress_page(data)
+        _write_file(filename, data)
+
+        self._record(key, (url, fetched or time.time(), len(data), status,
+                           etag, last_modified))
+
+    def touch(self, url):
+        key = cache_key(url)
+        row = self._index.get(key)
+        if row is not None:
+            self._record(key, (row[0], time.time()) + row[2:])
+
+    def _record(self, key, row):
+        with self._lock:
+            self._index[key] = row
+            self._db.execute("INSERT OR REPLACE INTO pages VALUES "
+                             "(?, ?, ?, ?, ?, ?, ?)", (key,) + row)
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._commit()
+
+    def _commit(self):
+        self._db.commit()
+        self._pending = 0
+
+    def __contains__(self, url):
+        return cache_key(url) in self._index
+
+    def info(self, url):
+        info = self.info_key(cache_key(url))
+        if info is not None:
+            info['url'] = url
+        return info
+
+    def info_key(self, key):
+        row = self._index.get(key)
+        if row is None:
+            return None
+        return dict(zip(self.columns, row))
+
+    def keys(self):
+        return self._index.keys()
+
+    def close(self):
+        with self._lock:
+            self._commit()
+
+
+CACHE_BACKENDS = {
+    'flat': FileCache,
+    'sharded': ShardedCache,
+}
+
+
+def open_cache(backend, path, compress=False):
+    """
+    Open the cache backend named `backend` ('flat' or 'sharded') at `path`.
+    """
+    try:
+        cls = CACHE_BACKENDS[backend]
+    except KeyError:
+        raise ValueError('Unknown cache backend: %s' % backend)
+    return cls(path, compress=compress)
+
+
+def compress_in_place(cache):
+    """
+    Compress every uncompressed page in `cache`, returning the number of
+    pages compressed and the number of bytes saved.
+    """
+    n = saved = 0
+    for key in cache.keys():
+        filename = cache._filename(key)
+        with open(filename, 'rb') as f:
+            data = f.read()
+        if data.startswith(COMPRESSED_MAGIC):
+            continue
+        packed = compress_page(data)
+        _write_file(filename, packed)
+        if isinstance(cache, ShardedCache):
+            info = cache.info_key(key)
+            if info is not None:
+                info['size'] = len(packed)
+                cache._record(key, tuple(info[column]
+                                         for column in cache.columns))
+        n += 1
+        saved += len(data) - len(packed)
+    return n, saved
+
+
+def main(argv):
+    """
+    Usage: python -m pyutils.cache shard|compress CACHE_DIR
+
+    shard
+      Move a flat cache directory (e.g. ``cache/pa``) into the sharded
+      layout in place. Run the scraper with ``--cache_backend=sharded``
+      afterwards.
+
+    compress
+      Compress every page of an existing cache directory in place (either
+      layout). Run the scraper with ``--compress_cache`` afterwards so
+      new pages are compressed too.
+    """
+    if len(argv) != 3 or argv[1] not in ('shard', 'compress'):
+        print main.__doc__
+        return 1
+
+    command, path = argv[1:]
+
+    if command == 'compress':
+        if os.path.exists(os.path.join(path, ShardedCache.index_name)):
+            cache = ShardedCache(path)
+        else:
+            cache = FileCache(path)
+        n, saved = compress_in_place(cache)
+        cache.close()
+        print 'Compressed %d pages in %s, saving %d bytes' % (n, path, saved)
+        return 0
+
+    flat = FileCache(path)
+    sharded = ShardedCache(path)
+    n = 0
+    for key in flat.keys():
+        filename = flat._filename(key)
+        target = sharded._filename(key)
+        _makedirs(os.path.dirname(target))
+        st = os.stat(filename)
+        os.rename(filename, target)
+        sharded._record(key, (None, st.st_mtime, st.st_size, None, None,
+                              None))
+        n += 1
+    sharded.close()
+    print 'Moved %d pages into %s' % (n, path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
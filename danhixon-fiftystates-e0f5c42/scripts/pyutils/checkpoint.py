@@ -0,0 +1,113 @@
+"""
+Progress records for resuming an interrupted run (``--resume``).
+"""
+from __future__ import with_statement
+import os
+import threading
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+class Checkpoint(object):
+    """
+    Records which (year, chamber) units a run has finished and which
+    bills it has written in the units it hasn't. A run started with
+    ``--resume`` skips the finished units and the bills written by the
+    interrupted run; bills written earlier in the same run are never
+    skipped, since a scraper may legitimately add a bill key twice.
+
+    The checkpoint is a file of JSON lines, each either
+    ``["unit", year, chamber]`` or ``["bill", year, chamber, bill_key]``.
+    Lines are only ever appended, so --jobs workers can share the file
+    and a run killed mid-write loses at most its last line.
+
+    Bills are recorded with :meth:`add_bill` but only written by
+    :meth:`flush`, which the scraper calls once the bills have reached
+    its output.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.resume = resume
+        self.units = set()
+        # the bills written by the run being resumed
+        self.resumed = set()
+        self._pending = []
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        if resume:
+            self._load()
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def _load(self):
+        try:
+            f = open(self.path)
+        except IOError:
+            return
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut short when the run died
+                    continue
+                if entry[0] == 'unit':
+                    self.units.add(tuple(entry[1:]))
+                elif entry[0] == 'bill':
+                    self.resumed.add(tuple(entry[1:]))
+
+    def unit_done(self, year, chamber):
+        return (year, chamber) in self.units
+
+    def has_bill(self, year, chamber, key):
+        """
+        Was this bill written by the run being resumed?
+        """
+        return self.resume and (year, chamber, key) in self.resumed
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def add_bill(self, year, chamber, key):
+        self._pending.append(['bill', year, chamber, key])
+
+    def finish_unit(self, year, chamber):
+        """
+        Mark a unit as finished and write out everything recorded.
+        """
+        self.units.add((year, chamber))
+        self._pending.append(['unit', year, chamber])
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            # after a --jobs fork every worker opens the file itself
+            if self._file is None or self._pid != os.getpid():
+                self._file = open(self.path, 'a')
+                self._pid = os.getpid()
+            self._file.write(''.join(json.dumps(entry) + '\n'
+                                     for entry in self._pending))
+            self._file.flush()
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        if self._file is not None and self._pid == os.getpid():
+            self._file.close()
+        self._file = None
+
+    def remove(self):
+        """
+        Delete the checkpoint once the run it describes has finished.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,322 @@
+"""
+Export a state's scraped output to columnar tables for analytics.
+
+Five tables are written, one row per:
+
+  * ``bills``: bill
+  * ``actions``: bill action
+  * ``sponsors``: bill sponsor
+  * ``votes``: vote (numbered by ``vote_id``)
+  * ``vote_records``: legislator's vote in a roll call
+
+Every table carries the ``state``, ``session``, ``chamber`` and
+``bill_id`` of its bill. String columns are dictionary encoded as they
+are built, so memory grows with the number of *distinct* strings rather
+than the number of rows.
+
+If pyarrow is installed each table is written as ``<table>.parquet``.
+Otherwise each table becomes a directory holding a ``schema.json`` and
+one raw :mod:`array` file per column (plus a ``<column>.dict.json`` of
+distinct values for string columns), which :func:`read_table` loads back.
+
+Usage::
+
+    python -m pyutils.columnar data/pa columnar/pa
+"""
+from __future__ import with_statement
+import os
+import sys
+import glob
+import time
+import array
+import datetime
+try:
+    import json
+except ImportError:
+    import simplejson as json
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class StringColumn(object):
+    """
+    A dictionary-encoded string column: each distinct value is stored once
+    and rows hold an index into that dictionary (-1 for None).
+    """
+    type = 'str'
+
+    def __init__(self):
+        self.codes = array.array('i')
+        self.values = []
+        self._index = {}
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(-1)
+            return
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class FloatColumn(object):
+    """
+    A float64 column; None is stored as NaN.
+    """
+    type = 'float'
+
+    def __init__(self):
+        self.codes = array.array('d')
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(float('nan'))
+        else:
+            self.codes.append(float(value))
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class DateColumn(FloatColumn):
+    """
+    A date column, stored as float64 Unix timestamps like the ones
+    DateEncoder writes. Some scrapers (GA, CT, VT) keep dates as the
+    strings they found, such as '1/13/95'; those in one of DATE_FORMATS
+    are converted and any others stored as NaN.
+    """
+
+    DATE_FORMATS = ('%m/%d/%y', '%m/%d/%Y', '%Y-%m-%d', '%m/%d/%Y %H:%M:%S',
+                    '%Y-%m-%d %H:%M:%S', '%B %d, %Y', '%b %d, %Y')
+
+    def append(self, value):
+        if isinstance(value, basestring):
+            value = self.parse(value)
+        FloatColumn.append(self, value)
+
+    def parse(self, value):
+        value = value.strip()
+        for format in self.DATE_FORMATS:
+            try:
+                when = datetime.datetime.strptime(value, format)
+            except ValueError:
+                continue
+            return time.mktime(when.timetuple())
+        return None
+
+
+class IntColumn(object):
+    """
+    An int32 column; None is stored as -1.
+    """
+    type = 'int'
+
+    def __init__(self):
+        self.codes = array.array('i')
+
+    def append(self, value):
+        if value is None:
+            self.codes.append(-1)
+        else:
+            self.codes.append(int(value))
+
+    def __len__(self):
+        return len(self.codes)
+
+
+COLUMN_TYPES = {'str': StringColumn, 'float': FloatColumn,
+                'date': DateColumn, 'int': IntColumn}
+
+BILL_COLUMNS = [('state', 'str'), ('session', 'str'), ('chamber', 'str'),
+                ('bill_id', 'str')]
+
+TABLES = {
+    'bills': BILL_COLUMNS + [('title', 'str')],
+    'actions': BILL_COLUMNS + [('actor', 'str'), ('action', 'str'),
+                               ('date', 'date')],
+    'sponsors': BILL_COLUMNS + [('type', 'str'), ('name', 'str'),
+                                ('leg_id', 'str')],
+    'votes': BILL_COLUMNS + [('vote_id', 'int'), ('vote_chamber', 'str'),
+                             ('date', 'date'), ('motion', 'str'),
+                             ('passed', 'int'), ('yes_count', 'int'),
+                             ('no_count', 'int'), ('other_count', 'int')],
+    'vote_records': BILL_COLUMNS + [('vote_id', 'int'), ('type', 'str'),
+                                    ('name', 'str'), ('leg_id', 'str')],
+}
+
+
+class Table(object):
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.names = [column for column, type in columns]
+        self.columns = [COLUMN_TYPES[type]() for column, type in columns]
+
+    def append(self, row):
+        for column, value in zip(self.columns, row):
+            column.append(value)
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def write(self, out_dir):
+        if pyarrow is not None:
+            self._write_parquet(out_dir)
+        else:
+            self._write_arrays(out_dir)
+
+    def _write_parquet(self, out_dir):
+        arrays = []
+        for column in self.columns:
+            if column.type == 'str':
+                indices = pyarrow.array([code if code >= 0 else None
+                                         for code in column.codes],
+                                        type=pyarrow.int32())
+                arrays.append(pyarrow.DictionaryArray.from_arrays(
+                    indices, pyarrow.array(column.values,
+                                           type=pyarrow.string())))
+            elif column.type == 'float':
+                arrays.append(pyarrow.array(column.codes.tolist(),
+                                            type=pyarrow.float64()))
+            else:
+                arrays.append(pyarrow.array(column.codes.tolist(),
+                                            type=pyarrow.int32()))
+        table = pyarrow.Table.from_arrays(arrays, names=self.names)
+        pyarrow.parquet.write_table(
+            table, os.path.join(out_dir, self.name + '.parquet'),
+            use_dictionary=True)
+
+    def _write_arrays(self, out_dir):
+        path = os.path.join(out_dir, self.name)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        schema = {'rows': len(self), 'byteorder': sys.byteorder,
+                  'columns': []}
+        for name, column in zip(self.names, self.columns):
+            schema['columns'].append([name, column.type,
+                                      column.codes.typecode])
+            with open(os.path.join(path, name + '.values'), 'wb') as f:
+                column.codes.tofile(f)
+            if column.type == 'str':
+                with open(os.path.join(path, name + '.dict.json'), 'w') as f:
+                    json.dump(column.values, f)
+
+        with open(os.path.join(path, 'schema.json'), 'w') as f:
+            json.dump(schema, f)
+
+
+def read_table(path):
+    """
+    Load a table written without pyarrow, returning a dict mapping column
+    names to lists of values (strings decoded, None for missing).
+    """
+    with open(os.path.join(path, 'schema.json')) as f:
+        schema = json.load(f)
+
+    table = {}
+    for name, type, typecode in schema['columns']:
+        codes = array.array(str(typecode))
+        with open(os.path.join(path, name + '.values'), 'rb') as f:
+            codes.fromfile(f, schema['rows'])
+        if schema['byteorder'] != sys.byteorder:
+            codes.byteswap()
+
+        if type == 'str':
+            with open(os.path.join(path, name + '.dict.json')) as f:
+                values = json.load(f)
+            table[name] = [values[code] if code >= 0 else None
+                           for code in codes]
+        elif type == 'float':
+            # NaN is the only value not equal to itself
+            table[name] = [value if value == value else None
+                           for value in codes]
+        else:
+            table[name] = [value if value >= 0 else None for value in codes]
+    return table
+
+
+def iter_bills(state_dir):
+    """
+    Yield every bill in a state's output directory, whether it was
+    written with ``--output_format=files`` or ``jsonl``.
+    """
+    bills_dir = os.path.join(state_dir, 'bills')
+    for filename in sorted(glob.glob(os.path.join(bills_dir, '*.json'))):
+        with open(filename) as f:
+            yield json.load(f)
+    for filename in sorted(glob.glob(os.path.join(bills_dir, '*.jsonl'))):
+        with open(filename) as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def _leg_id(leg_id):
+    if leg_id is None:
+        return None
+    return json.dumps(leg_id)
+
+
+def export(state_dir, out_dir):
+    """
+    Convert the bills under `state_dir` into columnar tables in `out_dir`.
+    Returns a dict of row counts per table.
+    """
+    tables = dict((name, Table(name, columns))
+                  for name, columns in TABLES.iteritems())
+    vote_id = 0
+
+    for bill in iter_bills(state_dir):
+        key = (bill.get('state'), bill['session'], bill['chamber'],
+               bill['bill_id'])
+        tables['bills'].append(key + (bill['title'],))
+
+        for action in bill['actions']:
+            tables['actions'].append(key + (action['actor'],
+                                            action['action'],
+                                            action['date']))
+        for sponsor in bill['sponsors']:
+            tables['sponsors'].append(key + (sponsor['type'],
+                                             sponsor['name'],
+                                             _leg_id(sponsor.get('leg_id'))))
+        for vote in bill['votes']:
+            tables['votes'].append(key + (vote_id, vote['chamber'],
+                                          vote['date'], vote['motion'],
+                                          vote['passed'], vote['yes_count'],
+                                          vote['no_count'],
+                                          vote['other_count']))
+            for type in ('yes', 'no', 'other'):
+                for record in vote['%s_votes' % type]:
+                    tables['vote_records'].append(
+                        key + (vote_id, type, record['name'],
+                               _leg_id(record['leg_id'])))
+            vote_id += 1
+
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    for table in tables.values():
+        table.write(out_dir)
+
+    return dict((name, len(table)) for name, table in tables.iteritems())
+
+
+def main(argv):
+    if len(argv) != 3:
+        print 'Usage: python -m pyutils.columnar STATE_OUTPUT_DIR OUT_DIR'
+        return 1
+    counts = export(argv[1], argv[2])
+    for name in sorted(counts):
+        print '%s: %d rows' % (name, counts[name])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,92 @@
+"""
+Concurrent page fetching for :class:`pyutils.legislation.LegislationScraper`.
+"""
+import sys
+import threading
+import Queue
+import urlparse
+
+
+class ConcurrentFetcher(object):
+    """
+    Fetch a batch of URLs using a pool of worker threads.
+
+    `fetch` is any callable taking a URL and returning the page body
+    (normally :meth:`LegislationScraper._fetch`). No more than
+    `per_host` requests are ever in flight to the same host at once, so
+    a large batch against a single legislature site never opens more
+    connections than the site is likely to tolerate.
+
+    Use like::
+
+        fetcher = ConcurrentFetcher(self._fetch, threads=8, per_host=2)
+        for url, data, error in fetcher.fetch(urls):
+            ...
+
+    Results are yielded as they complete, not in the order given. If a
+    fetch fails, `data` is None and `error` is the ``sys.exc_info()``
+    tuple of the failure.
+    """
+
+    def __init__(self, fetch, threads=4, per_host=2):
+        self._fetch = fetch
+        self.threads = max(1, int(threads))
+        self.per_host = max(1, int(per_host))
+        self._host_locks = {}
+        self._lock = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlparse.urlparse(url)[1].lower()
+        self._lock.acquire()
+        try:
+            if host not in self._host_locks:
+                self._host_locks[host] = threading.Semaphore(self.per_host)
+            return self._host_locks[host]
+        finally:
+            self._lock.release()
+
+    def _worker(self, todo, done):
+        while True:
+            try:
+                url = todo.get_nowait()
+            except Queue.Empty:
+                return
+
+            semaphore = self._host_semaphore(url)
+            semaphore.acquire()
+            try:
+                try:
+                    done.put((url, self._fetch(url), None))
+                except:
+                    done.put((url, None, sys.exc_info()))
+            finally:
+                semaphore.release()
+
+    def fetch(self, urls):
+        """
+        Fetch every URL in `urls`, yielding ``(url, data, error)`` tuples.
+        """
+        # drop duplicates but keep the caller's ordering for the queue
+        seen = set()
+        todo = Queue.Queue()
+        for url in urls:
+            if url not in seen:
+                seen.add(url)
+                todo.put(url)
+
+        if not seen:
+            return
+
+        done = Queue.Queue()
+        workers = []
+        for i in xrange(min(self.threads, len(seen))):
+            worker = threading.Thread(target=self._worker, args=(todo, done))
+            worker.setDaemon(True)
+            worker.start()
+            workers.append(worker)
+
+        for i in xrange(len(seen)):
+            yield done.get()
+
+        for worker in workers:
+            worker.join()
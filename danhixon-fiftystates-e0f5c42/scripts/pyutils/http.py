@@ -0,0 +1,157 @@
+"""
+A urllib2 opener that keeps HTTP connections alive between requests.
+
+urllib2's own handlers open a new connection for every request and send
+``Connection: close``. :class:`KeepAliveHandler` instead takes an idle
+connection to the same host from a :class:`ConnectionPool` when there is
+one, reads the whole response and puts the connection back, so a run of
+requests to one legislature's site pays for the TCP (and TLS) handshake
+only once per connection.
+
+Responses are read in full before being returned, which suits scrapers
+that read every page whole anyway. Requests through a proxy are handed
+to urllib2's standard handlers.
+"""
+import socket
+import httplib
+import urllib
+import urllib2
+import threading
+from cStringIO import StringIO
+
+
+class ConnectionPool(object):
+    """
+    Idle connections, at most `max_idle` per (scheme, host). Safe to
+    share between threads.
+    """
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+        # connections opened, for tests and logging
+        self.opened = 0
+
+    def get(self, key):
+        """
+        Return an idle connection for `key`, or None.
+        """
+        self._lock.acquire()
+        try:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+            return None
+        finally:
+            self._lock.release()
+
+    def put(self, key, conn):
+        self._lock.acquire()
+        try:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        finally:
+            self._lock.release()
+        conn.close()
+
+    def close(self):
+        self._lock.acquire()
+        try:
+            idle, self._idle = self._idle, {}
+        finally:
+            self._lock.release()
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+class KeepAliveHandler(urllib2.HTTPHandler):
+    """
+    Handles ``http`` URLs using connections from a :class:`ConnectionPool`.
+    """
+    scheme = 'http'
+    connection_class = httplib.HTTPConnection
+
+    def __init__(self, pool):
+        urllib2.HTTPHandler.__init__(self)
+        self.pool = pool
+
+    def http_open(self, req):
+        return self.keep_alive_open(req)
+
+    def keep_alive_open(self, req):
+        if req.has_proxy():
+            return self.do_open(self.connection_class, req)
+
+        host = req.get_host()
+        if not host:
+            raise urllib2.URLError('no host given')
+        key = (self.scheme, host)
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(req.headers)
+        headers['Connection'] = 'keep-alive'
+        headers = dict((name.title(), value)
+                       for name, value in headers.items())
+
+        conn = self.pool.get(key)
+        if conn is not None:
+            try:
+                return self._request(key, conn, req, headers)
+            except (socket.error, httplib.HTTPException):
+                # the server closed the idle connection; try a new one
+                conn.close()
+
+        conn = self.connection_class(host, timeout=req.timeout)
+        self.pool.opened += 1
+        try:
+            return self._request(key, conn, req, headers)
+        except (socket.error, httplib.HTTPException), e:
+            conn.close()
+            raise urllib2.URLError(e)
+
+    def _request(self, key, conn, req, headers):
+        conn.request(req.get_method(), req.get_selector(), req.data, headers)
+        r = conn.getresponse(buffering=True)
+        data = r.read()
+        if r.will_close:
+            conn.close()
+        else:
+            self.pool.put(key, conn)
+
+        resp = urllib.addinfourl(StringIO(data), r.msg, req.get_full_url())
+        resp.code = r.status
+        resp.msg = r.reason
+        return resp
+
+
+class KeepAliveHTTPSHandler(KeepAliveHandler):
+    """
+    Handles ``https`` URLs using connections from a :class:`ConnectionPool`.
+    """
+    scheme = 'https'
+    connection_class = getattr(httplib, 'HTTPSConnection', None)
+
+    def https_open(self, req):
+        return self.keep_alive_open(req)
+
+    https_request = urllib2.AbstractHTTPHandler.do_request_
+
+
+def build_opener(cookie_jar, pool=None):
+    """
+    Return a urllib2 opener that uses pooled keep-alive connections and
+    stores cookies in `cookie_jar`.
+    """
+    if pool is None:
+        pool = ConnectionPool()
+    handlers = [KeepAliveHandler(pool),
+                urllib2.HTTPCookieProcessor(cookie_jar)]
+    if KeepAliveHTTPSHandler.connection_class is not None:
+        handlers.append(KeepAliveHTTPSHandler(pool))
+    opener = urllib2.build_opener(*handlers)
+    opener.pool = pool
+    return opener
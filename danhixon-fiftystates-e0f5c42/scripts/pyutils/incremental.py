@@ -0,0 +1,90 @@
+"""
+Bookkeeping for incremental scraping (``--incremental``).
+"""
+from __future__ import with_statement
+import os
+import datetime
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+class BillManifest(object):
+    """
+    Records, for every bill written, the md5 digest of each source page it
+    was built from. On a later run a bill whose source pages all still
+    have the same digests can be skipped.
+
+    The manifest is a JSON file mapping ``session:chamber:bill_id`` keys
+    to ``{url: digest}`` dicts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.skipped = 0
+        # entries recorded since loading, sent back by --jobs workers
+        self.updates = {}
+        try:
+            with open(path) as f:
+                self.bills = json.load(f)
+        except IOError:
+            self.bills = {}
+
+    def sources(self, key):
+        """
+        Return the ``{url: digest}`` dict recorded for a bill, or None.
+        """
+        return self.bills.get(key)
+
+    def record(self, key, digests):
+        self.bills[key] = digests
+        self.updates[key] = digests
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.bills, f)
+        os.rename(tmp, self.path)
+
+
+class HighWaterMarks(object):
+    """
+    The latest update time seen in each table of a source that timestamps
+    its rows, such as California's database. On a later run only rows
+    updated since need to be looked at.
+
+    Stored as a JSON file mapping table names to ISO 8601 times.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.marks = json.load(f)
+        except IOError:
+            self.marks = {}
+
+    def get(self, table):
+        """
+        Return the mark recorded for `table` as a datetime, or None.
+        """
+        mark = self.marks.get(table)
+        if mark is None:
+            return None
+        if '.' in mark:
+            return datetime.datetime.strptime(mark, '%Y-%m-%dT%H:%M:%S.%f')
+        return datetime.datetime.strptime(mark, '%Y-%m-%dT%H:%M:%S')
+
+    def set(self, table, when):
+        if when is not None:
+            self.marks[table] = when.isoformat()
+
+    def save(self):
+        dirname = os.path.dirname(self.path)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.marks, f)
+        os.rename(tmp, self.path)
@@ -2,18 +2,39 @@ from __future__ import with_statement
 from optparse import make_option, OptionParser
 import datetime, time
 import os
+import re
 import sys
 import urllib2
 import warnings
 import random
+import socket
+import array
 from hashlib import md5
 import cookielib
 import contextlib
+import threading
+import Queue
+import unicodedata
+import heapq
+from collections import defaultdict
 from BeautifulSoup import BeautifulSoup
+from pyutils.fetcher import ConcurrentFetcher
+from pyutils.cache import open_cache
+from pyutils.incremental import BillManifest
+from pyutils.output import open_output
+from pyutils import parsing
+from pyutils.memo import memoize_parse, ParseResults
+from pyutils.http import build_opener
+from pyutils.throttle import Throttle, BUSY_STATUSES, parse_retry_after
+from pyutils.checkpoint import Checkpoint
 try:
     import json
 except ImportError:
     import simplejson as json
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
 
 class ScrapeError(Exception):
     """
@@ -33,6 +54,20 @@ class NoDataForYear(ScrapeError):
     def __str__(self):
         return 'No data exists for %s' % self.year
 
+
+class CacheMiss(ScrapeError):
+    """
+    Raised in --offline mode when a page isn't in the cache.
+    """
+
+    def __init__(self, url, reason='not in the cache'):
+        ScrapeError.__init__(self, url, reason)
+        self.url = url
+        self.reason = reason
+
+    def __str__(self):
+        return '%s is %s (running --offline)' % (self.url, self.reason)
+
 class DateEncoder(json.JSONEncoder):
     """
     JSONEncoder that encodes datetime objects as Unix timestamps.
@@ -40,8 +75,13 @@ class DateEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, datetime.datetime):
             return time.mktime(obj.timetuple())
+        if isinstance(obj, RollCall):
+            return list(obj)
         return json.JSONEncoder.default(self, obj)
 
+# Marks the end of the bills passed to LegislationScraper.write_bills
+_END_OF_BILLS = object()
+
 class LegislationScraper(object):
     """Subclass for each state's scraper
 
@@ -67,14 +107,162 @@ class LegislationScraper(object):
                     default=False, help="be verbose (use multiple times for more debugging information)"),
         make_option('-d', '--output_dir', action='store', dest='output_dir',
                     help='output directory'),
+        make_option('-o', '--output_format', action='store',
+                    dest='output_format', default='files',
+                    choices=['files', 'jsonl', 'sqlite'],
+                    help="'files' (one JSON file per bill/legislator), "
+                    "'jsonl' (newline-delimited JSON per session) or "
+                    "'sqlite' (an SQLite database)"),
+        make_option('--parser', action='store', dest='html_parser',
+                    choices=['soup', 'html5lib', 'lxml'],
+                    help="HTML parser used by parse_html and soup_context: "
+                    "'soup' (BeautifulSoup), 'html5lib' or 'lxml' "
+                    "(fastest; see pyutils.parsing)"),
         make_option('-n', '--no_cache', action='store_true', dest='no_cache',
                     help="don't use web page cache"),
+        make_option('--offline', action='store_true', dest='offline',
+                    default=False,
+                    help="read every page from the cache, even if expired, "
+                    "and never use the network"),
+        make_option('--record_misses', action='store', dest='record_misses',
+                    metavar='FILE',
+                    help="with --offline, append the URLs of pages missing "
+                    "from the cache to FILE and go on with the next year "
+                    "and chamber"),
+        make_option('--fetch_urls', action='store', dest='fetch_urls',
+                    metavar='FILE',
+                    help="download the URLs listed in FILE (such as a "
+                    "--record_misses file) into the cache, then exit"),
+        make_option('--cache_backend', action='store',
+                    dest='cache_backend', default='flat',
+                    choices=['flat', 'sharded'],
+                    help="web page cache layout: 'flat' (one directory) or "
+                    "'sharded' (nested directories with an index)"),
+        make_option('--compress_cache', action='store_true',
+                    dest='compress_cache', default=False,
+                    help="zlib-compress pages written to the cache"),
+        make_option('--cache_ttl', action='store', type='int',
+                    dest='cache_ttl',
+                    help="seconds before a cached page must be revalidated "
+                    "(default: never, unless the scraper sets cache_ttl)"),
+        make_option('--memoize_parses', action='store_true',
+                    dest='memoize_parses', default=False,
+                    help="reuse the results of @memoize_parse methods for "
+                    "cached pages that haven't changed"),
+        make_option('--incremental', action='store_true',
+                    dest='incremental', default=False,
+                    help="skip bills whose source pages haven't changed "
+                    "since the last run"),
+        make_option('--queue_size', action='store', type='int',
+                    dest='queue_size', default=100,
+                    help='number of bills a generator scrape_bills may get '
+                    'ahead of the thread writing them'),
+        make_option('--retries', action='store', type='int',
+                    dest='retries', default=3,
+                    help='number of times a failed request is retried, '
+                    'waiting exponentially longer each time'),
+        make_option('--resume', action='store_true', dest='resume',
+                    default=False,
+                    help="continue an interrupted run, skipping the years, "
+                    "chambers and bills it had finished"),
+        make_option('-j', '--jobs', action='store', type='int',
+                    dest='jobs', default=1,
+                    help='number of processes used to scrape years and '
+                    'chambers in parallel'),
         make_option('-s', '--sleep', action='store_true', dest='sleep',
-                    help="insert random delays wheen downloading web pages"),
+                    help="throttle requests to each host, adapting to how "
+                    "fast it responds (see pyutils.throttle)"),
+        make_option('--fetch_threads', action='store', type='int',
+                    dest='fetch_threads', default=4,
+                    help='number of threads used to prefetch pages'),
+        make_option('--per_host', action='store', type='int',
+                    dest='per_host', default=2,
+                    help='maximum concurrent requests to a single host'),
     )
     cache_dir = 'cache'
     output_dir = None
 
+    # The output backend (see pyutils.output), created by init_dirs
+    output_format = 'files'
+    output = None
+
+    # How many bills a generator scrape_bills may get ahead of add_bill
+    queue_size = 100
+
+    # Results of @memoize_parse methods (see pyutils.memo), stored next to
+    # the page cache when memoize_parses is set
+    memoize_parses = False
+    parse_results = None
+
+    # The parser parse_html and soup_context use (see pyutils.parsing);
+    # --parser sets _forced_parser, which overrides any other choice
+    html_parser = 'soup'
+    _forced_parser = None
+
+    # The page cache backend opened under cache_dir (see pyutils.cache);
+    # assign any object with the same interface to `cache` to replace it
+    cache_backend = 'flat'
+    compress_cache = False
+    cache = None
+
+    # How long a cached page stays fresh, in seconds. `cache_ttl` is a
+    # sequence of (url regex, seconds) pairs where the first match wins;
+    # other URLs use `default_cache_ttl`. None means never expire. Stale
+    # pages are revalidated with a conditional GET when the cache
+    # recorded an ETag or Last-Modified header for them.
+    cache_ttl = ()
+    default_cache_ttl = None
+    # POST responses are mostly searches whose results grow as bills are
+    # introduced, so unless a `cache_ttl` pattern matches them they are
+    # sent again on every run and only cached for --offline to replay
+    post_cache_ttl = 0
+
+    # In incremental mode `manifest` is a pyutils.incremental.BillManifest
+    # stored in the output directory
+    incremental = False
+    manifest = None
+
+    # The pyutils.checkpoint.Checkpoint recording run()'s progress in
+    # the output directory, and the (year, chamber) unit being scraped.
+    # Bills are written to it in batches of `checkpoint_every`.
+    checkpoint = None
+    checkpoint_every = 50
+    _unit = None
+    # Legislators of a unit a resumed run had finished are matched but
+    # not saved again
+    _replaying = False
+
+    # Collects the legislators added by a --jobs worker
+    _added_legislators = None
+
+    verbose = False
+    no_cache = False
+
+    # In offline mode urlopen only reads the cache and raises CacheMiss
+    # for anything else; the missing URLs are appended to the file
+    # `record_misses` names, if any
+    offline = False
+    record_misses = None
+    sleep = False
+
+    # Used by :method:`prefetch`
+    fetch_threads = 4
+    per_host = 2
+
+    # A failed request is retried up to `retries` times. Before retry n
+    # (from 0) it waits a random time of up to retry_wait * 2 ** n
+    # seconds, capped at max_retry_wait (or longer, if a Retry-After
+    # header asks for it). Only connection errors and the statuses in
+    # `retry_statuses` are retried.
+    retries = 3
+    retry_wait = 2.0
+    max_retry_wait = 60
+    retry_statuses = (408, 429, 500, 502, 503, 504)
+
+    # Keyword arguments for the pyutils.throttle.Throttle used when
+    # `sleep` is set, e.g. {'rate': 0.5, 'max_rate': 2}
+    politeness = {}
+
     metadata = {}
 
     # The earliest year for when legislative data is available:
@@ -89,50 +277,312 @@ class LegislationScraper(object):
         if not hasattr(self, 'state'):
             raise Exception('LegislationScrapers must have a state attribute')
         self._cookie_jar = cookielib.CookieJar()
-
-    def urlopen(self, url):
+        self._opener = build_opener(self._cookie_jar)
+        self.throttle = Throttle(**self.politeness)
+        self._prefetched = {}
+        self._page_digests = {}
+        self._voter_records = {}
+        self._misses = set()
+        self._misses_lock = threading.Lock()
+
+    def urlopen(self, url, data=None):
         """
         Grabs a URL, returning a cached version if available.
+
+        If `data` is given it is sent as the body of a POST request. The
+        response is cached under the URL plus a digest of the body (see
+        :meth:`post_cache_url`) and expires after `post_cache_ttl`.
+
+        In offline mode any cached copy is returned, however old, and a
+        page that isn't cached raises :class:`CacheMiss`.
         """
+        if data is not None:
+            return self._post(url, data)
+
+        data = None
+        if self.offline:
+            data = self.get_cache().get(url)
+            if data is None:
+                self._record_miss(url)
+                raise CacheMiss(url)
+        elif not self.no_cache:
+            if self.is_fresh(url):
+                data = self.get_cache().get(url)
+                if data is not None:
+                    self.debug('Getting %s from cache' % url)
+        elif url in self._prefetched:
+            self.debug('Getting %s from prefetched pages' % url)
+            data = self._prefetched.pop(url)
+
+        if data is None:
+            data = self._retrieve(url)
+
+        if self.incremental:
+            self._page_digests[url] = md5(data).hexdigest()
 
-        if not self.no_cache:
-            url_cache = os.path.join(self.cache_dir, self.state,
-                                     md5(url).hexdigest()+'.html')
-            if os.path.exists(url_cache):
-                self.debug('Getting %s from cache' % url)
-                return open(url_cache).read()
-
-        if self.sleep:
-            # insert a short random delay before each request
-            # and a longer random delay after some requests
-            self.requests += 1
-
-            if self.requests >= 50:
-                len = random.randint(10, 15)
-                self.requests = 0
-                self.debug("Long sleep: %d seconds" % len)
-            else:
-                len = random.uniform(1, 4)
-                self.debug("Short sleep: %f seconds" % len)
+        return data
 
-            time.sleep(len)
+    def post_cache_url(self, url, data):
+        """
+        The URL a POST request's response is cached under: `url` with a
+        fragment naming the digest of the request body.
+        """
+        return '%s#POST:%s' % (url, md5(data).hexdigest())
+
+    def _post(self, url, data):
+        key = self.post_cache_url(url, data)
+        if self.offline:
+            body = self.get_cache().get(key)
+            if body is None:
+                # not recorded: --fetch_urls can't send the request body
+                raise CacheMiss(url, 'POST request not in the cache')
+            return body
+
+        if self.no_cache:
+            return self._fetch(url, data=data).read()
+        if self.is_fresh(key):
+            body = self.get_cache().get(key)
+            if body is not None:
+                self.debug('Getting POST to %s from cache' % url)
+                return body
+
+        resp = self._fetch(url, data=data)
+        body = resp.read()
+        self.get_cache().set(key, body, status=resp.code)
+        return body
+
+    def prefetch(self, urls):
+        """
+        Download a batch of URLs concurrently so that later calls to
+        :method:`urlopen` (or :method:`soup_context`) for them return
+        immediately.
 
-        self.log('Retrieving URL: %s' % url)
-        req = urllib2.Request(url, headers=self._make_headers())
-        self._cookie_jar.add_cookie_header(req)
-        try:
-            resp = urllib2.urlopen(req)
-        except:
-            print 'Error fetching page: %s' % url
-            raise
-        self._cookie_jar.extract_cookies(resp, req)
-        data = resp.read()
+        Pages fresh in the cache are skipped. At most `per_host`
+        requests are made to the same host at once. A page that fails to
+        download is only logged here; the error is raised again when the
+        scraper asks for that page with :method:`urlopen`.
 
-        if not self.no_cache:
-            open(url_cache, 'w').write(data)
+        Use like::
+
+            links = bill_list_page.findAll('a', href=re.compile('bill_info'))
+            self.prefetch([link['href'] for link in links])
+            for link in links:
+                with self.soup_context(link['href']) as info_page:
+                    ...
+        """
+        if self.offline:
+            # record every missing page now rather than one at a time
+            cache = self.get_cache()
+            for url in urls:
+                if cache.info(url) is None:
+                    self._record_miss(url)
+            return
+
+        if self.no_cache:
+            urls = [url for url in urls if url not in self._prefetched]
+        else:
+            urls = [url for url in urls if not self.is_fresh(url)]
+
+        fetcher = ConcurrentFetcher(self._retrieve,
+                                    threads=self.fetch_threads,
+                                    per_host=self.per_host)
+        for url, data, error in fetcher.fetch(urls):
+            if error:
+                self.log('Prefetch failed for %s: %s' % (url, error[1]))
+            elif self.no_cache:
+                self._prefetched[url] = data
+
+    def _record_miss(self, url):
+        if self.record_misses is None:
+            return
+        with self._misses_lock:
+            if url in self._misses:
+                return
+            self._misses.add(url)
+            # appended a line at a time so --jobs workers can share the file
+            with open(self.record_misses, 'a') as f:
+                f.write(url + '\n')
+
+    def fetch_urls(self, filename):
+        """
+        Download the URLs listed one per line in `filename` into the cache.
+        """
+        urls = []
+        seen = set()
+        with open(filename) as f:
+            for line in f:
+                url = line.strip()
+                if url and url not in seen:
+                    seen.add(url)
+                    urls.append(url)
+        self._log("Fetching %d URLs" % len(urls))
+        self.prefetch(urls)
+
+    def get_cache(self):
+        """
+        Return the page cache, opening the `cache_backend` under
+        ``cache_dir/state`` the first time it is needed.
+        """
+        if self.cache is None:
+            self.cache = open_cache(self.cache_backend,
+                                    os.path.join(self.cache_dir, self.state),
+                                    compress=self.compress_cache)
+        return self.cache
+
+    def get_parse_results(self):
+        """
+        Return the store of memoized parse results, opening
+        ``cache_dir/state/parsed.sqlite`` the first time it is needed.
+        """
+        if self.parse_results is None:
+            path = os.path.join(self.cache_dir, self.state)
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            self.parse_results = ParseResults(os.path.join(path,
+                                                           'parsed.sqlite'))
+        return self.parse_results
+
+    def _close_caches(self):
+        self._opener.pool.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.parse_results is not None:
+            self.parse_results.close()
+
+    def page_ttl(self, url):
+        """
+        Return the number of seconds a cached copy of `url` stays fresh,
+        or None if it never expires.
+
+        Uses `cache_ttl`, then `post_cache_ttl` for the responses to POST
+        requests and `default_cache_ttl` for everything else; override
+        this for rules that can't be written as URL patterns.
+        """
+        for pattern, ttl in self.cache_ttl:
+            if re.search(pattern, url):
+                return ttl
+        if '#POST:' in url:
+            return self.post_cache_ttl
+        return self.default_cache_ttl
+
+    def is_fresh(self, url):
+        """
+        Is there a cached copy of `url` that hasn't expired?
+        """
+        info = self.get_cache().info(url)
+        if info is None:
+            return False
+
+        ttl = self.page_ttl(url)
+        if ttl is not None and time.time() - info['fetched'] >= ttl:
+            self.debug('Cached copy of %s has expired' % url)
+            return False
+        return True
 
+    def _retrieve(self, url):
+        """
+        Download a URL and store it in the cache (unless caching is off).
+
+        If the cache holds an expired copy with an ETag or Last-Modified
+        header the request is made conditional, and a 304 response just
+        renews the cached copy.
+        """
+        if self.no_cache:
+            return self._fetch(url).read()
+
+        cache = self.get_cache()
+        info = cache.info(url)
+        headers = {}
+        if info is not None:
+            if info['etag']:
+                headers['If-None-Match'] = info['etag']
+            if info['last_modified']:
+                headers['If-Modified-Since'] = info['last_modified']
+
+        resp = self._fetch(url, headers)
+        if resp.code == 304:
+            data = cache.get(url)
+            if data is not None:
+                self.debug('%s not modified' % url)
+                cache.touch(url)
+                return data
+            # the cached copy vanished since we checked; fetch it again
+            resp = self._fetch(url)
+
+        data = resp.read()
+        cache.set(url, data, status=resp.code,
+                  etag=resp.info().getheader('ETag'),
+                  last_modified=resp.info().getheader('Last-Modified'))
         return data
 
+    def _fetch(self, url, headers={}, data=None):
+        """
+        Open a URL, bypassing the cache, and return the response. Every
+        request goes through the scraper's opener, which shares its
+        cookies and keeps connections to each host alive.
+
+        A 304 Not Modified answer to a conditional request is returned
+        as a response rather than raised.
+        """
+        req_headers = self._make_headers()
+        req_headers.update(headers)
+        req = urllib2.Request(url, data, headers=req_headers)
+
+        for attempt in xrange(self.retries + 1):
+            if self.sleep:
+                delay = self.throttle.wait(url)
+                if delay:
+                    self.debug("Waited %f seconds for %s" % (delay, url))
+
+            self.log('Retrieving URL: %s' % url)
+            start = time.time()
+            try:
+                resp = self._opener.open(req)
+            except urllib2.HTTPError, e:
+                self._record_response(url, start, e)
+                if e.code == 304:
+                    return e
+                if (attempt < self.retries and
+                    e.code in self.retry_statuses):
+                    self._wait_to_retry(url, attempt, e,
+                                        e.info().getheader('Retry-After'))
+                    continue
+                print 'Error fetching page: %s' % url
+                raise
+            except (urllib2.URLError, socket.error), e:
+                if attempt < self.retries:
+                    self._wait_to_retry(url, attempt, e)
+                    continue
+                print 'Error fetching page: %s' % url
+                raise
+            except:
+                print 'Error fetching page: %s' % url
+                raise
+            self._record_response(url, start, resp)
+            return resp
+
+    def _wait_to_retry(self, url, attempt, error, retry_after=None):
+        # "full jitter": spread the retries of concurrent requests out
+        delay = random.uniform(0, min(self.max_retry_wait,
+                                      self.retry_wait * 2 ** attempt))
+        retry_after = parse_retry_after(retry_after)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self.log('Error fetching %s (%s); retrying in %.1f seconds' %
+                 (url, error, delay))
+        time.sleep(delay)
+
+    def _record_response(self, url, start, resp):
+        if not self.sleep:
+            return
+        rate = self.throttle.record(url, time.time() - start, resp.code,
+                                    resp.info().getheader('Retry-After'))
+        if resp.code in BUSY_STATUSES:
+            self.log('%s answered %d; slowing to %.2f requests/second' %
+                     (url, resp.code, rate))
+
     def show_error(self, url, body):
         exception = sys.exc_info()[1]
         if isinstance(exception, urllib2.HTTPError):
@@ -172,14 +622,24 @@ class LegislationScraper(object):
             self.show_error(url, body)
             raise
 
+    def parse_html(self, data, parser=None):
+        """
+        Parse a page with the scraper's `html_parser` ('soup', 'html5lib'
+        or 'lxml'), or with `parser` if given, returning a document with
+        BeautifulSoup's ``find``/``findAll`` interface. The ``--parser``
+        option overrides both.
+        """
+        parser = self._forced_parser or parser or self.html_parser
+        return parsing.parse_html(data, parser)
+
     @contextlib.contextmanager
     def soup_context(self, url):
         """
-        Like :method:`urlopen_context`, except returns a BeautifulSoup
-        parsed document.
+        Like :method:`urlopen_context`, except returns a parsed document
+        (see :method:`parse_html`).
         """
         body = self.urlopen(url)
-        soup = BeautifulSoup(body)
+        soup = self.parse_html(body)
         try:
             yield soup
         except:
@@ -206,17 +666,10 @@ class LegislationScraper(object):
         print "%s: %s" % (self.state, msg)
 
     def init_dirs(self):
-
-        def makedir(path):
-            try:
-                os.makedirs(path)
-            except OSError, e:
-                if e.errno != 17 or os.path.isfile(self.output_dir):
-                    raise e
-
-        makedir(os.path.join(self.output_dir, "bills"))
-        makedir(os.path.join(self.output_dir, "legislators"))
-        makedir(os.path.join(self.cache_dir, self.state))
+        self.output = open_output(self.output_format, self.output_dir,
+                                  DateEncoder)
+        if not self.no_cache:
+            self.get_cache()
 
     def scrape_metadata(self):
         """
@@ -236,11 +689,132 @@ class LegislationScraper(object):
         """
         Grab all the bills for a given chamber and year.
 
+        Either call :method:`add_bill` for each bill or ``yield`` them; a
+        generator is handed to :method:`write_bills`, which saves bills in
+        a separate thread while the next ones are scraped.
+
         Should raise a :class:`NoDataForYear` exception if the year is invalid.
         """
         raise NotImplementedError('LegislationScrapers must define a '
                                   'scrape_bills method')
 
+    def write_bills(self, bills):
+        """
+        Pass every bill from the iterable `bills` to :method:`add_bill`.
+
+        Bills are handed to a writer thread through a queue holding at
+        most `queue_size` of them. When the writer falls behind, taking the
+        next bill from `bills` waits for it, so a generator never holds
+        more than `queue_size` scraped bills in memory however large the
+        session is. An exception in either thread stops both and is
+        raised here.
+        """
+        queue = Queue.Queue(max(1, self.queue_size))
+        errors = []
+
+        def writer():
+            while True:
+                bill = queue.get()
+                if bill is _END_OF_BILLS:
+                    break
+                if errors:
+                    # keep draining so the scraping side can't block
+                    continue
+                try:
+                    self.add_bill(bill)
+                except:
+                    errors.append(sys.exc_info())
+
+        thread = threading.Thread(target=writer, name='bill-writer')
+        thread.setDaemon(True)
+        thread.start()
+        try:
+            for bill in bills:
+                if errors:
+                    break
+                queue.put(bill)
+        finally:
+            queue.put(_END_OF_BILLS)
+            thread.join()
+
+        if errors:
+            raise errors[0][0], errors[0][1], errors[0][2]
+
+    def _scrape_bills(self, chamber, year):
+        bills = self.scrape_bills(chamber, year)
+        if bills is not None:
+            self.write_bills(bills)
+        if self.checkpoint is not None:
+            self._save_checkpoint(finished=True)
+
+    def _scrape_legislators(self, chamber, year):
+        self._unit = (year, chamber)
+        self._replaying = (self.checkpoint is not None and
+                           self.checkpoint.unit_done(year, chamber))
+        try:
+            self.scrape_legislators(chamber, year)
+        finally:
+            self._replaying = False
+
+    def _save_checkpoint(self, finished=False):
+        # the output must hold every bill before the checkpoint says so;
+        # closing commits SQLite output and can be written to again
+        self.output.close()
+        if finished:
+            self.checkpoint.finish_unit(*self._unit)
+        else:
+            self.checkpoint.flush()
+
+    def bill_unchanged(self, session, chamber, bill_id):
+        """
+        In incremental mode, check whether every source page of a bill
+        written by an earlier run is byte-for-byte the same as it was then.
+        Always False when not running incrementally.
+
+        Call this before parsing a bill to skip it entirely::
+
+            if self.bill_unchanged(session, chamber, bill_id):
+                return
+        """
+        if not self.incremental:
+            return False
+
+        key = self._bill_key(session, chamber, bill_id)
+        sources = self.manifest.sources(key)
+        if not sources:
+            return False
+
+        for url, digest in sources.iteritems():
+            try:
+                data = self.urlopen(url)
+            except urllib2.URLError:
+                return False
+            if md5(data).hexdigest() != digest:
+                return False
+
+        self.manifest.skipped += 1
+        self.log("Skipping unchanged bill %s" % key)
+        return True
+
+    def _bill_key(self, session, chamber, bill_id):
+        return "%s:%s:%s" % (session, chamber, bill_id)
+
+    def _source_digests(self, bill):
+        """
+        Digests of all the pages a bill (and its votes) came from, or None
+        if some of them weren't read through :method:`urlopen`.
+        """
+        urls = [source['url'] for source in bill['sources']]
+        for vote in bill['votes']:
+            urls.extend([source['url'] for source in vote['sources']])
+
+        digests = {}
+        for url in urls:
+            if url not in self._page_digests:
+                return None
+            digests[url] = self._page_digests[url]
+        return digests
+
     def add_bill(self, bill):
         """
         Add a scraped :class:`pyutils.legislation.Bill` object.
@@ -249,13 +823,29 @@ class LegislationScraper(object):
                                          bill['session'],
                                          bill['bill_id']))
 
+        key = self._bill_key(bill['session'], bill['chamber'],
+                             bill['bill_id'])
+        if (self.checkpoint is not None and
+            self.checkpoint.has_bill(self._unit[0], self._unit[1], key)):
+            self.log("Skipping bill %s written before the run was "
+                     "interrupted" % key)
+            return
+
+        if self.incremental:
+            digests = self._source_digests(bill)
+            if digests and self.manifest.sources(key) == digests:
+                self.manifest.skipped += 1
+                self.log("Skipping unchanged bill %s" % key)
+                return
+
         # Associate each recorded vote with an actual legislator
         for vote in bill['votes']:
+            records = self._session_voters(vote['chamber'], bill['session'])
             for type in ['yes_votes', 'no_votes', 'other_votes']:
-                vote[type] = map(lambda l:
-                                 {'name': l,
-                                  'leg_id': self.matcher[vote['chamber']][l]},
-                                 vote[type])
+                vote[type] = [records[name] if name in records
+                              else self._voter_record(records,
+                                                      vote['chamber'], name)
+                              for name in vote[type]]
 
         for sponsor in bill['sponsors']:
             if 'chamber' in sponsor:
@@ -266,12 +856,15 @@ class LegislationScraper(object):
             sponsor['leg_id'] = leg_id
 
         bill['state'] = self.state
+        self.output.save_bill(bill)
+
+        if self.incremental and digests:
+            self.manifest.record(key, digests)
 
-        filename = "%s:%s:%s.json" % (bill['session'], bill['chamber'],
-                                      bill['bill_id'])
-        filename = filename.encode('ascii', 'replace')
-        with open(os.path.join(self.output_dir, "bills", filename), 'w') as f:
-            json.dump(bill, f, cls=DateEncoder)
+        if self.checkpoint is not None:
+            self.checkpoint.add_bill(self._unit[0], self._unit[1], key)
+            if self.checkpoint.pending >= self.checkpoint_every:
+                self._save_checkpoint()
 
     def add_legislator(self, legislator):
         """
@@ -281,30 +874,53 @@ class LegislationScraper(object):
                                                legislator['session'],
                                                legislator['full_name']))
 
-        self.matcher[legislator['chamber']][legislator] = [
-            legislator['session'],
-            legislator['chamber'],
-            legislator['district'],
-            legislator['full_name']]
+        self._match_legislator(legislator)
+        if self._added_legislators is not None:
+            self._added_legislators.append(legislator)
 
+        if self._replaying:
+            return
         legislator['state'] = self.state
+        self.output.save_legislator(legislator)
 
-        filename = "%s:%s:%s:%s.json" % (legislator['session'],
-                                         legislator['chamber'],
-                                         legislator['district'],
-                                         legislator['full_name'])
-        filename = filename.encode('ascii', 'replace')
-        with open(os.path.join(self.output_dir, "legislators", filename),
-                  'w') as f:
-            json.dump(legislator, f, cls=DateEncoder)
+    def _session_voters(self, chamber, session):
+        """
+        The voter records resolved so far for a (chamber, session), as a
+        dict mapping names to ``{'name': ..., 'leg_id': ...}`` records.
+        Each distinct name is looked up and allocated once, and every vote
+        it appears in shares the same record.
+        """
+        try:
+            return self._voter_records[(chamber, session)]
+        except KeyError:
+            records = self._voter_records[(chamber, session)] = {}
+            return records
+
+    def _voter_record(self, records, chamber, name):
+        if isinstance(name, str):
+            name = intern(name)
+        record = records[name] = {'name': name,
+                                  'leg_id': self.matcher[chamber][name]}
+        return record
+
+    def _reset_matchers(self):
+        self.matcher = {'upper': NameMatcher(), 'lower': NameMatcher()}
+        self._voter_records = {}
+
+    def _match_legislator(self, legislator):
+        self.matcher[legislator['chamber']][legislator] = \
+            self._leg_id(legislator)
+        # names may resolve differently now
+        self._voter_records = {}
+
+    def _leg_id(self, legislator):
+        return [legislator['session'], legislator['chamber'],
+                legislator['district'], legislator['full_name']]
 
     def write_metadata(self):
         metadata = self.scrape_metadata()
         metadata['state'] = self.state
-
-        with open(os.path.join(self.output_dir, 'state_metadata.json'),
-                  'w') as f:
-            json.dump(metadata, f, cls=DateEncoder)
+        self.output.save_metadata(metadata)
 
     def run(self):
         parser = OptionParser(
@@ -313,8 +929,47 @@ class LegislationScraper(object):
 
         self.verbose = options.verbose
         self.no_cache = options.no_cache
+        self.offline = options.offline
+        self.record_misses = options.record_misses
+        if self.no_cache and (self.offline or options.fetch_urls):
+            parser.error("--offline and --fetch_urls can't be used with "
+                         "--no_cache")
+        if self.record_misses and not self.offline:
+            parser.error("--record_misses requires --offline")
+        if self.offline and options.fetch_urls:
+            parser.error("--fetch_urls can't be used with --offline")
         self.sleep = options.sleep
-        self.requests = 0
+        self.fetch_threads = options.fetch_threads
+        self.per_host = options.per_host
+        self.cache_backend = options.cache_backend
+        self.compress_cache = options.compress_cache
+        self.incremental = options.incremental
+        self.memoize_parses = options.memoize_parses
+        self.queue_size = options.queue_size
+        self.retries = options.retries
+        if options.html_parser:
+            if options.html_parser not in parsing.available_parsers():
+                parser.error("The %s parser is not installed" %
+                             options.html_parser)
+            self._forced_parser = options.html_parser
+        self.output_format = options.output_format
+        if self.incremental and self.output_format == 'jsonl':
+            parser.error("--incremental can't be used with "
+                         "--output_format=jsonl")
+        if options.resume and self.output_format == 'jsonl':
+            parser.error("--resume can't be used with --output_format=jsonl")
+        if options.cache_ttl is not None:
+            self.default_cache_ttl = options.cache_ttl
+
+        if options.fetch_urls:
+            try:
+                self.fetch_urls(options.fetch_urls)
+            finally:
+                self._close_caches()
+            return
+        if self.record_misses:
+            # start a new list for this run
+            open(self.record_misses, 'w').close()
 
         if options.output_dir:
             self.output_dir = options.output_dir
@@ -324,6 +979,13 @@ class LegislationScraper(object):
         self.init_dirs()
         self.write_metadata()
 
+        if self.incremental:
+            self.manifest = BillManifest(os.path.join(self.output_dir,
+                                                      'bill_manifest.json'))
+        self.checkpoint = Checkpoint(os.path.join(self.output_dir,
+                                                  'checkpoint.jsonl'),
+                                     resume=options.resume)
+
         years = options.years
         if options.all_years:
             years = [str(y) for y in range(self.earliest_year,
@@ -338,19 +1000,171 @@ class LegislationScraper(object):
             chambers.append('lower')
         if not chambers:
             chambers = ['upper', 'lower']
-        for year in years:
-            self.matcher = {'upper': NameMatcher(), 'lower': NameMatcher()}
-            for chamber in chambers:
-                try:
-                    self.old_bills = {}
+        if options.jobs > 1 and not multiprocessing:
+            parser.error("--jobs requires the multiprocessing module")
+
+        try:
+            if options.jobs > 1:
+                self._run_jobs(years, chambers, options.jobs,
+                               options.all_years)
+            else:
+                for year in years:
+                    self._reset_matchers()
+                    for chamber in chambers:
+                        try:
+                            self.old_bills = {}
+
+                            self._scrape_legislators(chamber, year)
+                            if self.checkpoint.unit_done(year, chamber):
+                                continue
+                            self._scrape_bills(chamber, year)
+                        except NoDataForYear, e:
+                            if options.all_years:
+                                pass
+                            else:
+                                raise
+                        except CacheMiss, e:
+                            if self.record_misses is None:
+                                raise
+                            self.log("Skipping the rest of %s %s: %s" %
+                                     (year, chamber, e))
+            # the run is complete; a later --resume has nothing to skip
+            self.checkpoint.remove()
+        finally:
+            self.output.close()
+            self._close_caches()
+            if self.parse_results is not None:
+                self._log("Reused %d memoized parse results, parsed %d "
+                          "pages" % (self.parse_results.hits,
+                                     self.parse_results.misses))
+            if self.manifest is not None:
+                self.manifest.save()
+                self._log("Skipped %d unchanged bills" %
+                          self.manifest.skipped)
+
+    def _run_jobs(self, years, chambers, jobs, all_years):
+        """
+        Scrape every (year, chamber) unit using a pool of `jobs` worker
+        processes, producing the same output as the serial loop in
+        :method:`run`.
+
+        All legislators are scraped first. Each bills unit then starts
+        from the matcher state the serial loop would have had at that
+        point: the year's legislators for this chamber and the chambers
+        before it.
+        """
+        global _job_scraper
 
-                    self.scrape_legislators(chamber, year)
-                    self.scrape_bills(chamber, year)
-                except NoDataForYear, e:
-                    if options.all_years:
-                        pass
-                    else:
-                        raise
+        # workers open their own cache and connections; neither an SQLite
+        # handle nor a socket must be shared across a fork
+        self._close_caches()
+        self.cache = None
+        self.parse_results = None
+
+        _job_scraper = self
+        pool = multiprocessing.Pool(jobs)
+        try:
+            units = [(year, chamber) for year in years for chamber in chambers]
+            found = dict(zip(units, pool.map(_legislators_job, units)))
+
+            bill_units = []
+            for year in years:
+                legislators = []
+                for chamber in chambers:
+                    added, no_data = found[(year, chamber)]
+                    legislators.extend(added)
+                    if no_data:
+                        if not all_years:
+                            raise NoDataForYear(year)
+                        continue
+                    if (self.checkpoint is not None and
+                        self.checkpoint.unit_done(year, chamber)):
+                        continue
+                    bill_units.append((year, chamber, list(legislators)))
+
+            for year, no_data, manifest, skipped in pool.map(_bills_job,
+                                                             bill_units):
+                if no_data and not all_years:
+                    raise NoDataForYear(year)
+                if self.manifest is not None:
+                    for key, digests in manifest.iteritems():
+                        self.manifest.record(key, digests)
+                    self.manifest.skipped += skipped
+        finally:
+            pool.close()
+            pool.join()
+            _job_scraper = None
+
+    def _legislators_unit(self, year, chamber):
+        """
+        Scrape one (year, chamber) unit's legislators in a --jobs worker.
+        """
+        self._reset_matchers()
+        self._added_legislators = []
+        no_data = False
+        try:
+            self._scrape_legislators(chamber, year)
+        except NoDataForYear:
+            no_data = True
+        except CacheMiss, e:
+            if self.record_misses is None:
+                raise
+            self.log("Skipping the rest of %s %s: %s" % (year, chamber, e))
+        finally:
+            self.output.close()
+            self._close_caches()
+
+        added, self._added_legislators = self._added_legislators, None
+        return added, no_data
+
+    def _bills_unit(self, year, chamber, legislators):
+        """
+        Scrape one (year, chamber) unit's bills in a --jobs worker.
+        """
+        self._unit = (year, chamber)
+        self._voter_records = {}
+        self.matcher = {}
+        for house in ('upper', 'lower'):
+            self.matcher[house] = NameMatcher.build(
+                [(legislator, self._leg_id(legislator))
+                 for legislator in legislators
+                 if legislator['chamber'] == house])
+
+        if self.manifest is not None:
+            self.manifest.updates = {}
+            self.manifest.skipped = 0
+
+        no_data = False
+        try:
+            self.old_bills = {}
+            self._scrape_bills(chamber, year)
+        except NoDataForYear:
+            no_data = True
+        except CacheMiss, e:
+            if self.record_misses is None:
+                raise
+            self.log("Skipping the rest of %s %s: %s" % (year, chamber, e))
+        finally:
+            self.output.close()
+            self._close_caches()
+
+        if self.manifest is None:
+            return year, no_data, {}, 0
+        return (year, no_data, self.manifest.updates,
+                self.manifest.skipped)
+
+
+# The scraper a --jobs worker process runs units for. Set in the parent
+# just before the pool forks, so the workers inherit it.
+_job_scraper = None
+
+
+def _legislators_job(unit):
+    return _job_scraper._legislators_unit(*unit)
+
+
+def _bills_job(unit):
+    return _job_scraper._bills_unit(*unit)
 
 
 class Bill(dict):
@@ -488,9 +1302,9 @@ class Vote(dict):
         self['yes_count'] = yes_count
         self['no_count'] = no_count
         self['other_count'] = other_count
-        self['yes_votes'] = []
-        self['no_votes'] = []
-        self['other_votes'] = []
+        self['yes_votes'] = RollCall()
+        self['no_votes'] = RollCall()
+        self['other_votes'] = RollCall()
         self['sources'] = []
         self.update(kwargs)
 
@@ -528,6 +1342,87 @@ class Vote(dict):
         """
         self['sources'].append(dict(url=url, **kwargs))
 
+class VoterTable(object):
+    """
+    Interns the names seen in roll calls: each distinct name is stored
+    once and :class:`RollCall` objects refer to it by its index.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    def id(self, name):
+        try:
+            return self.ids[name]
+        except KeyError:
+            if isinstance(name, unicode):
+                # not a BeautifulSoup NavigableString, which would keep
+                # its whole parse tree alive as long as the table
+                name = unicode(name)
+            id = self.ids[name] = len(self.names)
+            self.names.append(name)
+            return id
+
+    def __len__(self):
+        return len(self.names)
+
+
+class RollCall(object):
+    """
+    The names of the legislators who voted one way in a :class:`Vote`.
+
+    Rather than a list of strings, a roll call keeps an ``array`` of
+    :class:`VoterTable` ids, four bytes per vote cast, so a session's
+    worth of votes waiting to be passed to ``add_bill`` holds each name
+    only once. It supports the list operations scrapers use (``append``,
+    ``extend``, iteration, ``len`` and indexing) and :class:`DateEncoder`
+    serializes it as a plain list of names.
+    """
+    __slots__ = ('ids',)
+
+    # shared by every roll call in the process
+    table = VoterTable()
+
+    def __init__(self, names=()):
+        self.ids = array.array('i')
+        self.extend(names)
+
+    def append(self, name):
+        self.ids.append(self.table.id(name))
+
+    def extend(self, names):
+        id = self.table.id
+        self.ids.extend([id(name) for name in names])
+
+    def __iter__(self):
+        names = self.table.names
+        for id in self.ids:
+            yield names[id]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        names = self.table.names
+        if isinstance(index, slice):
+            return [names[id] for id in self.ids[index]]
+        return names[self.ids[index]]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'RollCall(%r)' % list(self)
+
+    def __reduce__(self):
+        # ids are only meaningful within one process's table
+        return (RollCall, (list(self),))
+
+
 class Legislator(dict):
 
     def __init__(self, session, chamber, district, full_name,
@@ -569,13 +1464,84 @@ class Legislator(dict):
         """
         self['sources'].append(dict(url=url, **kwargs))
 
+
+_NAME_SUFFIXES = set(['jr', 'sr', 'ii', 'iii', 'iv'])
+
+
+def normalize_name(name, keep_suffixes=False):
+    """
+    Reduce a name to the form :class:`NameMatcher` indexes it under:
+    lowercase, accents and periods removed, generational suffixes
+    ("Jr.", "III") dropped, or moved to the end if `keep_suffixes` is
+    set, and whitespace collapsed. Commas and parentheses are kept since
+    they mark "Last, First" and "Last (F)" forms.
+
+    >>> normalize_name(u'Jos\xe9  Mart\xednez, Jr.')
+    u'jose martinez'
+    >>> normalize_name('Smith Jr., John')
+    u'smith, john'
+    >>> normalize_name('Smith Jr., John', keep_suffixes=True)
+    u'smith, john jr'
+    """
+    if not isinstance(name, unicode):
+        name = name.decode('utf-8', 'replace')
+    name = unicodedata.normalize('NFKD', name)
+    name = u''.join([c for c in name if not unicodedata.combining(c)])
+    name = name.lower().replace(u'.', u'').replace(u"'", u'')
+    name = name.replace(u',', u', ')
+
+    tokens, suffixes = [], []
+    for token in name.split():
+        if token.rstrip(u',') in _NAME_SUFFIXES:
+            suffixes.append(token.rstrip(u','))
+            # keep a comma that followed the suffix
+            if token.endswith(u',') and tokens and \
+                    not tokens[-1].endswith(u','):
+                tokens[-1] += u','
+            continue
+        tokens.append(token)
+    if keep_suffixes:
+        tokens[-1:] = [tokens[-1].rstrip(u',')] if tokens else []
+        tokens.extend(suffixes)
+    return u' '.join(tokens).strip(u', ')
+
+
+def _trigrams(name):
+    name = u'  %s ' % name
+    return set([name[i:i + 3] for i in xrange(len(name) - 2)])
+
+
+def _edit_distance(a, b, limit):
+    """
+    Number of insertions, deletions, substitutions and transpositions of
+    adjacent characters needed to turn `a` into `b`, or ``limit + 1`` as
+    soon as it's clear the distance is greater than `limit`.
+    """
+    prev2 = None
+    prev = range(len(b) + 1)
+    for i in xrange(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in xrange(1, len(b) + 1):
+            if a[i - 1] == b[j - 1]:
+                cur[j] = prev[j - 1]
+            else:
+                cur[j] = 1 + min(prev[j], cur[j - 1], prev[j - 1])
+                if i > 1 and j > 1 and a[i - 1] == b[j - 2] and \
+                        a[i - 2] == b[j - 1] and prev2[j - 2] + 1 < cur[j]:
+                    cur[j] = prev2[j - 2] + 1
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[len(b)]
+
+
 class NameMatcher(object):
     """
     Match various forms of a name, provided they uniquely identify
     a person from everyone else we've seen.
 
     Given the name object:
-     {'fullname': 'Michael J. Stephens', 'first_name': 'Michael',
+     {'full_name': 'Michael J. Stephens', 'first_name': 'Michael',
       'last_name': 'Stephens', 'middle_name': 'Joseph'}
     we will match these forms:
      Michael J. Stephens
@@ -591,10 +1557,25 @@ class NameMatcher(object):
      Michael Joseph Stephens
      Stephens (M)
 
+    Names are compared after :func:`normalize_name`, so case, accents and
+    periods don't matter. Suffixes like "Jr." are part of a name, so
+    that father and son namesakes can be told apart, but a name whose
+    suffixed form matches nothing is tried without its suffix.
+
+    If `fuzzy_threshold` is set, a name matching none of the forms falls
+    back to a fuzzy match: a trigram index picks the `fuzzy_candidates`
+    forms sharing the most three-letter sequences with it, and the
+    closest of those by edit distance wins, provided its similarity (one
+    minus the distance over the longer name's length) is at least
+    `fuzzy_threshold` and no other person scores as well. It is off by
+    default, since short surnames a letter apart ("Hall", "Hill") are
+    usually different people. Lookups are memoized until the next
+    legislator is added.
+
     Tests:
 
     >>> nm = NameMatcher()
-    >>> nm[{'fullname': 'Michael J. Stephens', 'first_name': 'Michael', \
+    >>> nm[{'full_name': 'Michael J. Stephens', 'first_name': 'Michael', \
             'last_name': 'Stephens', 'middle_name': 'J'}] = 1
     >>> assert nm['Michael J. Stephens'] == 1
     >>> assert nm['Stephens'] == 1
@@ -603,9 +1584,15 @@ class NameMatcher(object):
     >>> assert nm['Stephens, Michael'] == 1
     >>> assert nm['Stephens, M J'] == 1
 
+    Suffixes and accents:
+
+    >>> assert nm['STEPHENS, MICHAEL JR.'] == 1
+    >>> assert nm[u'Mich\xe1el Stephens'] == 1
+    >>> assert nm['Jones'] == None
+
     Add a similar name:
 
-    >>> nm[{'fullname': 'Mike J. Stephens', 'first_name': 'Mike', \
+    >>> nm[{'full_name': 'Mike J. Stephens', 'first_name': 'Mike', \
             'last_name': 'Stephens', 'middle_name': 'Joseph'}] = 2
 
     Unique:
@@ -614,61 +1601,175 @@ class NameMatcher(object):
     >>> assert nm['Mike Stephens'] == 2
     >>> assert nm['Michael Stephens'] == 1
 
+    Namesakes told apart by their suffixes:
+
+    >>> nm[{'full_name': 'John Smith Jr.', 'first_name': 'John', \
+            'last_name': 'Smith Jr.', 'middle_name': ''}] = 3
+    >>> nm[{'full_name': 'John Smith Sr.', 'first_name': 'John', \
+            'last_name': 'Smith Sr.', 'middle_name': ''}] = 4
+    >>> assert nm['Smith Jr.'] == 3 and nm['SMITH SR'] == 4
+
     Not unique anymore:
 
     >>> assert nm['Stephens'] == None
     >>> assert nm['Stephens, M'] == None
     >>> assert nm['Stephens, M J'] == None
+
+    Build a matcher for a whole chamber at once:
+
+    >>> nm = NameMatcher.build([
+    ...     ({'full_name': 'Ann Smith', 'first_name': 'Ann',
+    ...       'last_name': 'Smith', 'middle_name': ''}, 'smith'),
+    ...     ({'full_name': 'Bob Jones', 'first_name': 'Bob',
+    ...       'last_name': 'Jones', 'middle_name': ''}, 'jones')])
+    >>> assert nm['Smith, A'] == 'smith' and nm['Jones'] == 'jones'
+
+    Near misses only match when fuzzy matching is asked for:
+
+    >>> chamber = [({'full_name': last, 'first_name': '', 'last_name': last,
+    ...              'middle_name': ''}, last.lower())
+    ...            for last in ('Hall', 'Ward', 'Stephens', 'Lee')]
+    >>> nm = NameMatcher.build(chamber)
+    >>> assert nm['Hill'] == None and nm['Card'] == None
+    >>> assert nm['Stepehns'] == None
+    >>> nm = NameMatcher.build(chamber, fuzzy_threshold=0.75)
+    >>> assert nm['Stepehns'] == 'stephens'
     """
 
-    def __init__(self):
+    fuzzy_threshold = None
+    fuzzy_candidates = 8
+
+    def __init__(self, fuzzy_threshold=fuzzy_threshold):
+        self.fuzzy_threshold = fuzzy_threshold
+        # normalized form -> object, or None if the form is ambiguous
         self.names = {}
+        self._memo = {}
+        self._trigram_index = None
 
-    def __setitem__(self, name, obj):
+    @classmethod
+    def build(cls, legislators, **kwargs):
         """
-        Expects a dictionary with fullname, first_name, last_name and
-        middle_name elements as key.
+        Create a matcher from a sequence of ``(name, obj)`` pairs, where
+        each name is a dict like the ones :meth:`__setitem__` takes.
+        """
+        matcher = cls(**kwargs)
+        for name, obj in legislators:
+            matcher.add(name, obj)
+        return matcher
 
-        While this can grow quickly, we should never be dealing with
-        more than a few hundred legislators at a time so don't worry about
-        it.
+    def _forms(self, name):
+        """
+        All the ways `name` might be written, normalized.
         """
-        # We throw possible forms of this name into a set because we
-        # don't want to try to add the same form twice for the same
-        # name
+        first = name['first_name']
+        middle = name['middle_name']
+        last = name['last_name']
+
         forms = set()
         forms.add(name['full_name'])
-        forms.add(name['last_name'])
-        forms.add("%s, %s" % (name['last_name'], name['first_name']))
-        forms.add("%s %s" % (name['first_name'], name['last_name']))
-        forms.add("%s %s" % (name['first_name'][0], name['last_name']))
-        forms.add("%s, %s" % (name['last_name'], name['first_name'][0]))
-        forms.add("%s (%s)" % (name['last_name'], name['first_name']))
-        forms.add("%s (%s)" % (name['last_name'], name['first_name'][0][0]))
-
-        if len(name['middle_name']) > 0:
-            forms.add("%s, %s %s" % (name['last_name'], name['first_name'],
-                                     name['middle_name']))
-            forms.add("%s, %s %s" % (name['last_name'], name['first_name'][0],
-                                     name['middle_name']))
-            forms.add("%s %s %s" % (name['first_name'], name['middle_name'],
-                                    name['last_name']))
-            forms.add("%s, %s %s" % (name['last_name'], name['first_name'][0],
-                                     name['middle_name'][0]))
-            forms.add("%s %s %s" % (name['first_name'], name['middle_name'][0],
-                                    name['last_name']))
-            forms.add("%s, %s %s" % (name['last_name'], name['first_name'],
-                                     name['middle_name'][0]))
-
-        for form in forms:
-            form = form.replace('.', '').lower()
-            if form in self.names:
+        forms.add(last)
+        forms.add("%s, %s" % (last, first))
+        forms.add("%s %s" % (first, last))
+        if first:
+            forms.add("%s %s" % (first[0], last))
+            forms.add("%s, %s" % (last, first[0]))
+            forms.add("%s (%s)" % (last, first[0]))
+        forms.add("%s (%s)" % (last, first))
+
+        if len(middle) > 0:
+            forms.add("%s, %s %s" % (last, first, middle))
+            forms.add("%s %s %s" % (first, middle, last))
+            forms.add("%s %s %s" % (first, middle[0], last))
+            forms.add("%s, %s %s" % (last, first, middle[0]))
+            if first:
+                forms.add("%s, %s %s" % (last, first[0], middle))
+                forms.add("%s, %s %s" % (last, first[0], middle[0]))
+
+        # indexed with and without any suffixes
+        return set([normalize_name(form, keep)
+                    for form in forms for keep in (True, False)])
+
+    def add(self, name, obj):
+        """
+        Same as ``matcher[name] = obj``.
+        """
+        for form in self._forms(name):
+            if form in self.names and self.names[form] != obj:
                 self.names[form] = None
             else:
                 self.names[form] = obj
+        self._memo = {}
+        self._trigram_index = None
+
+    def __setitem__(self, name, obj):
+        """
+        Expects a dictionary with full_name, first_name, last_name and
+        middle_name elements as key.
+        """
+        self.add(name, obj)
 
     def __getitem__(self, name):
-        name = name.strip().replace('.', '').lower()
-        if name in self.names:
-            return self.names[name]
-        return None
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+
+        form = normalize_name(name, keep_suffixes=True)
+        if form not in self.names:
+            # no one goes by this suffix; try without it
+            form = normalize_name(name)
+        if form in self.names:
+            obj = self.names[form]
+        else:
+            obj = self._fuzzy_match(form)
+
+        self._memo[name] = obj
+        return obj
+
+    def _build_trigram_index(self):
+        self._forms_list = []
+        self._trigram_index = {}
+        for form, obj in self.names.iteritems():
+            if obj is None:
+                continue
+            n = len(self._forms_list)
+            self._forms_list.append((form, obj))
+            for trigram in _trigrams(form):
+                self._trigram_index.setdefault(trigram, []).append(n)
+
+    def _fuzzy_match(self, form):
+        if self.fuzzy_threshold is None or not form:
+            return None
+        if self._trigram_index is None:
+            self._build_trigram_index()
+
+        # the forms sharing the most trigrams with the name are the only
+        # ones worth an edit distance
+        shared = defaultdict(int)
+        for trigram in _trigrams(form):
+            for n in self._trigram_index.get(trigram, ()):
+                shared[n] += 1
+        candidates = heapq.nlargest(self.fuzzy_candidates, shared,
+                                    key=shared.__getitem__)
+
+        best = None
+        best_score = 0
+        for n in candidates:
+            candidate, obj = self._forms_list[n]
+            longest = max(len(form), len(candidate))
+            limit = int((1 - self.fuzzy_threshold) * longest)
+            if abs(len(form) - len(candidate)) > limit:
+                continue
+            distance = _edit_distance(form, candidate, limit)
+            if distance > limit:
+                continue
+            score = 1 - float(distance) / longest
+            if score > best_score:
+                best, best_score = obj, score
+            elif score == best_score and obj != best:
+                # two different people are equally close
+                best = None
+
+        if best_score < self.fuzzy_threshold:
+            return None
+        return best
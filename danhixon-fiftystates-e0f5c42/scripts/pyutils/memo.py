@@ -0,0 +1,156 @@
+"""
+Memoization of per-page parse results (``--memoize_parses``).
+
+Decorate a scraper method that takes a URL and returns what it extracted
+from that page::
+
+    class PALegislationScraper(LegislationScraper):
+
+        @memoize_parse
+        def parse_vote_details(self, url):
+            ...
+
+When memoization is on, the result is pickled into an SQLite file under
+the scraper's cache directory, keyed by the URL, the page's content, any
+further arguments and a hash of the method's own code. On a later run
+the stored result is returned without parsing the page again, as long
+as the page and the method are unchanged. If the method depends on helpers whose
+code may change, pass a version to bump by hand::
+
+        @memoize_parse(version=2)
+        def scrape_new_vote(self, url):
+            ...
+"""
+from __future__ import with_statement
+import threading
+import sqlite3
+import cPickle as pickle
+from hashlib import md5
+
+
+def code_version(func):
+    """
+    A digest of `func`'s bytecode, constants and names, including any
+    functions defined inside it.
+    """
+    digest = md5()
+
+    def add(code):
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names))
+        for const in code.co_consts:
+            if hasattr(const, 'co_code'):
+                add(const)
+            else:
+                digest.update(repr(const))
+
+    add(func.func_code)
+    return digest.hexdigest()
+
+
+def plain_strings(result):
+    """
+    Replace the unicode subclasses in `result` and in its dicts, lists and
+    tuples with plain unicode strings. A BeautifulSoup NavigableString
+    pickles together with the whole parse tree it belongs to.
+
+    Dicts and lists are changed in place; `result` (or a copy of it, if
+    it is itself a string or a tuple) is returned.
+    """
+    if isinstance(result, unicode):
+        if type(result) is not unicode:
+            result = unicode(result)
+    elif isinstance(result, dict):
+        for key, value in result.items():
+            result[key] = plain_strings(value)
+    elif isinstance(result, list):
+        result[:] = [plain_strings(value) for value in result]
+    elif type(result) is tuple:
+        result = tuple(plain_strings(value) for value in result)
+    return result
+
+
+class ParseResults(object):
+    """
+    An SQLite table of pickled parse results. Writes are committed every
+    `commit_every` results and on :meth:`close`.
+    """
+
+    def __init__(self, path, commit_every=100):
+        self.path = path
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=60,
+                                   check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+                              key TEXT PRIMARY KEY,
+                              result BLOB)""")
+        self._db.commit()
+
+    def get(self, key):
+        """
+        Return the stored result for `key`; raises KeyError if there is
+        none.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT result FROM results WHERE key = ?",
+                                   (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            raise KeyError(key)
+        self.hits += 1
+        return pickle.loads(str(row[0]))
+
+    def set(self, key, result):
+        data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?)",
+                             (key, sqlite3.Binary(data)))
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._db.commit()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+
+
+def memoize_parse(func=None, version=None):
+    """
+    Decorator memoizing a ``method(self, url, ...)`` that parses the page
+    at `url`; see the module documentation. Results are only memoized
+    when the scraper's `memoize_parses` flag is set and its page cache is
+    in use.
+    """
+    if func is None:
+        return lambda func: memoize_parse(func, version)
+
+    func_version = '%s:%s:%s' % (func.__name__, code_version(func), version)
+
+    def wrapper(self, url, *args, **kwargs):
+        if not self.memoize_parses or self.no_cache:
+            return func(self, url, *args, **kwargs)
+
+        key = md5()
+        key.update('%s:%s:' % (type(self).__name__, func_version))
+        key.update(pickle.dumps((url, args, sorted(kwargs.items()))))
+        key.update(md5(self.urlopen(url)).hexdigest())
+        key = key.hexdigest()
+
+        results = self.get_parse_results()
+        try:
+            return results.get(key)
+        except KeyError:
+            result = plain_strings(func(self, url, *args, **kwargs))
+            results.set(key, result)
+            return result
+
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__module__ = func.__module__
+    return wrapper
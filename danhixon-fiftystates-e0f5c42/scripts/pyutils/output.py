@@ -0,0 +1,393 @@
+"""
+Output backends for :class:`pyutils.legislation.LegislationScraper`.
+
+A backend receives finished bills, legislators and state metadata from
+:meth:`LegislationScraper.add_bill`, :meth:`add_legislator` and
+:meth:`write_metadata`. Every backend provides:
+
+  * ``save_bill(bill)``
+  * ``save_legislator(legislator)``
+  * ``save_metadata(metadata)``
+  * ``close()`` flushes anything still buffered; the backend may be
+    used again afterwards
+
+Pick one on the command line with ``--output_format``.
+"""
+from __future__ import with_statement
+import os
+import glob
+import re
+import sqlite3
+import datetime
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError, e:
+        if e.errno != 17 or os.path.isfile(path):
+            raise
+
+
+class FileOutput(object):
+    """
+    The default layout: one JSON file per bill
+    (``bills/session:chamber:bill_id.json``) and per legislator
+    (``legislators/session:chamber:district:full_name.json``).
+    """
+
+    def __init__(self, output_dir, encoder):
+        self.output_dir = output_dir
+        self.encoder = encoder
+        _makedirs(os.path.join(output_dir, "bills"))
+        _makedirs(os.path.join(output_dir, "legislators"))
+
+    def _write(self, subdir, filename, obj):
+        filename = filename.encode('ascii', 'replace')
+        with open(os.path.join(self.output_dir, subdir, filename), 'w') as f:
+            json.dump(obj, f, cls=self.encoder)
+
+    def save_bill(self, bill):
+        self._write("bills", "%s:%s:%s.json" % (bill['session'],
+                                                bill['chamber'],
+                                                bill['bill_id']), bill)
+
+    def save_legislator(self, legislator):
+        self._write("legislators",
+                    "%s:%s:%s:%s.json" % (legislator['session'],
+                                          legislator['chamber'],
+                                          legislator['district'],
+                                          legislator['full_name']),
+                    legislator)
+
+    def save_metadata(self, metadata):
+        with open(os.path.join(self.output_dir, 'state_metadata.json'),
+                  'w') as f:
+            json.dump(metadata, f, cls=self.encoder)
+
+    def close(self):
+        pass
+
+
+class JSONLinesOutput(object):
+    """
+    Streams bills and legislators into newline-delimited JSON files, one
+    object per line, grouped by session: ``bills/<session>.jsonl`` and
+    ``legislators/<session>.jsonl``. Once a file holds `max_records`
+    objects the next ones go to ``<session>.1.jsonl``, ``.2.jsonl`` and
+    so on.
+
+    Writes go through a large buffer, so a session of thousands of bills
+    costs a handful of syscalls instead of an open/write/close per bill.
+
+    A run rewrites the state's output: any ``.jsonl`` files already in
+    the output directory are removed when the backend is created. After a
+    ``--jobs`` fork each worker process writes its own
+    ``<session>-<pid>.jsonl`` shards so workers never share a file.
+    """
+
+    buffer_size = 1 << 20
+
+    def __init__(self, output_dir, encoder, max_records=100000):
+        self.output_dir = output_dir
+        self.encoder = encoder
+        self.max_records = max_records
+
+        for subdir in ("bills", "legislators"):
+            path = os.path.join(output_dir, subdir)
+            _makedirs(path)
+            for fn in glob.glob(os.path.join(path, '*.jsonl')):
+                os.remove(fn)
+
+        self._pid = os.getpid()
+        self._suffix = ''
+        self._files = {}
+        self._created = set()
+
+    def _shard(self, subdir, session):
+        if os.getpid() != self._pid:
+            # we're in a forked worker: never touch the parent's files
+            self._pid = os.getpid()
+            self._files = {}
+            self._created = set()
+            self._suffix = '-%d' % self._pid
+
+        key = (subdir, session)
+        shard = self._files.get(key)
+        if shard is None or shard[1] >= self.max_records:
+            if shard is None:
+                number = 0
+            else:
+                shard[0].close()
+                number = shard[2] + 1
+            shard = self._open(subdir, session, number)
+            self._files[key] = shard
+        return shard
+
+    def _open(self, subdir, session, number):
+        name = '%s' % session
+        if isinstance(name, unicode):
+            name = name.encode('ascii', 'replace')
+        name = re.sub(r'[^\w.-]+', '_', name)
+        name += self._suffix
+        if number:
+            name += '.%d' % number
+        filename = os.path.join(self.output_dir, subdir, name + '.jsonl')
+
+        # a shard closed at the end of one --jobs unit is appended to by
+        # the next unit in the same process
+        mode = filename in self._created and 'a' or 'w'
+        self._created.add(filename)
+        return [open(filename, mode, self.buffer_size), 0, number]
+
+    def _write(self, subdir, obj):
+        shard = self._shard(subdir, obj['session'])
+        shard[0].write(json.dumps(obj, cls=self.encoder))
+        shard[0].write('\n')
+        shard[1] += 1
+
+    def save_bill(self, bill):
+        self._write("bills", bill)
+
+    def save_legislator(self, legislator):
+        self._write("legislators", legislator)
+
+    def save_metadata(self, metadata):
+        with open(os.path.join(self.output_dir, 'state_metadata.json'),
+                  'w') as f:
+            json.dump(metadata, f, cls=self.encoder)
+
+    def close(self):
+        for shard in self._files.values():
+            shard[0].close()
+        self._files = {}
+
+
+class SQLiteOutput(object):
+    """
+    Writes everything into an SQLite database, ``legislation.sqlite`` in
+    the output directory, with one normalized table per kind of record:
+
+      * ``bills``: one row per bill, keyed by state/session/chamber/bill_id
+      * ``sponsors``, ``actions``, ``versions``, ``documents``,
+        ``sources`` and ``votes``: rows pointing at ``bills.id``
+      * ``vote_records``: one row per legislator per vote, pointing at
+        ``votes.id``
+      * ``legislators`` and ``metadata``
+
+    ``leg_id`` columns hold the JSON-encoded legislator id the scraper's
+    NameMatcher assigned (``[session, chamber, district, full_name]``),
+    so ``sponsors``, ``vote_records`` and ``legislators`` join on it.
+    Dates are stored as Unix timestamps, like the JSON output, and any
+    fields beyond the standard ones are kept as JSON in ``extra``.
+
+    Each bill or legislator is committed as soon as it has been written,
+    so no write transaction stays open while the scraper goes back to
+    the network and ``--jobs`` workers, each with its own connection,
+    take turns writing. The database is in WAL mode, which keeps those
+    commits cheap. Writing a bill that is already in the database
+    replaces it.
+    """
+
+    filename = 'legislation.sqlite'
+
+    # seconds to wait for another worker's write to finish
+    timeout = 300
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS metadata (
+            state TEXT PRIMARY KEY, data TEXT);
+        CREATE TABLE IF NOT EXISTS bills (
+            id INTEGER PRIMARY KEY, state TEXT, session TEXT, chamber TEXT,
+            bill_id TEXT, title TEXT, extra TEXT);
+        CREATE UNIQUE INDEX IF NOT EXISTS bills_key
+            ON bills (state, session, chamber, bill_id);
+        CREATE TABLE IF NOT EXISTS sponsors (
+            bill INTEGER, type TEXT, name TEXT, leg_id TEXT, extra TEXT);
+        CREATE INDEX IF NOT EXISTS sponsors_bill ON sponsors (bill);
+        CREATE INDEX IF NOT EXISTS sponsors_leg_id ON sponsors (leg_id);
+        CREATE TABLE IF NOT EXISTS actions (
+            bill INTEGER, actor TEXT, action TEXT, date REAL, extra TEXT);
+        CREATE INDEX IF NOT EXISTS actions_bill ON actions (bill);
+        CREATE TABLE IF NOT EXISTS versions (
+            bill INTEGER, name TEXT, url TEXT, extra TEXT);
+        CREATE INDEX IF NOT EXISTS versions_bill ON versions (bill);
+        CREATE TABLE IF NOT EXISTS documents (
+            bill INTEGER, name TEXT, url TEXT, extra TEXT);
+        CREATE INDEX IF NOT EXISTS documents_bill ON documents (bill);
+        CREATE TABLE IF NOT EXISTS sources (
+            bill INTEGER, url TEXT, extra TEXT);
+        CREATE INDEX IF NOT EXISTS sources_bill ON sources (bill);
+        CREATE TABLE IF NOT EXISTS votes (
+            id INTEGER PRIMARY KEY, bill INTEGER, chamber TEXT, date REAL,
+            motion TEXT, passed INTEGER, yes_count INTEGER,
+            no_count INTEGER, other_count INTEGER, extra TEXT);
+        CREATE INDEX IF NOT EXISTS votes_bill ON votes (bill);
+        CREATE TABLE IF NOT EXISTS vote_records (
+            vote INTEGER, type TEXT, name TEXT, leg_id TEXT);
+        CREATE INDEX IF NOT EXISTS vote_records_vote ON vote_records (vote);
+        CREATE INDEX IF NOT EXISTS vote_records_leg_id
+            ON vote_records (leg_id);
+        CREATE TABLE IF NOT EXISTS legislators (
+            state TEXT, session TEXT, chamber TEXT, district TEXT,
+            full_name TEXT, first_name TEXT, last_name TEXT,
+            middle_name TEXT, party TEXT, leg_id TEXT, extra TEXT);
+        CREATE UNIQUE INDEX IF NOT EXISTS legislators_key
+            ON legislators (state, session, chamber, district, full_name);
+        CREATE INDEX IF NOT EXISTS legislators_leg_id
+            ON legislators (leg_id);
+        """
+
+    bill_children = ('sponsors', 'actions', 'versions', 'documents',
+                     'sources', 'votes')
+
+    def __init__(self, output_dir, encoder):
+        _makedirs(output_dir)
+        self.path = os.path.join(output_dir, self.filename)
+        self.encoder = encoder
+        self._db = None
+        self._pid = None
+
+    def _conn(self):
+        # after a --jobs fork every worker needs its own connection
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=self.timeout)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            # one statement at a time: unlike executescript, execute
+            # prepares a statement again if workers starting together
+            # change the schema under it
+            for statement in self.schema.split(';'):
+                self._db.execute(statement)
+            self._db.commit()
+            self._pid = os.getpid()
+        return self._db
+
+    def _value(self, value):
+        if isinstance(value, datetime.datetime):
+            return self.encoder().default(value)
+        return value
+
+    def _extra(self, obj, standard):
+        extra = dict((k, v) for k, v in obj.iteritems() if k not in standard)
+        if not extra:
+            return None
+        return json.dumps(extra, cls=self.encoder)
+
+    def _leg_id(self, leg_id):
+        if leg_id is None:
+            return None
+        return json.dumps(leg_id)
+
+    def save_bill(self, bill):
+        # one transaction per bill, committed (or rolled back) at once
+        with self._conn() as db:
+            self._save_bill(db, bill)
+
+    def _save_bill(self, db, bill):
+        key = (bill['state'], bill['session'], bill['chamber'],
+               bill['bill_id'])
+
+        for (old,) in db.execute("SELECT id FROM bills WHERE state = ? AND "
+                                 "session = ? AND chamber = ? AND "
+                                 "bill_id = ?", key):
+            db.execute("DELETE FROM vote_records WHERE vote IN "
+                       "(SELECT id FROM votes WHERE bill = ?)", (old,))
+            for table in self.bill_children:
+                db.execute("DELETE FROM %s WHERE bill = ?" % table, (old,))
+            db.execute("DELETE FROM bills WHERE id = ?", (old,))
+
+        cursor = db.execute(
+            "INSERT INTO bills (state, session, chamber, bill_id, title, "
+            "extra) VALUES (?, ?, ?, ?, ?, ?)",
+            key + (bill['title'],
+                   self._extra(bill, ('type', 'state', 'session', 'chamber',
+                                      'bill_id', 'title') +
+                               self.bill_children)))
+        id = cursor.lastrowid
+
+        db.executemany(
+            "INSERT INTO sponsors VALUES (?, ?, ?, ?, ?)",
+            [(id, s['type'], s['name'], self._leg_id(s.get('leg_id')),
+              self._extra(s, ('type', 'name', 'leg_id')))
+             for s in bill['sponsors']])
+        db.executemany(
+            "INSERT INTO actions VALUES (?, ?, ?, ?, ?)",
+            [(id, a['actor'], a['action'], self._value(a['date']),
+              self._extra(a, ('actor', 'action', 'date')))
+             for a in bill['actions']])
+        for table in ('versions', 'documents'):
+            db.executemany(
+                "INSERT INTO %s VALUES (?, ?, ?, ?)" % table,
+                [(id, v['name'], v['url'], self._extra(v, ('name', 'url')))
+                 for v in bill[table]])
+        db.executemany(
+            "INSERT INTO sources VALUES (?, ?, ?)",
+            [(id, s['url'], self._extra(s, ('url',)))
+             for s in bill['sources']])
+
+        for vote in bill['votes']:
+            cursor = db.execute(
+                "INSERT INTO votes (bill, chamber, date, motion, passed, "
+                "yes_count, no_count, other_count, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (id, vote['chamber'], self._value(vote['date']),
+                 vote['motion'], vote['passed'], vote['yes_count'],
+                 vote['no_count'], vote['other_count'],
+                 self._extra(vote, ('chamber', 'date', 'motion', 'passed',
+                                    'yes_count', 'no_count', 'other_count',
+                                    'yes_votes', 'no_votes',
+                                    'other_votes'))))
+            vote_id = cursor.lastrowid
+            for type in ('yes', 'no', 'other'):
+                db.executemany(
+                    "INSERT INTO vote_records VALUES (?, ?, ?, ?)",
+                    [(vote_id, type, r['name'], self._leg_id(r['leg_id']))
+                     for r in vote['%s_votes' % type]])
+
+    def save_legislator(self, legislator):
+        standard = ('state', 'session', 'chamber', 'district', 'full_name',
+                    'first_name', 'last_name', 'middle_name', 'party')
+        with self._conn() as db:
+            db.execute("INSERT OR REPLACE INTO legislators VALUES "
+                       "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       tuple(legislator[k] for k in standard) +
+                       (self._leg_id([legislator['session'],
+                                      legislator['chamber'],
+                                      legislator['district'],
+                                      legislator['full_name']]),
+                        self._extra(legislator, ('type',) + standard)))
+
+    def save_metadata(self, metadata):
+        db = self._conn()
+        db.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+                   (metadata['state'], json.dumps(metadata,
+                                                  cls=self.encoder)))
+        db.commit()
+
+    def close(self):
+        if self._db is not None and self._pid == os.getpid():
+            self._db.commit()
+
+
+OUTPUT_FORMATS = {
+    'files': FileOutput,
+    'jsonl': JSONLinesOutput,
+    'sqlite': SQLiteOutput,
+}
+
+
+def open_output(format, output_dir, encoder):
+    """
+    Create the output backend named `format` writing to `output_dir`,
+    serializing objects with the JSONEncoder class `encoder`.
+    """
+    try:
+        cls = OUTPUT_FORMATS[format]
+    except KeyError:
+        raise ValueError('Unknown output format: %s' % format)
+    return cls(output_dir, encoder)
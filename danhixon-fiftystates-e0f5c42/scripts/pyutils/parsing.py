@@ -0,0 +1,561 @@
+"""
+HTML parsers for :meth:`pyutils.legislation.LegislationScraper.parse_html`.
+
+Three parsers are available, all returning a tree with the BeautifulSoup 3
+search API scrapers are written against:
+
+  * ``soup``: BeautifulSoup 3 (the default)
+  * ``html5lib``: html5lib building a BeautifulSoup tree, which copes
+    with badly broken markup but is the slowest of the three
+  * ``lxml``: lxml.html wrapped in :class:`Tag` objects, several times
+    faster than either
+
+The lxml tree supports the parts of BeautifulSoup 3 the scrapers use:
+``find``/``findAll`` (and calling a tag), ``findNext``/``findAllNext``,
+``findPrevious``/``findAllPrevious``, ``findNextSibling(s)``,
+``findPreviousSibling(s)``, ``findParent(s)``, ``findChild(ren)``,
+``contents``, ``string``, ``parent``, ``nextSibling``,
+``previousSibling``, ``tag['attr']``, ``tag.get``, ``tag.attrs``,
+``tag.td`` shortcuts, ``getText``/``text`` and ``renderContents``.
+Tag names, attribute dicts, regular expressions, lists, True and
+callables all work as search criteria.
+
+There are two differences to keep in mind when switching a scraper to
+lxml: entities are decoded (``&nbsp;`` becomes ``u'\\xa0'`` rather than
+staying ``'&nbsp;'``), and the document always has ``html`` and ``body``
+elements, even if the page left them out.
+"""
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+try:
+    import html5lib
+except ImportError:
+    html5lib = None
+from BeautifulSoup import BeautifulSoup
+
+
+def _is_element(el):
+    # comments and processing instructions have a function as their tag
+    return isinstance(el.tag, basestring)
+
+
+def _wrap(el):
+    if el is None:
+        return None
+    if _is_element(el):
+        return Tag(el)
+    return Comment(el.text or u'', el, False)
+
+
+def _next_sibling(el):
+    if el.tail:
+        return Text(el.tail, el, True)
+    return _wrap(el.getnext())
+
+
+def _previous_sibling(el):
+    prev = el.getprevious()
+    if prev is None:
+        parent = el.getparent()
+        if parent is not None and parent.text:
+            return Text(parent.text, parent, False)
+        return None
+    if prev.tail:
+        return Text(prev.tail, prev, True)
+    return _wrap(prev)
+
+
+def _matches(value, criterion):
+    """
+    BeautifulSoup's rules for matching a tag name, attribute value or
+    string against a search criterion.
+    """
+    if criterion is True:
+        return value is not None
+    if criterion is None:
+        return value is None
+    if value is None:
+        return False
+    if callable(criterion):
+        return criterion(value)
+    if hasattr(criterion, 'search'):
+        return criterion.search(value) is not None
+    if isinstance(criterion, basestring):
+        return value == criterion
+    if hasattr(criterion, '__iter__'):
+        return value in criterion
+    return value == criterion
+
+
+class _Node(object):
+    """
+    The navigation methods shared by tags and strings.
+    """
+
+    def _search(self, nodes, name, attrs, text, limit, kwargs):
+        # like BeautifulSoup, searching for text ignores name and attrs
+        # and returns the matching strings
+        if isinstance(attrs, basestring):
+            kwargs['class'] = attrs
+            attrs = None
+        if isinstance(name, dict):
+            attrs, name = name, None
+        attrs = dict(attrs or {}, **kwargs)
+
+        found = []
+        for node in nodes:
+            if text:
+                if not isinstance(node, Text) or not _matches(node, text):
+                    continue
+            elif not isinstance(node, Tag) or not node._match(name, attrs):
+                continue
+            found.append(node)
+            if limit and len(found) >= limit:
+                break
+        return ResultSet(found)
+
+    def _first(self, nodes, name, attrs, text, kwargs):
+        found = self._search(nodes, name, attrs, text, 1, kwargs)
+        if found:
+            return found[0]
+        return None
+
+    def _nodes(self, xpath):
+        if isinstance(self, Text):
+            el = self._owner
+        else:
+            el = self._el
+        for result in el.xpath(xpath):
+            if isinstance(result, basestring):
+                yield Text(result, result.getparent(), result.is_tail)
+            else:
+                yield _wrap(result)
+
+    def _reversed(self, xpath):
+        nodes = list(self._nodes(xpath))
+        nodes.reverse()
+        return nodes
+
+    def _siblings(self, attr):
+        node = getattr(self, attr)
+        while node is not None:
+            yield node
+            node = getattr(node, attr)
+
+    def _parents(self):
+        node = self.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def findNext(self, name=None, attrs={}, text=None, **kwargs):
+        return self._first(self._following(), name, attrs, text, kwargs)
+
+    def findAllNext(self, name=None, attrs={}, text=None, limit=None,
+                    **kwargs):
+        return self._search(self._following(), name, attrs, text, limit,
+                            kwargs)
+
+    def findPrevious(self, name=None, attrs={}, text=None, **kwargs):
+        return self._first(self._preceding(), name, attrs, text, kwargs)
+
+    def findAllPrevious(self, name=None, attrs={}, text=None, limit=None,
+                        **kwargs):
+        return self._search(self._preceding(), name, attrs, text, limit,
+                            kwargs)
+
+    def findNextSibling(self, name=None, attrs={}, text=None, **kwargs):
+        return self._first(self._siblings('nextSibling'), name, attrs, text,
+                           kwargs)
+
+    def findNextSiblings(self, name=None, attrs={}, text=None, limit=None,
+                         **kwargs):
+        return self._search(self._siblings('nextSibling'), name, attrs,
+                            text, limit, kwargs)
+
+    def findPreviousSibling(self, name=None, attrs={}, text=None, **kwargs):
+        return self._first(self._siblings('previousSibling'), name, attrs,
+                           text, kwargs)
+
+    def findPreviousSiblings(self, name=None, attrs={}, text=None,
+                             limit=None, **kwargs):
+        return self._search(self._siblings('previousSibling'), name, attrs,
+                            text, limit, kwargs)
+
+    def findParent(self, name=None, attrs={}, **kwargs):
+        return self._first(self._parents(), name, attrs, None, kwargs)
+
+    def findParents(self, name=None, attrs={}, limit=None, **kwargs):
+        return self._search(self._parents(), name, attrs, None, limit,
+                            kwargs)
+
+    @property
+    def next(self):
+        for node in self._following():
+            return node
+        return None
+
+    @property
+    def previous(self):
+        for node in self._preceding():
+            return node
+        return None
+
+
+class Text(unicode, _Node):
+    """
+    A string in the document, like BeautifulSoup's ``NavigableString``.
+    It knows where it is in the tree: `_owner` is the element whose
+    ``text`` it is, or whose ``tail`` it is if `_tail` is set.
+    """
+
+    def __new__(cls, value, owner, tail):
+        text = unicode.__new__(cls, value)
+        text._owner = owner
+        text._tail = tail
+        return text
+
+    @property
+    def parent(self):
+        if self._tail:
+            return _wrap(self._owner.getparent())
+        return Tag(self._owner)
+
+    @property
+    def string(self):
+        return self
+
+    @property
+    def nextSibling(self):
+        if self._tail:
+            return _wrap(self._owner.getnext())
+        if len(self._owner):
+            return _wrap(self._owner[0])
+        return None
+
+    @property
+    def previousSibling(self):
+        if self._tail:
+            return _wrap(self._owner)
+        return None
+
+    def _following(self):
+        if self._tail:
+            nodes = self._nodes('following::node()')
+        else:
+            nodes = self._nodes('descendant::node() | following::node()')
+        # the first node is this string itself
+        nodes.next()
+        return nodes
+
+    def _preceding(self):
+        if self._tail:
+            return self._reversed('preceding::node() | ancestor::* | '
+                                  'descendant-or-self::node()')
+        return self._reversed('preceding::node() | ancestor-or-self::*')
+
+
+class Comment(Text):
+    """
+    A comment, like BeautifulSoup's ``Comment``.
+    """
+
+    @property
+    def nextSibling(self):
+        return _next_sibling(self._owner)
+
+    @property
+    def previousSibling(self):
+        return _previous_sibling(self._owner)
+
+    @property
+    def parent(self):
+        return _wrap(self._owner.getparent())
+
+    def _following(self):
+        return self._nodes('following::node()')
+
+    def _preceding(self):
+        return self._reversed('preceding::node() | ancestor::*')
+
+
+class ResultSet(list):
+    pass
+
+
+class Tag(_Node):
+    """
+    An lxml element with BeautifulSoup 3's interface.
+    """
+    __slots__ = ('_el',)
+
+    def __init__(self, el):
+        self._el = el
+
+    def __eq__(self, other):
+        return isinstance(other, Tag) and other._el is self._el
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._el)
+
+    @property
+    def name(self):
+        return self._el.tag
+
+    @property
+    def attrs(self):
+        return self._el.attrib.items()
+
+    def get(self, key, default=None):
+        return self._el.get(key, default)
+
+    def has_key(self, key):
+        return key in self._el.attrib
+
+    def __getitem__(self, key):
+        return self._el.attrib[key]
+
+    def __contains__(self, node):
+        return node in self.contents
+
+    def __iter__(self):
+        return iter(self.contents)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def __nonzero__(self):
+        return True
+
+    def __getattr__(self, name):
+        # soup.table is soup.find('table'), as is soup.tableTag
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if len(name) > 3 and name.endswith('Tag'):
+            name = name[:-3]
+        return self.find(name)
+
+    def _match(self, name, attrs):
+        if name is not None and name is not True:
+            if callable(name) and not hasattr(name, 'search'):
+                if not name(self):
+                    return False
+            elif not _matches(self._el.tag, name):
+                return False
+        get = self._el.get
+        for key, criterion in attrs.iteritems():
+            if not _matches(get(key), criterion):
+                return False
+        return True
+
+    def _elements(self, name, recursive):
+        if recursive:
+            iterator = self._el.iterdescendants
+        else:
+            iterator = self._el.iterchildren
+        if isinstance(name, basestring):
+            # let lxml do the filtering by tag name
+            return (Tag(el) for el in iterator(name))
+        return (Tag(el) for el in iterator() if _is_element(el))
+
+    def _strings(self, recursive):
+        if recursive:
+            return self._nodes('descendant::text() | descendant::comment()')
+        return self._nodes('text() | comment()')
+
+    def findAll(self, name=None, attrs={}, recursive=True, text=None,
+                limit=None, **kwargs):
+        if text:
+            nodes = self._strings(recursive)
+        else:
+            nodes = self._elements(name, recursive)
+        return self._search(nodes, name, attrs, text, limit, kwargs)
+
+    def find(self, name=None, attrs={}, recursive=True, text=None,
+             **kwargs):
+        found = self.findAll(name, attrs, recursive, text, 1, **kwargs)
+        if found:
+            return found[0]
+        return None
+
+    __call__ = findAll
+    first = find
+    fetch = findAll
+
+    def findChild(self, name=None, attrs={}, **kwargs):
+        return self.find(name, attrs, recursive=False, **kwargs)
+
+    def findChildren(self, name=None, attrs={}, limit=None, **kwargs):
+        return self.findAll(name, attrs, recursive=False, limit=limit,
+                            **kwargs)
+
+    @property
+    def contents(self):
+        el = self._el
+        contents = []
+        if el.text:
+            contents.append(Text(el.text, el, False))
+        for child in el:
+            contents.append(_wrap(child))
+            if child.tail:
+                contents.append(Text(child.tail, child, True))
+        return contents
+
+    @property
+    def string(self):
+        contents = self.contents
+        if len(contents) != 1:
+            return None
+        if isinstance(contents[0], Tag):
+            return contents[0].string
+        return contents[0]
+
+    @property
+    def parent(self):
+        return _wrap(self._el.getparent())
+
+    @property
+    def nextSibling(self):
+        return _next_sibling(self._el)
+
+    @property
+    def previousSibling(self):
+        return _previous_sibling(self._el)
+
+    def _following(self):
+        return self._nodes('descendant::node() | following::node()')
+
+    def _preceding(self):
+        return self._reversed('preceding::node() | ancestor::*')
+
+    def getText(self, separator=u''):
+        return separator.join([text.strip()
+                               for text in self.findAll(text=True)])
+
+    text = property(getText)
+
+    def renderContents(self, encoding='utf-8'):
+        el = self._el
+        parts = [el.text or u'']
+        for child in el:
+            parts.append(lxml.html.tostring(child, encoding=unicode))
+        contents = u''.join(parts)
+        if encoding:
+            return contents.encode(encoding)
+        return contents
+
+    def __unicode__(self):
+        return lxml.html.tostring(self._el, encoding=unicode,
+                                  with_tail=False)
+
+    def __str__(self):
+        return unicode(self).encode('utf-8')
+
+    def __repr__(self):
+        return str(self)
+
+    prettify = __str__
+
+
+class Document(Tag):
+    """
+    The top of a parsed document, like the ``BeautifulSoup`` object
+    itself: its only child is the ``html`` element.
+    """
+    __slots__ = ()
+
+    name = '[document]'
+    parent = None
+    nextSibling = None
+    previousSibling = None
+
+    @property
+    def contents(self):
+        return [Tag(self._el)]
+
+    def _elements(self, name, recursive):
+        root = self._el
+        if not recursive:
+            return iter([Tag(root)])
+        if isinstance(name, basestring):
+            return (Tag(el) for el in root.iter(name))
+        return (Tag(el) for el in root.iter() if _is_element(el))
+
+    def _strings(self, recursive):
+        return self._nodes('descendant-or-self::text() | '
+                           'descendant-or-self::comment()')
+
+    def _following(self):
+        return self._nodes('descendant-or-self::node()')
+
+    def _preceding(self):
+        return []
+
+    def _match(self, name, attrs):
+        return False
+
+    def __unicode__(self):
+        return lxml.html.tostring(self._el, encoding=unicode)
+
+
+def parse_lxml(data):
+    """
+    Parse `data` with lxml.html, returning a :class:`Document`.
+    """
+    if isinstance(data, unicode):
+        # lxml refuses unicode with an XML encoding declaration
+        data = data.encode('utf-8')
+    if not data.strip():
+        data = '<html></html>'
+    return Document(lxml.html.document_fromstring(data))
+
+
+def parse_soup(data):
+    return BeautifulSoup(data)
+
+
+_html5lib_parser = None
+
+
+def parse_html5lib(data):
+    global _html5lib_parser
+    if _html5lib_parser is None:
+        _html5lib_parser = html5lib.HTMLParser(
+            tree=html5lib.treebuilders.getTreeBuilder('beautifulsoup'))
+    return _html5lib_parser.parse(data)
+
+
+PARSERS = {
+    'soup': parse_soup,
+    'html5lib': parse_html5lib,
+    'lxml': parse_lxml,
+}
+
+
+def available_parsers():
+    """
+    The names of the parsers whose libraries are installed.
+    """
+    names = ['soup']
+    if html5lib is not None:
+        names.append('html5lib')
+    if lxml is not None:
+        names.append('lxml')
+    return names
+
+
+def parse_html(data, parser='soup'):
+    """
+    Parse the page `data` with the parser named `parser` ('soup',
+    'html5lib' or 'lxml').
+    """
+    if parser not in PARSERS:
+        raise ValueError('Unknown HTML parser: %s' % parser)
+    if parser not in available_parsers():
+        raise ValueError('The %s parser is not installed' % parser)
+    return PARSERS[parser](data)
@@ -0,0 +1,162 @@
+"""
+Per-host request throttling for
+:class:`pyutils.legislation.LegislationScraper` (``--sleep``).
+
+Each host gets a token bucket refilled at its current request rate. The
+rate adapts to the server: every quick, successful response raises it a
+little (up to `max_rate`), while a slow response or a 429 Too Many
+Requests / 503 Service Unavailable cuts it by the `backoff` factor (down
+to `min_rate`). A ``Retry-After`` header on such a response stops all
+requests to the host until it has passed.
+
+A scraper sets its state's budget with the `politeness` class attribute,
+whose entries override the keyword arguments of :class:`Throttle`::
+
+    class NYLegislationScraper(LegislationScraper):
+        politeness = {'rate': 0.5, 'max_rate': 2}
+"""
+import time
+import threading
+import urlparse
+import email.utils
+
+BUSY_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """
+    Return the number of seconds a ``Retry-After`` header value asks the
+    client to wait (it may be either seconds or an HTTP date), or None if
+    it can't be parsed.
+
+    >>> parse_retry_after('120')
+    120.0
+    >>> parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', now=1445412470)
+    10.0
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    date = email.utils.parsedate_tz(value)
+    if date is None:
+        return None
+    if now is None:
+        now = time.time()
+    return max(0.0, float(email.utils.mktime_tz(date) - now))
+
+
+class _Bucket(object):
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = now
+        self.blocked_until = 0
+
+
+class Throttle(object):
+    """
+    Token buckets for every host a scraper requests pages from. Safe to
+    share between threads.
+
+    `rate` is the starting number of requests per second to each host and
+    `burst` the number that may be made back to back after a quiet spell.
+    A response taking longer than `slow_response` seconds counts as a
+    sign of an overloaded server, as do 429 and 503 responses. Retry-After
+    waits are capped at `max_retry_after` seconds.
+    """
+
+    def __init__(self, rate=1.0, burst=2, min_rate=0.1, max_rate=5.0,
+                 increase=0.1, backoff=0.5, slow_response=5.0,
+                 max_retry_after=300, clock=time.time, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.backoff = backoff
+        self.slow_response = slow_response
+        self.max_retry_after = max_retry_after
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url, now):
+        host = urlparse.urlparse(url)[1].lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.rate, self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens +
+                                (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+        return bucket
+
+    def delay(self, url):
+        """
+        Take a token from `url`'s host and return the number of seconds
+        the caller must wait before making its request.
+        """
+        self._lock.acquire()
+        try:
+            now = self._clock()
+            bucket = self._bucket(url, now)
+            # tokens may go negative: each waiting request reserves the
+            # next token, so concurrent callers queue up behind each other
+            bucket.tokens -= 1
+            delay = 0.0
+            if bucket.tokens < 0:
+                delay = -bucket.tokens / bucket.rate
+            return max(delay, bucket.blocked_until - now)
+        finally:
+            self._lock.release()
+
+    def wait(self, url):
+        """
+        Block until a request to `url` is allowed; returns the number of
+        seconds waited.
+        """
+        delay = self.delay(url)
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+    def record(self, url, latency, status=200, retry_after=None):
+        """
+        Adapt the rate for `url`'s host to a response that took `latency`
+        seconds and had HTTP `status` (and possibly a ``Retry-After``
+        header). Returns the host's new rate.
+        """
+        self._lock.acquire()
+        try:
+            now = self._clock()
+            bucket = self._bucket(url, now)
+            if status in BUSY_STATUSES or latency > self.slow_response:
+                bucket.rate = max(self.min_rate, bucket.rate * self.backoff)
+                bucket.tokens = min(bucket.tokens, 0)
+            elif status < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+            if status in BUSY_STATUSES:
+                wait = parse_retry_after(retry_after, now)
+                if wait is not None:
+                    wait = min(wait, self.max_retry_after)
+                    bucket.blocked_until = max(bucket.blocked_until,
+                                               now + wait)
+            return bucket.rate
+        finally:
+            self._lock.release()
+
+    def host_rate(self, url):
+        """
+        The current request rate for `url`'s host.
+        """
+        self._lock.acquire()
+        try:
+            return self._bucket(url, self._clock()).rate
+        finally:
+            self._lock.release()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""
+Run several states' Python scrapers at once.
+
+Every ``[a-z][a-z]/get_legislation.py`` next to this script is a candidate
+(the same layout ``status_report.py`` reads STATUS files from). Each state
+runs as its own process, at most ``--workers`` at a time, and a summary of
+exit status, run time and bill/legislator counts is printed at the end.
+
+Run it from the top level of the fiftystates directory, like a single
+scraper, so data ends up in ``./data/<state>``::
+
+    python ./scripts/run_scrapers.py -y 2009 --workers 8
+    python ./scripts/run_scrapers.py --config nightly.cfg --states pa,ut
+
+Years and chambers can be set per state with a config file::
+
+    [DEFAULT]
+    years = 2009
+
+    [pa]
+    years = 2007 2009
+    chambers = upper
+    args = --sleep
+
+Anything after ``--`` on the command line is passed to every scraper.
+"""
+import glob
+import os
+import sys
+import time
+import subprocess
+import ConfigParser
+import multiprocessing
+from optparse import make_option, OptionParser
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+option_list = (
+    make_option('-y', '--year', action='append', dest='years',
+                help='year(s) to scrape'),
+    make_option('--all', action='store_true', dest='all_years',
+                default=False, help='scrape all data (overrides --year)'),
+    make_option('--upper', action='store_true', dest='upper',
+                default=False, help='scrape upper chamber'),
+    make_option('--lower', action='store_true', dest='lower',
+                default=False, help='scrape lower chamber'),
+    make_option('--states', action='store', dest='states',
+                help='comma separated list of states to run (default: all)'),
+    make_option('--exclude', action='store', dest='exclude', default='',
+                help='comma separated list of states to skip'),
+    make_option('-w', '--workers', action='store', type='int',
+                dest='workers', default=multiprocessing.cpu_count(),
+                help='number of states to run at once'),
+    make_option('-c', '--config', action='store', dest='config',
+                help='config file with per-state years, chambers and args'),
+    make_option('-l', '--log_dir', action='store', dest='log_dir',
+                default='logs', help='directory for per-state output logs'),
+    make_option('-d', '--data_dir', action='store', dest='data_dir',
+                default=os.path.join(os.path.curdir, 'data'),
+                help='directory holding each state\'s output'),
+)
+
+
+def find_scrapers():
+    """
+    Return a dict mapping state abbreviations to their Python scraper.
+    """
+    scrapers = {}
+    pattern = os.path.join(SCRIPTS_DIR, '[a-z][a-z]', 'get_legislation.py')
+    for path in glob.glob(pattern):
+        scrapers[os.path.basename(os.path.dirname(path))] = path
+    return scrapers
+
+
+def count_files(path):
+    try:
+        return len(os.listdir(path))
+    except OSError:
+        return 0
+
+
+def run_state(job):
+    """
+    Run one state's scraper to completion. Executed in a pool worker.
+    """
+    state, path, args, log_dir, data_dir = job
+    log_path = os.path.join(log_dir, '%s.log' % state)
+    output_dir = os.path.join(data_dir, state)
+
+    start = time.time()
+    log = open(log_path, 'w')
+    try:
+        status = subprocess.call([sys.executable, path, '-d', output_dir] +
+                                 args, stdout=log, stderr=subprocess.STDOUT)
+    finally:
+        log.close()
+
+    return {'state': state,
+            'status': status,
+            'seconds': time.time() - start,
+            'bills': count_files(os.path.join(output_dir, 'bills')),
+            'legislators': count_files(os.path.join(output_dir,
+                                                    'legislators')),
+            'log': log_path}
+
+
+def state_args(state, options, config, extra):
+    """
+    Build the command line for one state's scraper.
+    """
+    def get(key):
+        if config.has_option(state, key):
+            return config.get(state, key).split()
+        if config.has_option('DEFAULT', key):
+            return config.get('DEFAULT', key).split()
+        return None
+
+    args = []
+
+    years = get('years')
+    if options.all_years or years == ['all']:
+        args.append('--all')
+    else:
+        for year in years or options.years or []:
+            args.extend(['--year', year])
+
+    chambers = get('chambers')
+    if chambers is None:
+        chambers = []
+        if options.upper:
+            chambers.append('upper')
+        if options.lower:
+            chambers.append('lower')
+    for chamber in chambers:
+        args.append('--%s' % chamber)
+
+    return args + (get('args') or []) + extra
+
+
+def main():
+    parser = OptionParser(option_list=option_list,
+                          usage='%prog [options] [-- scraper options]')
+    options, extra = parser.parse_args()
+
+    config = ConfigParser.SafeConfigParser()
+    if options.config:
+        if not config.read(options.config):
+            parser.error("Can't read config file %s" % options.config)
+
+    scrapers = find_scrapers()
+    if options.states:
+        states = options.states.split(',')
+        for state in states:
+            if state not in scrapers:
+                parser.error('No Python scraper for %s' % state)
+    elif config.sections():
+        states = config.sections()
+    else:
+        states = sorted(scrapers.keys())
+    states = [state for state in states
+              if state not in options.exclude.split(',')]
+
+    jobs = []
+    for state in states:
+        args = state_args(state, options, config, extra)
+        if '--all' not in args and '--year' not in args:
+            parser.error("You must provide a --year YYYY or --all (all "
+                         "years) option, or years for %s in the config file"
+                         % state)
+        jobs.append((state, scrapers[state], args, options.log_dir,
+                     options.data_dir))
+
+    if not os.path.isdir(options.log_dir):
+        os.makedirs(options.log_dir)
+
+    start = time.time()
+    pool = multiprocessing.Pool(max(1, options.workers))
+    results = []
+    for result in pool.imap_unordered(run_state, jobs):
+        print >> sys.stderr, "%s finished in %.0fs (exit status %d)" % (
+            result['state'], result['seconds'], result['status'])
+        results.append(result)
+    pool.close()
+    pool.join()
+
+    print '%-6s %6s %9s %7s %12s' % ('state', 'status', 'seconds', 'bills',
+                                    'legislators')
+    failed = 0
+    for result in sorted(results, key=lambda r: r['state']):
+        print '%-6s %6d %9.0f %7d %12d' % (
+            result['state'], result['status'], result['seconds'],
+            result['bills'], result['legislators'])
+        if result['status'] != 0:
+            failed += 1
+            print '       see %s' % result['log']
+    print '%d states, %d failed, %.0fs total' % (len(results), failed,
+                                                 time.time() - start)
+
+    return failed and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,7 +2,6 @@
 import urllib2
 import re
 import datetime as dt
-import html5lib
 
 # ugly hack
 import sys
@@ -12,8 +11,7 @@ from pyutils.legislation import *
 class SDLegislationScraper(LegislationScraper):
 
     state = 'sd'
-    soup_parser = html5lib.HTMLParser(
-        tree=html5lib.treebuilders.getTreeBuilder('beautifulsoup')).parse
+    html_parser = 'html5lib'
 
     metadata = {
         'state_name': 'South Dakota',
@@ -65,7 +63,7 @@ class SDLegislationScraper(LegislationScraper):
         session_url = 'http://legis.state.sd.us/sessions/%s/' % session
         bill_list_url = session_url + 'BillList.aspx'
         self.log('Getting bill list for %s %s' % (chamber, session))
-        bill_list = self.soup_parser(self.urlopen(bill_list_url))
+        bill_list = self.parse_html(self.urlopen(bill_list_url))
 
         # Format of bill link contents
         bill_re = re.compile(u'%s\xa0(\d+)' % bill_abbr)
@@ -87,7 +85,7 @@ class SDLegislationScraper(LegislationScraper):
 
             # Download history page
             hist_url = session_url + bill_link['href']
-            history = self.soup_parser(self.urlopen(hist_url))
+            history = self.parse_html(self.urlopen(hist_url))
 
             bill = Bill(session, chamber, bill_id, bill_name)
             bill.add_source(hist_url)
@@ -138,8 +136,9 @@ class SDLegislationScraper(LegislationScraper):
 
             self.add_bill(bill)
 
+    @memoize_parse
     def scrape_new_vote(self, url):
-        vote_page = self.soup_parser(self.urlopen(url))
+        vote_page = self.parse_html(self.urlopen(url))
 
         header = vote_page.find(id="ctl00_contentMain_hdVote").contents[0]
 
@@ -202,7 +201,7 @@ class SDLegislationScraper(LegislationScraper):
         self.log("Getting bill list for %s %s" % (chamber, session))
         #bill_list_raw = self.urlopen(bill_list_url)
         #bill_list_raw = bill_list_raw.replace('BORDER= ', '').replace('"</A>', '"></A>')
-        bill_list = self.soup_parser(self.urlopen(bill_list_url))
+        bill_list = self.parse_html(self.urlopen(bill_list_url))
 
         # Bill and text link formats
         bill_re = re.compile('%s (\d+)' % bill_abbr)
@@ -225,7 +224,7 @@ class SDLegislationScraper(LegislationScraper):
 
             # Get history page (replacing malformed tag)
             hist_url = session_url + bill_link['href']
-            history = self.soup_parser(self.urlopen(hist_url))
+            history = self.parse_html(self.urlopen(hist_url))
 
             # Get URL of latest verion of bill (should be listed last)
             bill_url = history.findAll('a', href=text_re)[-1]['href']
@@ -285,7 +284,7 @@ class SDLegislationScraper(LegislationScraper):
             self.add_bill(bill)
 
     def scrape_old_vote(self, url):
-        vote_page = self.soup_parser(self.urlopen(url))
+        vote_page = self.parse_html(self.urlopen(url))
 
         header = vote_page.h3.contents[0]
 
@@ -358,7 +357,7 @@ class SDLegislationScraper(LegislationScraper):
             search = 'House Members'
 
         leg_list_url = "http://legis.state.sd.us/sessions/%s/MemberMenu.aspx" % (session)
-        leg_list = self.soup_parser(self.urlopen(leg_list_url))
+        leg_list = self.parse_html(self.urlopen(leg_list_url))
 
         list_div = leg_list.find(text=search).findNext('div')
 
@@ -370,7 +369,7 @@ class SDLegislationScraper(LegislationScraper):
 
             leg_page_url = "http://legis.state.sd.us/sessions/%s/%s" % (
                 session, link['href'])
-            leg_page = self.soup_parser(self.urlopen(leg_page_url))
+            leg_page = self.parse_html(self.urlopen(leg_page_url))
 
             party = leg_page.find(
                 id="ctl00_contentMain_spanParty").contents[0].strip()
@@ -407,7 +406,7 @@ class SDLegislationScraper(LegislationScraper):
 
         leg_list_url = "http://legis.state.sd.us/sessions/%s/%s" % (
             session, filename)
-        leg_list = self.soup_parser(self.urlopen(leg_list_url))
+        leg_list = self.parse_html(self.urlopen(leg_list_url))
 
         for district_str in leg_list.findAll('h2'):
             district = district_str.contents[0].split(' ')[1].lstrip('0')
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.cache import *
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def checkBackend(self, cache):
+        url = 'http://www.legis.state.pa.us/bill?id=1'
+        assert url not in cache
+        assert cache.get(url) is None
+        cache.set(url, '<html>bill</html>', status=200)
+        assert url in cache
+        assert cache.get(url) == '<html>bill</html>'
+        info = cache.info(url)
+        assert info['url'] == url and info['size'] == 17
+        cache.close()
+
+    def testFileCache(self):
+        self.checkBackend(FileCache(self.path))
+
+    def testShardedCache(self):
+        self.checkBackend(ShardedCache(self.path))
+        key = cache_key('http://www.legis.state.pa.us/bill?id=1')
+        assert os.path.exists(os.path.join(self.path, key[0:2], key[2:4],
+                                           key + '.html'))
+
+        # the index survives reopening
+        cache = ShardedCache(self.path)
+        assert cache.info('http://www.legis.state.pa.us/bill?id=1')['status'] == 200
+
+    def testConcurrentWrites(self):
+        # --jobs workers caching the same page at once
+        import threading
+        cache = FileCache(self.path)
+        pages = ['<html>%s</html>' % (c * 100000) for c in 'abcd']
+        threads = [threading.Thread(target=cache.set,
+                                    args=('http://a.gov/', page))
+                   for page in pages * 5]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert cache.get('http://a.gov/') in pages
+        assert os.listdir(self.path) == [cache_key('http://a.gov/') + '.html']
+
+    def testShardInPlace(self):
+        FileCache(self.path).set('http://a.gov/', 'page')
+        main(['cache', 'shard', self.path])
+        assert ShardedCache(self.path).get('http://a.gov/') == 'page'
+        assert not [fn for fn in os.listdir(self.path) if fn.endswith('.html')]
+
+    def testCompressedEntries(self):
+        page = '<html>%s</html>' % ('<tr><td>Yea</td></tr>' * 200)
+        cache = ShardedCache(self.path, compress=True)
+        cache.set('http://a.gov/', page)
+        key = cache_key('http://a.gov/')
+        assert os.path.getsize(cache._filename(key)) < len(page)
+        assert cache.get('http://a.gov/') == page
+        # both backends report the size on disk
+        assert cache.info('http://a.gov/')['size'] == \
+            os.path.getsize(cache._filename(key))
+        cache.close()
+
+        # uncompressed readers still see the page
+        assert ShardedCache(self.path).get('http://a.gov/') == page
+
+    def testCompressInPlace(self):
+        page = '<html>%s</html>' % ('<p>Nay</p>' * 200)
+        FileCache(self.path).set('http://a.gov/', page)
+        n, saved = compress_in_place(FileCache(self.path))
+        assert n == 1 and saved > 0
+        assert compress_in_place(FileCache(self.path)) == (0, 0)
+        assert FileCache(self.path).get('http://a.gov/') == page
+        assert FileCache(self.path).info('http://a.gov/')['size'] < len(page)
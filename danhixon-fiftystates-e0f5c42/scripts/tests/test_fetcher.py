@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+import unittest
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.fetcher import ConcurrentFetcher
+
+class ConcurrentFetcherTest(unittest.TestCase):
+
+    def testFetchesEveryUrlOnce(self):
+        calls = []
+        def fetch(url):
+            calls.append(url)
+            return url.upper()
+
+        urls = ['http://a.gov/%d' % i for i in range(20)] + ['http://a.gov/1']
+        results = list(ConcurrentFetcher(fetch, threads=5).fetch(urls))
+        assert len(results) == 20, "Wrong number of results"
+        assert sorted(calls) == sorted(set(urls)), "Duplicate fetches"
+        for url, data, error in results:
+            assert data == url.upper() and error is None
+
+    def testPerHostLimit(self):
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+        def fetch(url):
+            lock.acquire()
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            lock.release()
+            time.sleep(0.01)
+            lock.acquire()
+            state['active'] -= 1
+            lock.release()
+            return ''
+
+        urls = ['http://a.gov/%d' % i for i in range(12)]
+        list(ConcurrentFetcher(fetch, threads=6, per_host=2).fetch(urls))
+        assert state['peak'] <= 2, "Too many concurrent requests: %d" % state['peak']
+
+    def testErrorsAreReturned(self):
+        def fetch(url):
+            raise IOError('boom')
+
+        [(url, data, error)] = list(ConcurrentFetcher(fetch).fetch(['http://a.gov/']))
+        assert data is None
+        assert error[0] is IOError
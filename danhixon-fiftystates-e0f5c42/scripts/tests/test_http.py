@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+import threading
+import cookielib
+import BaseHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyutils.http import build_opener
+
+class KeepAliveTest(unittest.TestCase):
+
+    def setUp(self):
+        connections = self.connections = []
+        self.drop_connections = False
+        test = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+                connections.append(self.client_address)
+
+            def respond(self, body):
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Set-Cookie', 'session=abc')
+                self.end_headers()
+                self.wfile.write(body)
+                if test.drop_connections:
+                    self.close_connection = 1
+
+            def do_GET(self):
+                self.respond('%s %s' % (self.path,
+                                        self.headers.getheader('Cookie')))
+
+            def do_POST(self):
+                length = int(self.headers.getheader('Content-Length'))
+                self.respond(self.rfile.read(length))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+        self.url = 'http://127.0.0.1:%d' % self.server.server_port
+        self.opener = build_opener(cookielib.CookieJar())
+
+    def tearDown(self):
+        self.opener.pool.close()
+        self.server.shutdown()
+
+    def testConnectionIsReused(self):
+        for i in range(3):
+            resp = self.opener.open('%s/bill/%d' % (self.url, i))
+            assert resp.code == 200
+            assert resp.read().startswith('/bill/%d ' % i)
+        assert len(self.connections) == 1
+        assert self.opener.pool.opened == 1
+
+    def testCookiesAreShared(self):
+        assert self.opener.open(self.url + '/').read() == '/ None'
+        assert self.opener.open(self.url + '/').read() == '/ session=abc'
+
+    def testPost(self):
+        assert self.opener.open(self.url + '/search', 'q=1').read() == 'q=1'
+        assert self.opener.open(self.url + '/search', 'q=2').read() == 'q=2'
+        assert len(self.connections) == 1
+
+    def testClosedConnectionIsReplaced(self):
+        self.drop_connections = True
+        assert self.opener.open(self.url + '/a').read().startswith('/a ')
+        assert self.opener.open(self.url + '/b').read().startswith('/b ')
+        assert len(self.connections) == 2
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
 import unittest
+import tempfile
+import shutil
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -20,4 +22,475 @@ class LegislationUtilsTest(unittest.TestCase):
         testDate = datetime.datetime(2009, 12, 01, 13, 14, 15, 0, )
         encoder = DateEncoder()
         timestamp = encoder.default(testDate)
-        assert str(timestamp) == "1259691255.0", "Bad Timestamp" + str(timestamp)
\ No newline at end of file
+        assert str(timestamp) == "1259691255.0", "Bad Timestamp" + str(timestamp)
+
+class NameMatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.legislators = [
+            ({'full_name': 'John A. Smith Jr.', 'first_name': 'John',
+              'last_name': 'Smith', 'middle_name': 'A'}, 'smith'),
+            ({'full_name': u'Jos\xe9 Mart\xednez', 'first_name': u'Jos\xe9',
+              'last_name': u'Mart\xednez', 'middle_name': ''}, 'martinez'),
+            ({'full_name': 'Ann Martin', 'first_name': 'Ann',
+              'last_name': 'Martin', 'middle_name': ''}, 'martin')]
+
+    def testNormalization(self):
+        nm = NameMatcher.build(self.legislators, fuzzy_threshold=None)
+        assert nm['SMITH, JOHN'] == 'smith'
+        assert nm['John A. Smith'] == 'smith'
+        assert nm['Smith, John Jr.'] == 'smith'
+        assert nm['Jose Martinez'] == 'martinez'
+        assert nm['Martinez'] == 'martinez'
+
+    def testFuzzyThreshold(self):
+        nm = NameMatcher.build(self.legislators, fuzzy_threshold=0.75)
+        assert nm['Smtih'] == 'smith'
+        assert nm['Martinex'] == 'martinez'
+        assert nm['Brown'] is None
+        assert NameMatcher.build(self.legislators)['Smtih'] is None
+
+    def testAmbiguousFormsStayAmbiguous(self):
+        nm = NameMatcher.build(self.legislators + [
+            ({'full_name': 'Jane Smith', 'first_name': 'Jane',
+              'last_name': 'Smith', 'middle_name': ''}, 'jane')])
+        assert nm['Smith'] is None
+        assert nm['Smith, J'] is None
+        assert nm['Jane Smith'] == 'jane'
+
+    def testSuffixesTellNamesakesApart(self):
+        nm = NameMatcher.build([
+            ({'full_name': 'Tom Smith Jr.', 'first_name': 'Tom',
+              'last_name': 'Smith Jr.', 'middle_name': ''}, 'junior'),
+            ({'full_name': 'Tom Smith Sr.', 'first_name': 'Tom',
+              'last_name': 'Smith Sr.', 'middle_name': ''}, 'senior')],
+            fuzzy_threshold=None)
+        assert nm['Smith Jr.'] == 'junior'
+        assert nm['Smith, Tom Sr'] == 'senior'
+        assert nm['Smith'] is None
+        # a suffix no one has is dropped
+        assert NameMatcher.build(self.legislators)['Martin III'] == 'martin'
+
+    def testMemoClearedOnInsert(self):
+        nm = NameMatcher()
+        assert nm['Martin'] is None
+        nm[self.legislators[2][0]] = 'martin'
+        assert nm['Martin'] == 'martin'
+
+class CachingScraperTest(unittest.TestCase):
+
+    def setUp(self):
+        import threading, BaseHTTPServer
+
+        self.dir = tempfile.mkdtemp()
+        requests = self.requests = []
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                requests.append(self.headers.getheader('If-None-Match'))
+                if self.headers.getheader('If-None-Match') == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', '"v1"')
+                self.end_headers()
+                self.wfile.write('<html>bill</html>')
+            def do_POST(self):
+                body = self.rfile.read(
+                    int(self.headers.getheader('Content-Length')))
+                requests.append(body)
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write('<html>%s</html>' % body)
+            def log_message(self, *args):
+                pass
+
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+        self.url = 'http://127.0.0.1:%d/bill' % self.server.server_port
+
+        class Scraper(LegislationScraper):
+            state = 'zz'
+            cache_backend = 'sharded'
+        self.scraper = Scraper()
+        self.scraper.cache_dir = os.path.join(self.dir, 'cache')
+
+    def tearDown(self):
+        self.server.shutdown()
+        shutil.rmtree(self.dir)
+
+    def testFreshPagesComeFromCache(self):
+        assert self.scraper.urlopen(self.url) == '<html>bill</html>'
+        assert self.scraper.urlopen(self.url) == '<html>bill</html>'
+        assert self.requests == [None]
+
+    def testExpiredPagesAreRevalidated(self):
+        self.scraper.cache_ttl = (('/bill$', 0),)
+        assert self.scraper.urlopen(self.url) == '<html>bill</html>'
+        assert self.scraper.urlopen(self.url) == '<html>bill</html>'
+        assert self.requests == [None, '"v1"']
+
+    def testOfflineModeReadsOnlyTheCache(self):
+        misses = os.path.join(self.dir, 'misses.txt')
+        self.scraper.cache_ttl = (('/bill$', 0),)
+        self.scraper.urlopen(self.url)
+
+        self.scraper.offline = True
+        self.scraper.record_misses = misses
+        assert self.scraper.urlopen(self.url) == '<html>bill</html>'
+        self.assertRaises(CacheMiss, self.scraper.urlopen, self.url + '/2')
+        self.scraper.prefetch([self.url, self.url + '/2', self.url + '/3'])
+        assert self.requests == [None]
+        assert open(misses).read().split() == [self.url + '/2',
+                                               self.url + '/3']
+
+        self.scraper.offline = False
+        self.scraper.fetch_urls(misses)
+        assert len(self.requests) == 3
+        self.scraper.offline = True
+        assert self.scraper.urlopen(self.url + '/3') == '<html>bill</html>'
+
+    def testPostResponsesAreCached(self):
+        self.scraper.cache_ttl = (('/bill#POST:', None),)
+        assert self.scraper.urlopen(self.url, 'q=1') == '<html>q=1</html>'
+        assert self.scraper.urlopen(self.url, 'q=2') == '<html>q=2</html>'
+        assert self.scraper.urlopen(self.url, 'q=1') == '<html>q=1</html>'
+        assert self.requests == ['q=1', 'q=2']
+
+        self.scraper.offline = True
+        assert self.scraper.urlopen(self.url, 'q=2') == '<html>q=2</html>'
+        self.assertRaises(CacheMiss, self.scraper.urlopen, self.url, 'q=3')
+
+    def testExpiredPostsAreSentAgain(self):
+        assert self.scraper.urlopen(self.url, 'q=1') == '<html>q=1</html>'
+        assert self.scraper.urlopen(self.url, 'q=1') == '<html>q=1</html>'
+        assert self.requests == ['q=1', 'q=1']
+
+        self.scraper.offline = True
+        assert self.scraper.urlopen(self.url, 'q=1') == '<html>q=1</html>'
+        assert self.requests == ['q=1', 'q=1']
+
+class IncrementalScraperTest(unittest.TestCase):
+
+    def setUp(self):
+        from pyutils.incremental import BillManifest
+
+        class Scraper(LegislationScraper):
+            state = 'zz'
+            no_cache = True
+            incremental = True
+
+            def scrape_bills(self, chamber, year):
+                if self.bill_unchanged('2009', chamber, 'HB 1'):
+                    return
+                bill = Bill('2009', chamber, 'HB 1', 'A bill')
+                self.urlopen(self.page_url)
+                bill.add_source(self.page_url)
+                self.add_bill(bill)
+
+        self.dir = tempfile.mkdtemp()
+        self.page = os.path.join(self.dir, 'page.html')
+        open(self.page, 'w').write('<html>v1</html>')
+
+        self.scraper = Scraper()
+        self.scraper.page_url = 'file://' + self.page
+        self.scraper.output_dir = self.dir
+        self.scraper.init_dirs()
+        self.scraper.matcher = {'upper': NameMatcher(), 'lower': NameMatcher()}
+        self.scraper.manifest = BillManifest(os.path.join(self.dir, 'm.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testUnchangedBillsAreSkipped(self):
+        self.scraper.scrape_bills('lower', '2009')
+        assert self.scraper.manifest.skipped == 0
+        self.scraper.scrape_bills('lower', '2009')
+        assert self.scraper.manifest.skipped == 1
+
+        open(self.page, 'w').write('<html>v2</html>')
+        self.scraper.scrape_bills('lower', '2009')
+        assert self.scraper.manifest.skipped == 1
+
+class FakeScraper(LegislationScraper):
+    state = 'zz'
+    earliest_year = 2007
+
+    def scrape_legislators(self, chamber, year):
+        if year == '2008' or int(year) > 2009:
+            raise NoDataForYear(year)
+        for name in ('Ann Smith', 'Bob Jones'):
+            first, last = name.split()
+            self.add_legislator(Legislator(year, chamber, '1', name, first,
+                                           last, '', 'Democrat'))
+
+    def scrape_bills(self, chamber, year):
+        bill = Bill(year, chamber, 'HB 1', 'A bill')
+        bill.add_sponsor('primary', 'Smith', chamber='upper')
+        vote = Vote(chamber, None, 'Passage', True, 1, 1, 0)
+        vote.yes('Jones')
+        vote.no('Ann Smith')
+        bill.add_vote(vote)
+        yield bill
+
+
+class RollCallTest(unittest.TestCase):
+
+    def testSerializesLikeAList(self):
+        vote = Vote('lower', datetime.datetime(2009, 3, 1), 'Passage', True,
+                    2, 1, 0)
+        vote.yes('Smith')
+        vote.yes(u'Mart\xednez')
+        vote.no('Smith')
+        assert vote['yes_votes'] == ['Smith', u'Mart\xednez']
+        assert len(vote['no_votes']) == 1 and vote['no_votes'][0] == 'Smith'
+
+        expected = dict(vote, yes_votes=['Smith', u'Mart\xednez'],
+                        no_votes=['Smith'], other_votes=[])
+        assert (json.loads(json.dumps(vote, cls=DateEncoder)) ==
+                json.loads(json.dumps(expected, cls=DateEncoder)))
+
+    def testPickle(self):
+        import pickle
+        roll_call = RollCall(['Jones', 'Smith'])
+        assert pickle.loads(pickle.dumps(roll_call)) == ['Jones', 'Smith']
+
+    def testStoresPlainStrings(self):
+        from BeautifulSoup import BeautifulSoup
+        name = BeautifulSoup('<td>Kowalski</td>').td.contents[0]
+        roll_call = RollCall()
+        roll_call.append(name)
+        assert type(roll_call[0]) is unicode
+        assert roll_call[0] == u'Kowalski'
+
+class VoterResolutionTest(unittest.TestCase):
+
+    def setUp(self):
+        class Output(object):
+            def save_bill(self, bill):
+                pass
+
+            def save_legislator(self, legislator):
+                pass
+
+        self.scraper = FakeScraper()
+        self.scraper.output = Output()
+        self.scraper._reset_matchers()
+        self.scraper.scrape_legislators('lower', '2009')
+
+    def vote(self, *names):
+        vote = Vote('lower', None, 'Passage', True, len(names), 0, 0)
+        for name in names:
+            vote.yes(name)
+        return vote
+
+    def testRecordsAreSharedWithinASession(self):
+        bill = Bill('2009', 'lower', 'HB 1', 'A bill')
+        bill.add_vote(self.vote('Jones', 'Ann Smith'))
+        bill.add_vote(self.vote('Jones', 'Nobody'))
+        self.scraper.add_bill(bill)
+
+        first, second = bill['votes']
+        assert first['yes_votes'][0] is second['yes_votes'][0]
+        assert first['yes_votes'][0] == {
+            'name': 'Jones', 'leg_id': ['2009', 'lower', '1', 'Bob Jones']}
+        assert first['yes_votes'][1]['leg_id'][3] == 'Ann Smith'
+        assert second['yes_votes'][1] == {'name': 'Nobody', 'leg_id': None}
+
+    def testNewLegislatorsInvalidateRecords(self):
+        bill = Bill('2009', 'lower', 'HB 1', 'A bill')
+        bill.add_vote(self.vote('Brown'))
+        self.scraper.add_bill(bill)
+        assert bill['votes'][0]['yes_votes'][0]['leg_id'] is None
+
+        self.scraper.add_legislator(Legislator('2009', 'lower', '2',
+                                               'Cy Brown', 'Cy', 'Brown', '',
+                                               'Democrat'))
+        bill = Bill('2009', 'lower', 'HB 2', 'A bill')
+        bill.add_vote(self.vote('Brown'))
+        self.scraper.add_bill(bill)
+        assert bill['votes'][0]['yes_votes'][0]['leg_id'][3] == 'Cy Brown'
+
+
+class WriteBillsTest(unittest.TestCase):
+
+    def setUp(self):
+        class Scraper(FakeScraper):
+            queue_size = 2
+            added = []
+
+            def add_bill(self, bill):
+                if bill['bill_id'] == 'HB 666':
+                    raise ScrapeError('bad bill')
+                self.added.append(bill['bill_id'])
+
+        self.scraper = Scraper()
+
+    def bills(self, n, scraped):
+        for i in range(n):
+            # backpressure: never more than queue_size bills waiting,
+            # plus the one being written and the one being queued
+            assert len(scraped) - len(self.scraper.added) <= 4
+            scraped.append(i)
+            yield Bill('2009', 'lower', 'HB %d' % i, 'A bill')
+
+    def testBillsAreWrittenInOrder(self):
+        self.scraper.write_bills(self.bills(50, []))
+        assert self.scraper.added == ['HB %d' % i for i in range(50)]
+
+    def testErrorsAreRaised(self):
+        def bills():
+            yield Bill('2009', 'lower', 'HB 666', 'A bill')
+            while True:
+                yield Bill('2009', 'lower', 'HB 1', 'A bill')
+        self.assertRaises(ScrapeError, self.scraper.write_bills, bills())
+
+        def no_data():
+            raise NoDataForYear('2010')
+            yield
+        self.assertRaises(NoDataForYear, self.scraper.write_bills, no_data())
+
+
+class ParallelRunTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def runScraper(self, *args):
+        output_dir = tempfile.mkdtemp(dir=self.dir)
+        argv = sys.argv
+        sys.argv = ['get_legislation.py', '--all', '-n', '-d', output_dir]
+        sys.argv.extend(args)
+        try:
+            FakeScraper().run()
+        finally:
+            sys.argv = argv
+
+        files = {}
+        for kind in ('bills', 'legislators'):
+            path = os.path.join(output_dir, kind)
+            for fn in os.listdir(path):
+                files[fn] = json.load(open(os.path.join(path, fn)))
+        return files
+
+    def testJobsMatchSerialRun(self):
+        serial = self.runScraper()
+        assert len(serial) == 2 * 2 * 3, sorted(serial.keys())
+        assert self.runScraper('--jobs', '3') == serial
+
+class RetryTest(unittest.TestCase):
+
+    def setUp(self):
+        import threading, BaseHTTPServer
+
+        self.failures = [503, 500]
+        test = self
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if test.failures:
+                    self.send_response(test.failures.pop(0))
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write('<html>bill</html>')
+            def log_message(self, *args):
+                pass
+
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+        self.url = 'http://127.0.0.1:%d/bill' % self.server.server_port
+
+        class Scraper(LegislationScraper):
+            state = 'zz'
+            no_cache = True
+            retry_wait = 0
+        self.scraper = Scraper()
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def testTransientErrorsAreRetried(self):
+        assert self.scraper.urlopen(self.url) == '<html>bill</html>'
+        assert self.failures == []
+
+    def testRetriesRunOut(self):
+        self.scraper.retries = 1
+        self.assertRaises(urllib2.HTTPError, self.scraper.urlopen, self.url)
+
+    def testClientErrorsAreNotRetried(self):
+        self.failures = [404]
+        self.assertRaises(urllib2.HTTPError, self.scraper.urlopen, self.url)
+
+class FlakyScraper(FakeScraper):
+    fail = None
+    calls = []
+
+    def scrape_bills(self, chamber, year):
+        self.calls.append((year, chamber))
+        if (year, chamber) == self.fail:
+            raise IOError('connection lost')
+        return FakeScraper.scrape_bills(self, chamber, year)
+
+class ResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def runScraper(self, output_dir, *args):
+        argv = sys.argv
+        sys.argv = ['get_legislation.py', '--all', '-n', '-d', output_dir]
+        sys.argv.extend(args)
+        FlakyScraper.calls = []
+        try:
+            FlakyScraper().run()
+        finally:
+            sys.argv = argv
+
+    def testResumeSkipsFinishedUnits(self):
+        output_dir = self.dir
+        checkpoint = os.path.join(output_dir, 'checkpoint.jsonl')
+
+        FlakyScraper.fail = ('2009', 'upper')
+        self.assertRaises(IOError, self.runScraper, output_dir)
+        assert os.path.exists(checkpoint)
+
+        FlakyScraper.fail = None
+        self.runScraper(output_dir, '--resume')
+        assert FlakyScraper.calls == [('2009', 'upper'), ('2009', 'lower')]
+        assert not os.path.exists(checkpoint)
+        assert len(os.listdir(os.path.join(output_dir, 'bills'))) == 2 * 2
+        assert len(os.listdir(os.path.join(output_dir, 'legislators'))) == \
+            2 * 2 * 2
+
+    def testRepeatedBillsAreWritten(self):
+        # e.g. PA's special session bills share the regular session's
+        # session and bill ids; the last one written wins, as without
+        # checkpoints
+        class Scraper(FlakyScraper):
+            def scrape_bills(self, chamber, year):
+                yield Bill(year, chamber, 'HB 1', 'Regular session')
+                yield Bill(year, chamber, 'HB 1', 'Special session')
+
+        output_dir = self.dir
+        argv = sys.argv
+        sys.argv = ['get_legislation.py', '-y', '2009', '--upper', '-n',
+                    '-d', output_dir]
+        try:
+            Scraper().run()
+        finally:
+            sys.argv = argv
+        bills = os.path.join(output_dir, 'bills')
+        [fn] = os.listdir(bills)
+        assert json.load(open(os.path.join(bills, fn)))['title'] == \
+            'Special session'
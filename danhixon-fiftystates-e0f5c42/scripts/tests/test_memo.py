@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.legislation import *
+from pyutils.memo import *
+
+class MemoizeParseTest(unittest.TestCase):
+
+    def setUp(self):
+        class Scraper(LegislationScraper):
+            state = 'zz'
+            memoize_parses = True
+            # always revalidate, so page edits are seen
+            default_cache_ttl = 0
+            parses = 0
+
+            @memoize_parse
+            def parse_vote(self, url):
+                self.parses += 1
+                with self.soup_context(url) as page:
+                    vote = Vote('lower', datetime.datetime(2009, 3, 1),
+                                page.find('h1').string, True, 1, 0, 0)
+                    vote.yes(page.find('li').string)
+                    vote.add_source(url)
+                return vote
+
+        self.dir = tempfile.mkdtemp()
+        self.page = os.path.join(self.dir, 'vote.html')
+        self.url = 'file://' + self.page
+        self.write('Passage', 'Smith')
+
+        self.Scraper = Scraper
+        self.scraper = self.scraper_for(Scraper)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def scraper_for(self, cls):
+        scraper = cls()
+        scraper.cache_dir = os.path.join(self.dir, 'cache')
+        return scraper
+
+    def write(self, motion, name):
+        open(self.page, 'w').write('<h1>%s</h1><ul><li>%s</li></ul>' %
+                                   (motion, name))
+
+    def testUnchangedPagesAreNotReparsed(self):
+        vote = self.scraper.parse_vote(self.url)
+        self.scraper.get_parse_results().close()
+
+        scraper = self.scraper_for(self.Scraper)
+        again = scraper.parse_vote(self.url)
+        assert scraper.parses == 0
+        assert again == vote
+        assert list(again['yes_votes']) == ['Smith']
+
+        self.write('Passage', 'Jones')
+        assert scraper.parse_vote(self.url)['yes_votes'] == ['Jones']
+        assert scraper.parses == 1
+
+    def testLargeSoupVote(self):
+        # a full PA House roll call; the motion and names are all
+        # NavigableStrings of the page's soup
+        open(self.page, 'w').write(
+            '<h1>Final Passage</h1><ul>%s</ul>' % ''.join(
+                '<li>Member %d of the %s District</li>' % (i, 'Nth' * 10)
+                for i in range(203)))
+
+        class Scraper(self.Scraper):
+            @memoize_parse
+            def parse_vote(self, url):
+                with self.soup_context(url) as page:
+                    vote = Vote('lower', datetime.datetime(2009, 3, 1),
+                                page.find('h1').string, True, 203, 0, 0)
+                    for li in page.findAll('li'):
+                        vote.yes(li.string)
+                return vote
+
+        scraper = self.scraper_for(Scraper)
+        vote = scraper.parse_vote(self.url)
+        assert type(vote['motion']) is unicode
+        scraper.get_parse_results().close()
+
+        scraper = self.scraper_for(Scraper)
+        results = scraper.get_parse_results()
+        size = results._db.execute(
+            "SELECT length(result) FROM results").fetchone()[0]
+        assert size < os.path.getsize(self.page)
+
+        again = scraper.parse_vote(self.url)
+        assert results.hits == 1
+        assert again == vote and len(again['yes_votes']) == 203
+
+    def testCodeVersion(self):
+        def parse(page):
+            return page.split('|')[0]
+        same = parse
+
+        def parse(page):
+            return page.split('|')[0]
+        assert code_version(parse) == code_version(same)
+
+        def parse(page):
+            return page.split('|')[1]
+        assert code_version(parse) != code_version(same)
+
+    def testDisabled(self):
+        self.scraper.memoize_parses = False
+        self.scraper.parse_vote(self.url)
+        self.scraper.parse_vote(self.url)
+        assert self.scraper.parses == 2
+        assert self.scraper.parse_results is None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.legislation import *
+from pyutils.output import *
+
+class OutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.bills = [Bill('2009', 'lower', 'HB %d' % i, 'Bill %d' % i,
+                           introduced=datetime.datetime(2009, 1, i + 1))
+                      for i in range(5)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testFileOutput(self):
+        output = FileOutput(self.dir, DateEncoder)
+        for bill in self.bills:
+            output.save_bill(bill)
+        output.close()
+        assert sorted(os.listdir(os.path.join(self.dir, 'bills'))) == [
+            '2009:lower:HB %d.json' % i for i in range(5)]
+
+    def testJSONLinesRotation(self):
+        output = JSONLinesOutput(self.dir, DateEncoder, max_records=2)
+        for bill in self.bills:
+            output.save_bill(bill)
+        output.close()
+
+        path = os.path.join(self.dir, 'bills')
+        assert sorted(os.listdir(path)) == ['2009.1.jsonl', '2009.2.jsonl',
+                                            '2009.jsonl']
+        ids = []
+        for fn in ('2009.jsonl', '2009.1.jsonl', '2009.2.jsonl'):
+            for line in open(os.path.join(path, fn)):
+                ids.append(json.loads(line)['bill_id'])
+        assert ids == ['HB %d' % i for i in range(5)]
+
+        # a new run starts from scratch
+        JSONLinesOutput(self.dir, DateEncoder)
+        assert os.listdir(path) == []
+
+    def testSQLiteOutput(self):
+        import sqlite3
+        bill = self.bills[0]
+        bill['state'] = 'zz'
+        bill.add_sponsor('primary', 'Smith', leg_id=['2009', 'lower', '1',
+                                                     'Ann Smith'])
+        bill.add_action('lower', 'Introduced', datetime.datetime(2009, 1, 1))
+        vote = Vote('lower', datetime.datetime(2009, 2, 1), 'Passage', True,
+                    1, 0, 0)
+        vote['yes_votes'] = [{'name': 'Smith',
+                              'leg_id': ['2009', 'lower', '1', 'Ann Smith']}]
+        bill.add_vote(vote)
+
+        output = SQLiteOutput(self.dir, DateEncoder)
+        output.save_bill(bill)
+        output.save_bill(bill)
+        output.close()
+
+        db = sqlite3.connect(os.path.join(self.dir, 'legislation.sqlite'))
+        assert db.execute("SELECT COUNT(*) FROM bills").fetchone()[0] == 1
+        assert db.execute("SELECT COUNT(*) FROM actions").fetchone()[0] == 1
+        (extra,) = db.execute("SELECT extra FROM bills").fetchone()
+        assert 'introduced' in json.loads(extra)
+        rows = db.execute("SELECT s.name, r.name FROM sponsors s JOIN "
+                          "vote_records r ON s.leg_id = r.leg_id").fetchall()
+        assert rows == [('Smith', 'Smith')], rows
+
+    def testConcurrentSQLiteWriters(self):
+        # as with --jobs: each writer has its own connection, and neither
+        # may hold the write lock between bills
+        import sqlite3, threading
+        errors = []
+
+        def write(chamber):
+            output = SQLiteOutput(self.dir, DateEncoder)
+            output.timeout = 5
+            try:
+                for i in range(20):
+                    bill = Bill('2009', chamber, 'HB %d' % i, 'A bill')
+                    bill['state'] = 'zz'
+                    output.save_bill(bill)
+                    # scraping the next bill
+                    time.sleep(0.01)
+                output.close()
+            except Exception, e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(chamber,))
+                   for chamber in ('upper', 'lower')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == [], errors
+        db = sqlite3.connect(os.path.join(self.dir, 'legislation.sqlite'))
+        assert db.execute("SELECT COUNT(*) FROM bills").fetchone()[0] == 40
+
+    def testColumnarExport(self):
+        from pyutils import columnar
+
+        output = FileOutput(self.dir, DateEncoder)
+        for bill in self.bills:
+            bill['state'] = 'zz'
+            bill.add_action('lower', 'Introduced', bill['introduced'])
+            vote = Vote('lower', None, 'Passage', True, 1, 1, 0)
+            vote['yes_votes'] = [{'name': 'Smith', 'leg_id': None}]
+            vote['no_votes'] = [{'name': 'Jones', 'leg_id': ['2009', 'lower',
+                                                            '2', 'Jones']}]
+            bill.add_vote(vote)
+            output.save_bill(bill)
+
+        out_dir = os.path.join(self.dir, 'columnar')
+        counts = columnar.export(self.dir, out_dir)
+        assert counts == {'bills': 5, 'actions': 5, 'sponsors': 0,
+                          'votes': 5, 'vote_records': 10}, counts
+
+        if columnar.pyarrow is None:
+            records = columnar.read_table(os.path.join(out_dir,
+                                                       'vote_records'))
+            assert records['name'][:2] == ['Smith', 'Jones']
+            assert records['vote_id'][:4] == [0, 0, 1, 1]
+            assert records['leg_id'][0] is None
+
+            actions = columnar.read_table(os.path.join(out_dir, 'actions'))
+            assert actions['date'][0] == DateEncoder().default(
+                datetime.datetime(2009, 1, 1))
+
+    def testColumnarStringDates(self):
+        from pyutils import columnar
+
+        # as GA, CT and VT store them
+        bill = self.bills[0]
+        bill['state'] = 'zz'
+        bill.add_action('lower', 'Introduced', '1/13/95')
+        bill.add_action('lower', 'Read', 'sometime')
+        FileOutput(self.dir, DateEncoder).save_bill(bill)
+
+        out_dir = os.path.join(self.dir, 'columnar')
+        assert columnar.export(self.dir, out_dir)['actions'] == 2
+        if columnar.pyarrow is None:
+            actions = columnar.read_table(os.path.join(out_dir, 'actions'))
+            assert actions['date'] == [DateEncoder().default(
+                datetime.datetime(1995, 1, 13)), None]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+import unittest
+import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyutils.parsing import *
+
+PAGE = """<html><head><title>Bills</title></head><body>
+<!-- bill list -->
+<table id="bills" class="list">
+<tr><th>Bill</th><th>Title</th></tr>
+<tr><td><a href="/b/1">HB 1</a></td><td class="t">An act <b>about</b> things</td></tr>
+<tr><td><a href="/b/2">HB 2</a></td><td class="t">Another act</td></tr>
+</table>
+<p>Yeas: 3 <br/>Nays: 2</p>
+<div><span>Sponsor:</span> Smith</div>
+</body></html>"""
+
+def queries(doc):
+    """
+    A sample of the searches the state scrapers make.
+    """
+    return [
+        [a['href'] for a in doc.findAll('a')],
+        [a.string for a in doc.findAll('a', href=re.compile('/b/'))],
+        len(doc.find('table', id='bills').findAll('tr')),
+        doc.find('table', {'class': 'list'})['id'],
+        [td.contents[0] for td in doc.findAll('td', 't')],
+        doc.find(text=re.compile('Yeas')).strip(),
+        doc.find(text=re.compile('Yeas')).parent.name,
+        doc.find('br').nextSibling,
+        doc.find('span').nextSibling.strip(),
+        doc.find('a').findNext('a').string,
+        doc.find('a').findNext(text=True),
+        doc.findAll('a')[1].findPrevious('a').string,
+        doc.find('td').findNextSibling('td')['class'],
+        doc.find('a').findParent('tr').findNextSibling('tr').td.a.string,
+        doc.find('tr')('th')[1].string,
+        doc.title.string,
+        [tag.name for tag in doc.findAll(['th', 'b'])],
+        doc.find('td', 't').contents[1].string,
+        doc.find('b').previousSibling,
+        doc.find('td', text='Another act').parent['class'],
+        doc.find('td', 't').getText(),
+        doc.find('table').getText(u'|'),
+        doc.find('p').findAll(text=True),
+        len(doc.findAll(True)),
+    ]
+
+class ParsingTest(unittest.TestCase):
+
+    def testLxmlMatchesBeautifulSoup(self):
+        assert queries(parse_html(PAGE, 'lxml')) == \
+            queries(parse_html(PAGE, 'soup'))
+
+    def testEmptyAndUnicodePages(self):
+        assert parse_html('', 'lxml').find('a') is None
+        doc = parse_html(u'<?xml version="1.0" encoding="utf-8"?>'
+                         u'<p>Mart\xednez</p>', 'lxml')
+        assert doc.find('p').string == u'Mart\xednez'
+
+    def testUnknownParser(self):
+        self.assertRaises(ValueError, parse_html, PAGE, 'nonesuch')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import datetime
+from cStringIO import StringIO
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'ca'))
+
+import pubinfo
+import get_legislation
+from get_legislation import CASQLImporter, extract_titles
+
+BILL_XML = ('<?xml version="1.0" encoding="UTF-8"?><caml:MeasureDoc '
+            'xmlns:caml="http://lc.ca.gov/legalservices/schemas/caml.1#">'
+            '<caml:Title>An act to add Section 1 to the Fish and Game Code'
+            '</caml:Title><caml:Subject>Fishing</caml:Subject>'
+            '</caml:MeasureDoc>')
+
+def row(*fields):
+    return '\t'.join(fields) + '\r\n'
+
+class ReadDatTest(unittest.TestCase):
+
+    def testFields(self):
+        f = StringIO(row('`AB1`', '12', 'NULL', '``', '\\N') +
+                     row('`a\tb`', '`two\r\nlines`', '`it\\`s \\\\`'))
+        assert list(pubinfo.read_dat(f)) == [
+            [u'AB1', u'12', None, u'', None],
+            [u'a\tb', u'two\nlines', u'it`s \\']]
+
+    def testUnterminatedField(self):
+        f = StringIO(row('`AB1', '12'))
+        self.assertRaises(ValueError, list, pubinfo.read_dat(f))
+
+class ExtractTitlesTest(unittest.TestCase):
+
+    def testTitles(self):
+        assert extract_titles(BILL_XML.decode('utf-8'), chunk_size=7) == (
+            'An act to add Section 1 to the Fish and Game Code', 'Fishing')
+        assert extract_titles(u'<Bill><Title>A <b>bill</b></Title>') == (
+            'A bill', '')
+
+    def testEveryTitle(self):
+        xml = BILL_XML.replace('<caml:Subject>',
+                               '<caml:Title> and Section 2</caml:Title>'
+                               '<caml:Subject>')
+        assert extract_titles(xml, chunk_size=100)[0] == (
+            'An act to add Section 1 to the Fish and Game Code and '
+            'Section 2')
+
+    def testTitleAfterTheBody(self):
+        xml = BILL_XML.replace('</caml:MeasureDoc>',
+                               '<p>x</p>' * 1000 +
+                               '<p><caml:Title> and Section 2</caml:Title>'
+                               '</p></caml:MeasureDoc>')
+        assert extract_titles(xml, chunk_size=100)[0] == (
+            'An act to add Section 1 to the Fish and Game Code and '
+            'Section 2')
+
+    def testBrokenRemainder(self):
+        xml = BILL_XML.replace('</caml:MeasureDoc>', '<p>' * 100000)
+        assert extract_titles(xml, chunk_size=100)[1] == 'Fishing'
+
+class VoteThresholdsTest(unittest.TestCase):
+
+    def testThreshold(self):
+        class Version(object):
+            def __init__(self, day, vote_required):
+                self.bill_version_action_date = datetime.datetime(2009, 1,
+                                                                  day)
+                self.vote_required = vote_required
+
+        thresholds = get_legislation.VoteThresholds(
+            [Version(20, 'Majority'), Version(5, '2/3'),
+             Version(10, 'Majority')])
+
+        def floor(day, hour=0):
+            return thresholds.threshold(
+                'AFLOOR', datetime.datetime(2009, 1, day, hour))
+
+        assert floor(5) == '2/3'
+        assert floor(10) == floor(19, 23) == '1/2'
+        assert thresholds.threshold(
+            'CX08', datetime.datetime(2009, 1, 7)) == '1/2'
+        self.assertRaises(IndexError, floor, 4)
+
+class LoadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.write('BILL_TBL.dat',
+                   row('`200920100AB1`', '`20092010`', '`0`', '`AB`', '1',
+                       *(['NULL'] * 13)))
+        self.write('BILL_VERSION_TBL.dat',
+                   row('`20092010AB199INT`', '`200920100AB1`', '1',
+                       '`2009-01-05 00:00:00`', '`Introduced`', 'NULL',
+                       '`Fishing`', '`Majority`', *(['NULL'] * 6 +
+                       ['`BILL_VERSION_TBL_1.lob`'] + ['NULL'] * 3)))
+        self.write('BILL_VERSION_TBL_1.lob', BILL_XML)
+        self.write('BILL_VERSION_AUTHORS_TBL.dat',
+                   row('`20092010AB199INT`', '`LEGISLATOR`', '`ASSEMBLY`',
+                       '`Smith`', '`LEAD_AUTHOR`', 'NULL', 'NULL', 'NULL',
+                       '`2009-01-05 00:00:00`', '`Y`'))
+        self.db = os.path.join(self.dir, 'capublic.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, data):
+        f = open(os.path.join(self.dir, name), 'wb')
+        f.write(data)
+        f.close()
+
+    def testImportFromLoadedFiles(self):
+        counts = pubinfo.load(self.db, self.dir)
+        assert counts == {'bill_tbl': 1, 'bill_version_tbl': 1,
+                          'bill_version_authors_tbl': 1}
+        # loading again replaces rows rather than duplicating them
+        pubinfo.load(self.db, self.dir)
+
+        importer = CASQLImporter(url='sqlite:///' + self.db)
+        bills = list(importer.scrape_bills('lower', '2009'))
+        assert len(bills) == 1
+        assert bills[0]['title'] == \
+            'An act to add Section 1 to the Fish and Game Code'
+        assert bills[0]['short_title'] == 'Fishing'
+        assert bills[0]['sponsors'] == [{'type': 'LEAD_AUTHOR',
+                                         'name': 'Smith'}]
+
+    def testTitles(self):
+        pubinfo.load(self.db, self.dir)
+
+        def titles():
+            importer = CASQLImporter(url='sqlite:///' + self.db)
+            importer.cache_dir = self.dir
+            importer.memoize_parses = True
+            version = importer.session.query(
+                get_legislation.CABillVersion).one()
+            version.trans_update = datetime.datetime(2009, 1, 5)
+            return importer, version, importer.version_titles(version)
+
+        importer, version, first = titles()
+        assert first[1] == 'Fishing'
+        importer.get_parse_results().close()
+
+        # a fresh importer finds the titles stored rather than loading
+        # the XML
+        importer, version, second = titles()
+        assert second == first
+        assert 'bill_xml' not in version.__dict__
+        assert importer.get_parse_results().hits == 1
+
+        importer.skip_bill_xml = True
+        bills = list(importer.scrape_bills('lower', '2009'))
+        assert bills[0]['title'] == bills[0]['short_title'] == 'Fishing'
+
+    def testIncrementalImport(self):
+        import sqlite3
+        pubinfo.load(self.db, self.dir)
+
+        class Output(object):
+            def save_bill(self, bill):
+                saved.append(bill)
+
+        def run():
+            importer = CASQLImporter(url='sqlite:///' + self.db)
+            importer.incremental = True
+            importer.output_dir = self.dir
+            importer.output = Output()
+            importer._reset_matchers()
+            importer._scrape_bills('lower', '2009')
+
+        saved = []
+        run()
+        assert len(saved) == 1
+        saved = []
+        run()
+        assert saved == []
+
+        db = sqlite3.connect(self.db)
+        db.execute("UPDATE bill_version_authors_tbl "
+                   "SET trans_update = '2009-02-01 00:00:00'")
+        db.commit()
+        db.close()
+        run()
+        assert len(saved) == 1
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyutils.throttle import Throttle, parse_retry_after
+
+class ThrottleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.throttle = Throttle(rate=1.0, burst=2, min_rate=0.25,
+                                 max_rate=1.5, increase=0.25,
+                                 clock=lambda: self.now,
+                                 sleep=self.sleep)
+        self.url = 'http://example.com/bill'
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def testBurstThenRate(self):
+        assert self.throttle.wait(self.url) == 0
+        assert self.throttle.wait(self.url) == 0
+        assert self.throttle.wait(self.url) == 1.0
+        assert self.throttle.wait(self.url) == 1.0
+
+    def testHostsAreIndependent(self):
+        for i in range(2):
+            self.throttle.wait(self.url)
+        assert self.throttle.wait('http://example.org/bill') == 0
+
+    def testRateAdapts(self):
+        self.throttle.record(self.url, 0.1)
+        self.throttle.record(self.url, 0.1)
+        self.throttle.record(self.url, 0.1)
+        assert self.throttle.host_rate(self.url) == 1.5
+        assert self.throttle.record(self.url, 0.1, 429) == 0.75
+        assert self.throttle.record(self.url, 10.0) == 0.375
+        assert self.throttle.record(self.url, 0.1, 503) == 0.25
+
+    def testRetryAfter(self):
+        self.throttle.record(self.url, 0.1, 503, '30')
+        assert self.throttle.wait(self.url) == 30
+        self.throttle.record(self.url, 0.1, 404, '30')
+        assert self.throttle.wait(self.url) < 30
+
+    def testParseRetryAfter(self):
+        assert parse_retry_after('5') == 5
+        assert parse_retry_after('soon') is None
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT',
+                                 now=1445412480 + 60) == 0
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,6 @@
 import urllib2
 import re
 import datetime as dt
-import html5lib
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,8 +10,7 @@ from pyutils.legislation import *
 class UTLegislationScraper(LegislationScraper):
 
     state = 'ut'
-    soup_parser = html5lib.HTMLParser(
-        tree=html5lib.treebuilders.getTreeBuilder('beautifulsoup')).parse
+    html_parser = 'html5lib'
 
     # TODO: Grab sessions/sub_sessions programmatically from the site
     metadata = {'state_name': 'Utah',
@@ -61,7 +59,7 @@ class UTLegislationScraper(LegislationScraper):
             title = 'Senator'
 
         url = 'http://www.le.state.ut.us/asp/roster/roster.asp?year=%s' % year
-        leg_list = self.soup_parser(self.urlopen(url))
+        leg_list = self.parse_html(self.urlopen(url))
 
         for row in leg_list.findAll('table')[1].findAll('tr')[1:]:
             tds = row.findAll('td')
@@ -84,7 +82,7 @@ class UTLegislationScraper(LegislationScraper):
         chamber = bill['chamber']
         session = bill['session']
         bill_id = bill['bill_id']
-        status = self.soup_parser(self.urlopen(url))
+        status = self.parse_html(self.urlopen(url))
         bill.add_source(url)
         act_table = status.table
 
@@ -177,7 +175,7 @@ class UTLegislationScraper(LegislationScraper):
         self.log("Getting bill list for %s, %s" % (session, chamber))
 
         try:
-            base_bill_list = self.soup_parser(self.urlopen(bill_list_url))
+            base_bill_list = self.parse_html(self.urlopen(bill_list_url))
         except:
             # this session doesn't exist for this year
             return
@@ -185,14 +183,14 @@ class UTLegislationScraper(LegislationScraper):
         bill_list_link_re = re.compile('.*%s\d+ht.htm$' % bill_abbr)
 
         for link in base_bill_list.findAll('a', href=bill_list_link_re):
-            bill_list = self.soup_parser(self.urlopen(link['href']))
+            bill_list = self.parse_html(self.urlopen(link['href']))
             bill_link_re = re.compile('.*billhtm/%s.*.htm' % bill_abbr)
 
             for bill_link in bill_list.findAll('a', href=bill_link_re):
                 bill_id = bill_link.find(text=True).strip()
 
                 bill_info_url = bill_link['href']
-                bill_info = self.soup_parser(self.urlopen(bill_info_url))
+                bill_info = self.parse_html(self.urlopen(bill_info_url))
 
                 (bill_title, primary_sponsor) = bill_info.h3.contents[2].replace('&nbsp;', ' ').strip().split(' -- ')
 
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-import urllib2, urllib
+import urllib
 import re
 from BeautifulSoup import BeautifulSoup
 import datetime as dt
@@ -172,7 +172,7 @@ class VTLegislationScraper(LegislationScraper):
                                  'Session': session.split('-')[1]})
         bill_list_url = "http://www.leg.state.vt.us/database/rintro/results.cfm"
         self.log("Getting bill list for %s %s" % (chamber, session))
-        bill_list = BeautifulSoup(urllib2.urlopen(bill_list_url, data))
+        bill_list = BeautifulSoup(self.urlopen(bill_list_url, data))
 
         bill_link_re = re.compile('.*?Bill=%s.\d+.*' % bill_abbr[0])
         for bill_link in bill_list.findAll('a', href=bill_link_re):